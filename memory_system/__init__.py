@@ -4,9 +4,22 @@ Claude Code Memory System
 A persistent context management system for Claude Code sessions.
 """
 
-from .context_manager import ContextManager
-from .semantic_graph import SemanticCodeGraph
-from .summarizer import ProgressiveSummarizer
-
 __version__ = "1.0.0"
-__all__ = ["ContextManager", "SemanticCodeGraph", "ProgressiveSummarizer"]
\ No newline at end of file
+__all__ = ["ContextManager", "AsyncMemoryContext", "SemanticCodeGraph", "ProgressiveSummarizer"]
+
+# Public classes are imported on first use so that light entry points (such
+# as the context daemon client) don't pay for YAML, SQLite, neo4j or
+# sentence-transformers imports they never need
+_LAZY_ATTRIBUTES = {
+    "AsyncMemoryContext": ".async_context",
+    "ContextManager": ".context_manager",
+    "ProgressiveSummarizer": ".summarizer",
+    "SemanticCodeGraph": ".semantic_graph",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        from importlib import import_module
+        return getattr(import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
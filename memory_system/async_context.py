@@ -0,0 +1,177 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from . import tracing
+
+_DONE = object()
+
+# ContextManagers kept by process-pool workers, one per memory directory, so
+# their section caches stay warm between requests
+_worker_managers = {}
+
+
+def _worker_manager(memory_dir, backend):
+    from .context_manager import ContextManager
+
+    manager = _worker_managers.get((memory_dir, backend))
+    if manager is None:
+        manager = _worker_managers[(memory_dir, backend)] = ContextManager(memory_dir, backend=backend)
+    return manager
+
+
+def _reconstruct_in_worker(memory_dir, backend, project_root, budget_tokens, query, since):
+    """Process-pool worker: build context with this process's ContextManager"""
+    return _worker_manager(memory_dir, backend).reconstruct_context(
+        project_root, budget_tokens=budget_tokens, query=query, since=since)
+
+
+def _load_session_in_worker(memory_dir, backend, session_id):
+    """Process-pool worker: load_session with this process's ContextManager"""
+    return _worker_manager(memory_dir, backend).load_session(session_id)
+
+
+class AsyncMemoryContext:
+    """asyncio front end to ContextManager for agents running on an event loop.
+
+    The blocking work (file reads, YAML and JSON parsing, SQLite queries)
+    runs on an executor, never on the loop:
+
+    - By default a private thread pool runs each generation one section
+      at a time and loads the six sections concurrently.
+    - With a ProcessPoolExecutor, each generation runs whole in a worker
+      process with its own ContextManager. Parsing then leaves the GIL of
+      the serving process too.
+
+    Concurrent calls with the same arguments (and no ``since``) share one
+    generation. Many agent sessions asking for the same project's context
+    therefore cost about one reconstruction.
+
+    Cancelling a call, or its timeout expiring, returns control at once.
+    On the thread pool the generation stops after the section in
+    progress. A process worker finishes its generation, but the result is
+    dropped.
+    """
+
+    def __init__(self, memory_dir=".claude-memory", executor=None, max_workers=None,
+                 use_cache=True, backend=None):
+        from .context_manager import ContextManager
+
+        self.memory_dir = memory_dir
+        self.backend = backend
+        self.process_pool = isinstance(executor, ProcessPoolExecutor)
+        self.manager = None if self.process_pool else ContextManager(memory_dir, use_cache, backend)
+        self._own_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=max_workers or min(32, (os.cpu_count() or 1) + 4),
+            thread_name_prefix='memory-context')
+        # One generation steps through the manager at a time; sections
+        # within a step load concurrently on section_executor
+        self._step_lock = threading.Lock()
+        self.section_executor = None if self.process_pool else ThreadPoolExecutor(
+            max_workers=len(self.manager.SECTIONS), thread_name_prefix='memory-section')
+        self._inflight = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        """Shut down the pools this object created; running work is left to finish"""
+        if self._own_executor:
+            self.executor.shutdown(wait=False)
+        if self.section_executor is not None:
+            self.section_executor.shutdown(wait=False)
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    def _step(self, generator):
+        with self._step_lock:
+            return next(generator, _DONE)
+
+    def _close(self, generator):
+        with self._step_lock:
+            generator.close()
+
+    async def iter_context(self, project_root, budget_tokens=None, query=None, since=None):
+        """Yield the context prompt one section at a time, like ContextManager.iter_context.
+
+        Each section is produced on the executor. Leaving the loop early, or
+        cancelling it, closes the generation without waiting for it.
+        """
+        if self.process_pool:
+            yield await self._reconstruct(project_root, budget_tokens, query, since)
+            return
+
+        generator = self.manager.iter_context(project_root, budget_tokens, query, since,
+                                              executor=self.section_executor)
+        try:
+            while True:
+                section = await self._run(self._step, generator)
+                if section is _DONE:
+                    return
+                yield section
+        finally:
+            # Runs once any step still in flight has returned; saves the cache
+            try:
+                asyncio.get_running_loop().run_in_executor(self.executor, self._close, generator)
+            except RuntimeError:
+                # The executor was shut down; finish closing here
+                self._close(generator)
+
+    async def _reconstruct(self, project_root, budget_tokens, query, since):
+        if self.process_pool:
+            return await self._run(_reconstruct_in_worker, self.memory_dir, self.backend,
+                                   project_root, budget_tokens, query, since)
+        sections = [section async for section in
+                    self.iter_context(project_root, budget_tokens, query, since)]
+        return "\n".join(sections)
+
+    async def reconstruct_context(self, project_root, budget_tokens=None, query=None, since=None,
+                                  timeout=None):
+        """Reconstruct context without blocking the event loop.
+
+        Takes the same arguments as ContextManager.reconstruct_context.
+        With timeout (seconds), asyncio.TimeoutError is raised if the
+        context is not ready in time. Callers waiting on a shared
+        generation can each time out or be cancelled on their own; the
+        generation stops only when none of them is still waiting.
+        """
+        with tracing.span('areconstruct_context', budget_tokens=budget_tokens, query=query,
+                          since=since):
+            if since is not None:
+                # Delta generations move the watermark, so each one runs alone
+                return await asyncio.wait_for(
+                    self._reconstruct(project_root, budget_tokens, query, since), timeout)
+
+            key = (os.path.abspath(project_root), budget_tokens, query)
+            entry = self._inflight.get(key)
+            if entry is None:
+                task = asyncio.ensure_future(self._reconstruct(project_root, budget_tokens, query, None))
+                entry = self._inflight[key] = [task, 0]
+                task.add_done_callback(lambda _: self._forget(key, entry))
+            task = entry[0]
+            entry[1] += 1
+            try:
+                return await asyncio.wait_for(asyncio.shield(task), timeout)
+            finally:
+                entry[1] -= 1
+                if entry[1] == 0 and not task.done():
+                    self._forget(key, entry)
+                    task.cancel()
+
+    def _forget(self, key, entry):
+        if self._inflight.get(key) is entry:
+            del self._inflight[key]
+
+    async def load_session(self, session_id):
+        """ContextManager.load_session on the executor"""
+        if self.process_pool:
+            return await self._run(_load_session_in_worker, self.memory_dir, self.backend,
+                                   session_id)
+        return await self._run(self.manager.load_session, session_id)
@@ -0,0 +1,53 @@
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+BatchResult = namedtuple('BatchResult', ['project_root', 'context', 'seconds', 'error'])
+
+
+def _reconstruct_one(project_root, memory_dirname, budget_tokens):
+    """Worker: build one project's context, timing it and capturing any error"""
+    from .context_manager import ContextManager
+
+    start = time.perf_counter()
+    try:
+        if not os.path.isdir(project_root):
+            raise FileNotFoundError(f"project root not found: {project_root}")
+        cm = ContextManager(os.path.join(project_root, memory_dirname))
+        context = cm.reconstruct_context(project_root, budget_tokens=budget_tokens)
+        return BatchResult(project_root, context, time.perf_counter() - start, None)
+    except Exception as e:
+        return BatchResult(project_root, None, time.perf_counter() - start, f"{type(e).__name__}: {e}")
+
+
+def reconstruct_many(project_roots, max_workers=None, budget_tokens=None,
+                     memory_dirname=".claude-memory"):
+    """Reconstruct context for many projects on a bounded process pool.
+
+    Yields a BatchResult per project as soon as it finishes, so results
+    arrive in completion order rather than input order. A failing project
+    is reported through BatchResult.error and does not stop the others.
+    """
+    project_roots = [os.path.abspath(root) for root in project_roots]
+    if not project_roots:
+        return
+    workers = min(max_workers or os.cpu_count() or 1, len(project_roots))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_reconstruct_one, root, memory_dirname, budget_tokens)
+                   for root in project_roots]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def discover_projects(root, memory_dirname=".claude-memory"):
+    """Project roots under root that have their own memory directory"""
+    projects = []
+    for dirpath, dirnames, _ in os.walk(root):
+        if memory_dirname in dirnames:
+            projects.append(dirpath)
+        # Don't descend into memory directories, VCS metadata or dependencies
+        dirnames[:] = [d for d in dirnames
+                       if d != memory_dirname and d not in ('.git', 'node_modules', '__pycache__')]
+    return sorted(projects)
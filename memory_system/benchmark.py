@@ -0,0 +1,262 @@
+import gc
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from .bm25_index import DecisionSearchIndex
+from .decision_log import DecisionLog
+from .drift_stats import DriftAggregates
+from .extractive import extract
+from .rollups import SummaryRollups
+from .yaml_cache import dump_yaml
+
+DRIFT_TYPES = ('enhancement', 'minor', 'major', 'none')
+AREAS = ('auth', 'storage', 'api', 'billing', 'search', 'ui', 'deploy', 'cache', 'sync', 'docs')
+WORDS = ("token session cache index schema migration retry queue worker latency "
+         "payload handler router config secret tenant quota shard replica backup").split()
+
+# Audit events counted as file operations while a phase runs
+FILE_EVENTS = ('open', 'os.scandir', 'os.listdir', 'os.remove', 'os.rename', 'sqlite3.connect')
+
+_file_ops = None
+_hook_installed = False
+
+
+def _audit(event, args):
+    if _file_ops is not None and event in FILE_EVENTS:
+        _file_ops[event] = _file_ops.get(event, 0) + 1
+
+
+def _install_audit_hook():
+    # Audit hooks cannot be removed, so one is added per process, on first use
+    global _hook_installed
+    if not _hook_installed:
+        sys.addaudithook(_audit)
+        _hook_installed = True
+
+
+def _sentence(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def iter_decisions(count, days=365, seed=0, now=None):
+    """Deterministic synthetic decisions, oldest first, spread evenly over the last days"""
+    rng = random.Random(seed)
+    end = now or time.time()
+    step = days * 86400 / max(count, 1)
+    for i in range(count):
+        area = rng.choice(AREAS)
+        yield {
+            'timestamp': datetime.fromtimestamp(end - (count - i) * step).isoformat(),
+            'context': f"{area}: {_sentence(rng, 5)}",
+            'prp_requirement': "Not specified",
+            'actual_implementation': _sentence(rng, 12),
+            'drift_type': rng.choice(DRIFT_TYPES),
+            'rationale': _sentence(rng, 15),
+            'impact': [f"src/{area}/{rng.choice(WORDS)}.py" for _ in range(rng.randint(1, 3))],
+            'approved': True,
+        }
+
+
+def iter_sessions(count, days=365, seed=0, now=None):
+    """Deterministic synthetic session summaries, oldest first"""
+    rng = random.Random(seed + 1)
+    end = now or time.time()
+    step = days * 86400 / max(count, 1)
+    for i in range(count):
+        changes = [{'file': f"src/{rng.choice(AREAS)}/{rng.choice(WORDS)}.py",
+                    'change': _sentence(rng, 6)} for _ in range(rng.randint(1, 8))]
+        yield end - (count - i) * step, {
+            'session_id': f"bench-{i:06d}",
+            'timestamp': datetime.fromtimestamp(end - (count - i) * step).isoformat(),
+            'changes': changes,
+            'decisions': [_sentence(rng, 8) for _ in range(rng.randint(0, 3))],
+            'files_modified': sorted({c['file'] for c in changes}),
+        }
+
+
+def _build_derived(memory_dir, count, sessions, days, seed, now):
+    """rebuild_derived, regenerating the decisions for each consumer instead of holding them"""
+    stats = DriftAggregates(memory_dir)
+    stats.rebuild(iter_decisions(count, days, seed, now))
+    stats.close()
+    index = DecisionSearchIndex(memory_dir)
+    index.rebuild(iter_decisions(count, days, seed, now))
+    index.close()
+    SummaryRollups(memory_dir).rebuild(s for _, s in iter_sessions(sessions, days, seed, now))
+
+
+def generate_memory(project_root, decisions=1000, sessions=100, milestone_kb=4,
+                    days=365, seed=0, backend='files', batch=10000):
+    """Write a synthetic .claude-memory tree (and prp.md) under project_root.
+
+    Content depends only on the arguments; timestamps are spread over the
+    days before now so the 7- and 30-day windows always hold data.
+    Decisions are written in batches, so a million of them never sit in
+    memory at once. Returns the memory directory.
+    """
+    now = time.time()
+    memory_dir = os.path.join(project_root, ".claude-memory")
+    summaries_dir = os.path.join(memory_dir, "summaries")
+    os.makedirs(summaries_dir, exist_ok=True)
+
+    with open(os.path.join(project_root, "prp.md"), 'w') as f:
+        f.write("# Product Requirements\n\nSynthetic PRP for benchmarking.\n")
+    rng = random.Random(seed + 2)
+    with open(os.path.join(summaries_dir, "milestone-001.md"), 'w') as f:
+        f.write("# Milestone 1: Synthetic benchmark milestone\n\n")
+        written = 0
+        while written < milestone_kb * 1024:
+            line = f"- {_sentence(rng, 12)}\n"
+            f.write(line)
+            written += len(line)
+
+    if backend == 'sqlite':
+        from .sqlite_store import SQLiteStore
+        store = SQLiteStore(memory_dir)
+        with store.conn:
+            for decision in iter_decisions(decisions, days, seed, now):
+                store._insert_decision(decision)
+        store.upsert_sessions([summary for _, summary in iter_sessions(sessions, days, seed, now)])
+        store.close()
+        _build_derived(memory_dir, decisions, sessions, days, seed, now)
+        return memory_dir
+
+    log = DecisionLog(memory_dir)
+    os.makedirs(log.log_dir, exist_ok=True)
+    open(log.index_path, 'wb').close()
+    pending = []
+    for decision in iter_decisions(decisions, days, seed, now):
+        pending.append(decision)
+        if len(pending) == batch:
+            log._write(pending, log.log_dir, log._last_record())
+            pending = []
+    if pending:
+        log._write(pending, log.log_dir, log._last_record())
+    _build_derived(memory_dir, decisions, sessions, days, seed, now)
+
+    for mtime, summary in iter_sessions(sessions, days, seed, now):
+        path = os.path.join(summaries_dir, f"session-{summary['session_id']}.yaml")
+        with open(path, 'w') as f:
+            dump_yaml(summary, f)
+        os.utime(path, (mtime, mtime))
+    return memory_dir
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def measure(fn, repeat=10, setup=None):
+    """Latency percentiles over repeat runs, then one traced run for memory and file ops"""
+    global _file_ops
+    _install_audit_hook()
+    latencies = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    if setup:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    _file_ops = {}
+    try:
+        fn()
+        ops = _file_ops
+    finally:
+        _file_ops = None
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        'runs': repeat,
+        'p50_ms': percentile(latencies, 50),
+        'p90_ms': percentile(latencies, 90),
+        'p99_ms': percentile(latencies, 99),
+        'max_ms': max(latencies),
+        'mean_ms': sum(latencies) / len(latencies),
+        'peak_kb': peak / 1024,
+        'file_ops': ops,
+    }
+
+
+def run_benchmarks(project_root, repeat=10, phases=None):
+    """Time the ContextManager entry points against a generated tree"""
+    from .context_manager import ContextManager
+
+    memory_dir = os.path.join(project_root, ".claude-memory")
+    cache_path = os.path.join(memory_dir, "cache", "context.json")
+
+    def drop_cache():
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+
+    warm = ContextManager(memory_dir)
+    warm.reconstruct_context(project_root)
+    rng = random.Random(0)
+    change_lines = [f"src/{rng.choice(AREAS)}/{rng.choice(WORDS)}.py: {_sentence(rng, 10)}"
+                    for _ in range(5000)]
+    cases = {
+        'reconstruct_cold': (lambda: ContextManager(memory_dir).reconstruct_context(project_root),
+                             drop_cache),
+        'reconstruct_warm': (lambda: ContextManager(memory_dir).reconstruct_context(project_root), None),
+        'reconstruct_uncached': (
+            lambda: ContextManager(memory_dir, use_cache=False).reconstruct_context(project_root), None),
+        'reconstruct_budget': (
+            lambda: ContextManager(memory_dir, use_cache=False).reconstruct_context(
+                project_root, budget_tokens=2000), None),
+        'reconstruct_query': (
+            lambda: ContextManager(memory_dir, use_cache=False).reconstruct_context(
+                project_root, query="cache latency retry"), None),
+        'get_recent_decisions': (lambda: warm._get_recent_decisions(days=7), None),
+        'get_recent_summaries': (lambda: warm._get_recent_summaries(count=5), None),
+        'extract_highlights': (lambda: extract(change_lines), None),
+    }
+    results = {}
+    for name, (fn, setup) in cases.items():
+        if phases and name not in phases:
+            continue
+        results[name] = measure(fn, repeat, setup)
+    return results
+
+
+def benchmark_report(params, results):
+    return {
+        'created': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': params,
+        'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'phases': results,
+    }
+
+
+def compare_reports(old, new):
+    """(phase, old p50, new p50, ratio) for phases present in both reports"""
+    rows = []
+    for name, result in new['phases'].items():
+        before = old.get('phases', {}).get(name)
+        if before:
+            ratio = result['p50_ms'] / before['p50_ms'] if before['p50_ms'] else float('inf')
+            rows.append((name, before['p50_ms'], result['p50_ms'], ratio))
+    return rows
+
+
+def load_report(path):
+    with open(path, 'r') as f:
+        return json.load(f)
@@ -0,0 +1,197 @@
+import json
+import math
+import os
+import re
+import sqlite3
+import subprocess
+from collections import Counter
+
+from . import tracing
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    length INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    doc_length INTEGER NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT PRIMARY KEY,
+    df INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+INDEXED_FIELDS = ('context', 'rationale', 'actual_implementation', 'impact')
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the this
+to was were will with py md yaml json src lib test tests
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_CAMEL = re.compile(r"([a-z0-9])([A-Z])")
+
+
+def tokenize(text):
+    """Lowercase word tokens with camelCase split and stopwords removed"""
+    text = _CAMEL.sub(r"\1 \2", str(text))
+    return [t for t in _TOKEN.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def decision_text(decision):
+    parts = []
+    for field in INDEXED_FIELDS:
+        value = decision.get(field)
+        if isinstance(value, (list, tuple)):
+            parts.extend(str(v) for v in value)
+        elif value:
+            parts.append(str(value))
+    return "\n".join(parts)
+
+
+def git_diff_query(project_root):
+    """Query text built from the paths of files changed in the working tree"""
+    try:
+        result = subprocess.run(
+            ["git", "diff", "--name-only", "HEAD"], cwd=project_root,
+            capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return ""
+    if result.returncode != 0:
+        return ""
+    return " ".join(result.stdout.split())
+
+
+class DecisionSearchIndex:
+    """Persistent BM25 inverted index over decisions.
+
+    Postings live in ``search-index.db`` (SQLite, no FTS extension needed)
+    and are added incrementally as decisions are written. Each posting
+    carries its document length, so scoring a query only reads the posting
+    lists of the query terms.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, memory_dir=".claude-memory"):
+        self.memory_dir = memory_dir
+        self.path = os.path.join(memory_dir, "search-index.db")
+        self._conn = None
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def add_many(self, decisions):
+        """Index decisions in one transaction"""
+        added_docs = 0
+        added_length = 0
+        with self.conn:
+            for decision in decisions:
+                counts = Counter(tokenize(decision_text(decision)))
+                length = sum(counts.values())
+                cursor = self.conn.execute(
+                    "INSERT INTO docs (length, data) VALUES (?, ?)",
+                    (length, json.dumps(decision, default=str, ensure_ascii=False)))
+                doc_id = cursor.lastrowid
+                self.conn.executemany(
+                    "INSERT INTO postings (term, doc_id, tf, doc_length) VALUES (?, ?, ?, ?)",
+                    [(term, doc_id, tf, length) for term, tf in counts.items()])
+                self.conn.executemany(
+                    "INSERT INTO terms (term, df) VALUES (?, 1) "
+                    "ON CONFLICT (term) DO UPDATE SET df = df + 1",
+                    [(term,) for term in counts])
+                added_docs += 1
+                added_length += length
+            self.conn.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = value + excluded.value",
+                [('doc_count', added_docs), ('total_length', added_length)])
+
+    def add(self, decision):
+        self.add_many([decision])
+
+    def rebuild(self, decisions):
+        """Drop the index and rebuild it from the full history"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.add_many(decisions)
+
+    def search(self, query, limit=10):
+        """Best-matching decisions for a query, as (score, decision) pairs"""
+        with tracing.span('bm25_search', query=query):
+            return self._search(query, limit)
+
+    def _search(self, query, limit):
+        terms = set(tokenize(query))
+        doc_count = self._meta('doc_count')
+        if not terms or not doc_count:
+            return []
+        avg_length = self._meta('total_length') / doc_count or 1.0
+
+        weights = []
+        for term in terms:
+            row = self.conn.execute("SELECT df FROM terms WHERE term = ?", (term,)).fetchone()
+            if row:
+                weights.append((term, math.log(1 + (doc_count - row[0] + 0.5) / (row[0] + 0.5))))
+        if not weights:
+            return []
+
+        # Scores are accumulated inside SQLite rather than per posting in Python
+        values = ",".join("(?, ?)" for _ in weights)
+        top = self.conn.execute(
+            f"WITH q(term, idf) AS (VALUES {values}) "
+            "SELECT p.doc_id, SUM(q.idf * p.tf * (? + 1) / (p.tf + ? * (1 - ? + ? * p.doc_length / ?))) AS score "
+            "FROM q JOIN postings p ON p.term = q.term "
+            "GROUP BY p.doc_id ORDER BY score DESC LIMIT ?",
+            [value for pair in weights for value in pair]
+            + [self.K1, self.K1, self.B, self.B, float(avg_length), limit]).fetchall()
+        if not top:
+            return []
+        placeholders = ",".join("?" * len(top))
+        docs = dict(self.conn.execute(
+            f"SELECT id, data FROM docs WHERE id IN ({placeholders})", [doc_id for doc_id, _ in top]))
+        return [(score, json.loads(docs[doc_id])) for doc_id, score in top]
+
+
+def index_decision(store, decision):
+    """Add a decision just appended to store to its search index.
+
+    Stores written before the index existed get it built from the full
+    history on their first new decision.
+    """
+    index = DecisionSearchIndex(store.memory_dir)
+    try:
+        if index.exists():
+            index.add(decision)
+        else:
+            index.rebuild(store.all())
+    finally:
+        index.close()
@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import stat
+import zlib
+from datetime import datetime
+
+from .decision_log import rebuild_derived
+from .drift_stats import DriftAggregates
+from .fileio import atomic_write, write_json
+from .rollups import SummaryRollups
+from .sqlite_store import open_decision_store
+
+CHUNK_BYTES = 64 * 1024
+
+# Derived or transient files that are not worth snapshotting
+EXCLUDED_DIRS = frozenset(["checkpoints", "cache", "__yamlcache__"])
+# Files derived from the memory, rebuilt after a restore instead
+DERIVED_FILES = frozenset([
+    os.path.join("decisions", "index.bin"),
+    "drift-stats.json",
+    "drift-stats.db",
+    "search-index.db",
+    "heat.db",
+    "heat-pending.jsonl",
+    "rollups.json",
+])
+# Lock files, compaction markers and SQLite journals only mean something
+# to the processes running when they were written
+TRANSIENT_FILES = frozenset(["decisions.lock", os.path.join("decisions", "compacting")])
+TRANSIENT_SUFFIXES = (".tmp", "-journal", "-wal", "-shm")
+
+
+class CheckpointError(Exception):
+    pass
+
+
+class CheckpointStore:
+    """Content-addressed snapshots of a memory directory.
+
+    Files are split into fixed-size chunks. Each chunk is stored once,
+    zlib-compressed, under ``checkpoints/objects/`` by the SHA-256 of its
+    contents. A snapshot is a JSON manifest in ``checkpoints/snapshots/``
+    that lists each file's chunks. The memory directory grows mostly by
+    appending (log segments, new summaries), so fixed chunks line up across
+    snapshots and a new checkpoint stores roughly the delta. Files whose
+    size, mtime and inode match the previous snapshot are not read at all.
+
+    Derived files (the decision index, drift stats, search index, heat
+    and rollups) are left out and rebuilt from the restored memory.
+    """
+
+    def __init__(self, memory_dir=".claude-memory"):
+        self.memory_dir = memory_dir
+        self.root = os.path.join(memory_dir, "checkpoints")
+        self.objects_dir = os.path.join(self.root, "objects")
+        self.snapshots_dir = os.path.join(self.root, "snapshots")
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest[2:])
+
+    def _put_chunk(self, data):
+        """Store a chunk unless already present; returns (digest, bytes written)"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return digest, 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        compressed = zlib.compress(data, 6)
+        with atomic_write(path, 'wb') as f:
+            f.write(compressed)
+        return digest, len(compressed)
+
+    def _get_chunk(self, digest):
+        with open(self._object_path(digest), 'rb') as f:
+            return zlib.decompress(f.read())
+
+    def _walk(self):
+        """Relative paths and stat results of every file to snapshot"""
+        for dirpath, dirnames, filenames in os.walk(self.memory_dir):
+            dirnames[:] = sorted(d for d in dirnames if d not in EXCLUDED_DIRS)
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                relpath = os.path.relpath(path, self.memory_dir)
+                if (name.endswith(TRANSIENT_SUFFIXES) or relpath in DERIVED_FILES
+                        or relpath in TRANSIENT_FILES):
+                    continue
+                st = os.lstat(path)
+                if stat.S_ISREG(st.st_mode):
+                    yield relpath, st
+
+    def _snapshot_path(self, name):
+        return os.path.join(self.snapshots_dir, f"{name}.json")
+
+    def load(self, name):
+        try:
+            with open(self._snapshot_path(name), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise CheckpointError(f"no such checkpoint: {name}")
+
+    def list(self):
+        """Snapshot manifests, oldest first"""
+        if not os.path.isdir(self.snapshots_dir):
+            return []
+        snapshots = []
+        for entry in os.scandir(self.snapshots_dir):
+            if entry.name.endswith(".json"):
+                with open(entry.path, 'r') as f:
+                    snapshots.append(json.load(f))
+        return sorted(snapshots, key=lambda s: s['created'])
+
+    def create(self, name=None):
+        """Snapshot the memory directory; returns the manifest"""
+        name = name or datetime.now().strftime("%Y%m%d-%H%M%S")
+        if os.path.exists(self._snapshot_path(name)):
+            raise CheckpointError(f"checkpoint already exists: {name}")
+        snapshots = self.list()
+        previous = snapshots[-1]['files'] if snapshots else {}
+
+        files = {}
+        stored_bytes = 0
+        # Writers hold the lock exclusively, so no append lands mid-snapshot
+        with open_decision_store(self.memory_dir).locked():
+            for relpath, st in self._walk():
+                known = previous.get(relpath)
+                if known and (known['size'], known['mtime_ns'], known.get('ino')) == \
+                        (st.st_size, st.st_mtime_ns, st.st_ino):
+                    files[relpath] = known
+                    continue
+                chunks = []
+                with open(os.path.join(self.memory_dir, relpath), 'rb') as f:
+                    while True:
+                        data = f.read(CHUNK_BYTES)
+                        if not data:
+                            break
+                        digest, written = self._put_chunk(data)
+                        chunks.append(digest)
+                        stored_bytes += written
+                files[relpath] = {
+                    'size': st.st_size,
+                    'mtime_ns': st.st_mtime_ns,
+                    'ino': st.st_ino,
+                    'mode': stat.S_IMODE(st.st_mode),
+                    'chunks': chunks,
+                }
+
+        manifest = {
+            'name': name,
+            'created': datetime.now().isoformat(),
+            'files': files,
+            'total_bytes': sum(f['size'] for f in files.values()),
+            'stored_bytes': stored_bytes,
+        }
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+        write_json(self._snapshot_path(name), manifest)
+        return manifest
+
+    def _matches(self, path, meta):
+        """True when the working file already has the snapshot's contents"""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return False
+        if st.st_size != meta['size']:
+            return False
+        if st.st_mtime_ns == meta['mtime_ns']:
+            return True
+        with open(path, 'rb') as f:
+            for digest in meta['chunks']:
+                if hashlib.sha256(f.read(CHUNK_BYTES)).hexdigest() != digest:
+                    return False
+        return True
+
+    def restore(self, name):
+        """Bring the memory directory back to a snapshot.
+
+        Only files whose contents differ are rewritten, each atomically, and
+        files created since the snapshot are removed. The derived files are
+        then rebuilt from the restored memory. The whole restore holds
+        ``decisions.lock``, so no writer sees it half done. Returns
+        (rewritten, removed) lists of relative paths.
+        """
+        manifest = self.load(name)
+        store = open_decision_store(self.memory_dir)
+        with store.locked(exclusive=True):
+            rewritten = []
+            for relpath, meta in manifest['files'].items():
+                # Checkpoints taken before derived files were left out hold them too
+                if relpath in DERIVED_FILES or relpath in TRANSIENT_FILES:
+                    continue
+                path = os.path.join(self.memory_dir, relpath)
+                if self._matches(path, meta):
+                    continue
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with atomic_write(path, 'wb') as f:
+                    for digest in meta['chunks']:
+                        f.write(self._get_chunk(digest))
+                    f.flush()
+                    os.chmod(f.name, meta['mode'])
+                    os.utime(f.name, ns=(meta['mtime_ns'], meta['mtime_ns']))
+                rewritten.append(relpath)
+
+            removed = []
+            for relpath, _ in list(self._walk()):
+                if relpath not in manifest['files']:
+                    os.remove(os.path.join(self.memory_dir, relpath))
+                    removed.append(relpath)
+            self._rebuild_derived(store)
+        return rewritten, removed
+
+    def _rebuild_derived(self, store):
+        """Replace the derived files with ones built from the restored memory"""
+        for relpath in DERIVED_FILES:
+            try:
+                os.remove(os.path.join(self.memory_dir, relpath))
+            except FileNotFoundError:
+                pass
+        # Reading a file-layout log without its index re-indexes the
+        # segments and rebuilds the drift stats and search index with it
+        decisions = store.all() if store.exists() else []
+        if not DriftAggregates(self.memory_dir).exists():
+            rebuild_derived(self.memory_dir, decisions)
+        SummaryRollups(self.memory_dir).rebuild(store.all_sessions())
+        # heat.db is seeded again from the restored memory on the next write
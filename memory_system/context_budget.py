@@ -0,0 +1,58 @@
+from collections import namedtuple
+from functools import lru_cache
+
+# Share of the context window per memory type (Core_Memory_Architecture.md).
+# The buffer is never filled with memory; it also absorbs headings and
+# other fixed prompt text.
+BUCKET_SHARES = {
+    'critical': 0.40,
+    'reference': 0.30,
+    'historical': 0.20,
+    'buffer': 0.10,
+}
+
+BudgetItem = namedtuple('BudgetItem', ['bucket', 'priority', 'text', 'payload'])
+
+
+@lru_cache(maxsize=16384)
+def estimate_tokens(text):
+    """Fast token estimate (~4 characters per token), memoized per item text"""
+    return max(1, (len(text) + 3) // 4)
+
+
+def pack_items(items, budget_tokens, shares=BUCKET_SHARES):
+    """Choose which items fit in a token budget split into buckets.
+
+    Each bucket is filled greedily in priority order (smaller items first on
+    ties), skipping items that do not fit and trying the next one. Room a
+    bucket leaves unused is then pooled and offered to the items the other
+    buckets had to reject, highest-share bucket first.
+
+    Returns the indices of the selected items.
+    """
+    allocation = {bucket: int(budget_tokens * share)
+                  for bucket, share in shares.items() if bucket != 'buffer'}
+    order = sorted(range(len(items)),
+                   key=lambda i: (-items[i].priority, estimate_tokens(items[i].text)))
+
+    selected = set()
+    rejected = []
+    used = dict.fromkeys(allocation, 0)
+    for i in order:
+        bucket = items[i].bucket
+        tokens = estimate_tokens(items[i].text)
+        if used[bucket] + tokens <= allocation[bucket]:
+            used[bucket] += tokens
+            selected.add(i)
+        else:
+            rejected.append(i)
+
+    spare = sum(allocation[bucket] - used[bucket] for bucket in allocation)
+    rank = {bucket: n for n, bucket in enumerate(allocation)}
+    for i in sorted(rejected, key=lambda i: rank[items[i].bucket]):
+        tokens = estimate_tokens(items[i].text)
+        if tokens <= spare:
+            spare -= tokens
+            selected.add(i)
+
+    return selected
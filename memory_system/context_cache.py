@@ -0,0 +1,103 @@
+import json
+import os
+import time
+
+from . import tracing
+from .fileio import write_json
+
+# Filesystem timestamps can lag the wall clock by a tick, so inputs modified
+# within this window of the computation start are treated as racy
+RACY_WINDOW_NS = 50_000_000
+
+
+def file_fingerprint(path):
+    """Cheap identity of a file or directory: (mtime_ns, size, inode), or None if missing"""
+    tracing.count('files_stat')
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class ContextCache:
+    """On-disk cache of rendered context sections keyed by input fingerprints.
+
+    Each entry records the fingerprints of the files it was built from and an
+    optional expiry time (for sections backed by a sliding time window). An
+    entry is reused only while every dependency still has the same
+    fingerprint and the expiry has not passed.
+
+    A key can hold one variant at a time (a section built for a given
+    query): a request for another variant misses and replaces it, so
+    free-form arguments do not grow the cache.
+
+    The cache is JSON, never pickle: the memory directory is committed with
+    the project, and loading it must not run code from a cloned repository.
+    Values come back as they round-trip through JSON (tuples as lists,
+    datetimes as their str()).
+    """
+
+    def __init__(self, memory_dir=".claude-memory"):
+        self.path = os.path.join(memory_dir, "cache", "context.json")
+        self._entries = None
+        self._dirty = False
+
+    @property
+    def entries(self):
+        if self._entries is None:
+            try:
+                with open(self.path, 'r') as f:
+                    self._entries = json.load(f)
+                if not isinstance(self._entries, dict):
+                    self._entries = {}
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    @staticmethod
+    def _key(key):
+        # Section keys are names or (name, argument) tuples
+        return key if isinstance(key, str) else json.dumps(list(key))
+
+    def get(self, key, variant=None):
+        """Return the cached value for key if all of its inputs are unchanged"""
+        entry = self.entries.get(self._key(key))
+        if entry is None or entry.get('variant') != variant:
+            return None
+        if entry['expires'] is not None and time.time() >= entry['expires']:
+            return None
+        for path, fingerprint in entry['deps'].items():
+            current = file_fingerprint(path)
+            if (list(current) if current else None) != fingerprint:
+                return None
+        return entry
+
+    def put(self, key, value, deps, started_ns, expires=None, variant=None):
+        """Store value for key along with the current fingerprints of deps.
+
+        Inputs modified at or after started_ns may have changed while the
+        value was being computed, so the value is not cached in that case.
+        """
+        fingerprints = {path: file_fingerprint(path) for path in deps}
+        if any(fp is not None and fp[0] >= started_ns - RACY_WINDOW_NS for fp in fingerprints.values()):
+            return
+        self.entries[self._key(key)] = {
+            'value': value,
+            'deps': {path: list(fp) if fp else None for path, fp in fingerprints.items()},
+            'expires': expires,
+            'variant': variant,
+        }
+        self._dirty = True
+
+    def save(self):
+        """Write the cache atomically if anything changed"""
+        if not self._dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            write_json(self.path, self._entries, default=str)
+        except OSError:
+            # A read-only memory directory just recomputes next time
+            return
+        self._dirty = False
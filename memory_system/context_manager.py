@@ -1,160 +1,699 @@
 import os
-import yaml
+import sqlite3
+import threading
+import time
 from datetime import datetime, timedelta
 
+from . import tracing
+from .context_budget import BUCKET_SHARES, BudgetItem, estimate_tokens, pack_items
+from .bm25_index import DecisionSearchIndex
+from .context_cache import ContextCache, file_fingerprint
+from .curation import MemoryHeat, decision_id, queue_references, record_heat
+from .decision_table import load_decision_table, np
+from .drift_stats import DriftAggregates
+from .milestone_index import MILESTONE_MAX_BYTES, MilestoneIndex
+from .prp_index import PRPIndex, discover_prps
+from .rollups import SPRINT_DAYS, SummaryRollups
+from .session_archive import SessionArchive
+from .sqlite_store import open_decision_store
+from .watermarks import Watermarks
+from .yaml_cache import load_yaml
+
+def _stored_fingerprint(path):
+    """file_fingerprint as a list, so it compares equal after a JSON round trip"""
+    fingerprint = file_fingerprint(path)
+    return list(fingerprint) if fingerprint else None
+
 class ContextManager:
-    def __init__(self, memory_dir=".claude-memory"):
+    MILESTONE_MAX_BYTES = MILESTONE_MAX_BYTES
+    CHANGED_REQUIREMENTS_LIMIT = 20
+    # Recent-session slots always given to the newest sessions. Every prompt
+    # heats the sessions it shows, so ranking by heat alone would keep the
+    # same ones in place and a new session might never get in.
+    NEWEST_SESSION_SLOTS = 3
+
+    SECTIONS = ('current_milestone', 'recent_decisions', 'relevant_decisions',
+                'recent_summaries', 'project_rollup', 'prp_status')
+
+    def __init__(self, memory_dir=".claude-memory", use_cache=True, backend=None):
         self.memory_dir = memory_dir
-        
-    def reconstruct_context(self, project_root):
-        """Reconstruct context for Claude Code"""
-        context = {
-            'current_milestone': self._get_current_milestone(),
-            'recent_decisions': self._get_recent_decisions(days=7),
-            'recent_summaries': self._get_recent_summaries(count=5),
-            'prp_status': self._analyze_prp_status(project_root)
+        self.summaries_dir = os.path.join(memory_dir, "summaries")
+        self.store = open_decision_store(memory_dir, backend)
+        self.cache = ContextCache(memory_dir) if use_cache else None
+        # Set while a generation runs, after the watermark refreshed the manifest
+        self._manifest_fresh = False
+        self._table = None
+        # Guards the decision table and manifest when sections load in parallel
+        self._lock = threading.Lock()
+        self.last_marker = None
+
+    def reconstruct_context(self, project_root, budget_tokens=None, query=None, since=None):
+        """Reconstruct context for Claude Code.
+
+        With budget_tokens set, recent decisions, drift warnings and session
+        summaries are packed into the 40/30/20/10 context budget instead of
+        being included in full.
+
+        With query set (a topic string, or git_diff_query(project_root) for
+        the files being worked on), older decisions that rank well against
+        it under BM25 are added as a "Relevant Decisions" section.
+
+        Every generation records a watermark; its marker is left in
+        self.last_marker. With since set to a marker (or 'last'), only what
+        changed after it is emitted: new decisions, new or updated sessions,
+        a changed milestone and PRP, followed by a short digest of the
+        memory as a whole. An unknown marker gives the full context.
+        """
+        with tracing.span('reconstruct_context', budget_tokens=budget_tokens, query=query, since=since):
+            return "\n".join(self.iter_context(project_root, budget_tokens, query, since))
+
+    def iter_context(self, project_root, budget_tokens=None, query=None, since=None,
+                     executor=None):
+        """Yield the context prompt one section at a time.
+
+        Sections are loaded only when the consumer asks for them, cheapest
+        first, so a reader on the other end of a pipe can start before the
+        slower sections are ready. Packing into a token budget needs every
+        item up front, so with budget_tokens all sections are loaded before
+        the first one is yielded.
+
+        With executor (a thread pool) set, every section is submitted at
+        once and loaded concurrently; they are still yielded in order.
+        """
+        formatters = {
+            'current_milestone': self._format_milestone,
+            'recent_decisions': self._format_decisions,
+            'relevant_decisions': self._format_relevant_decisions,
+            'recent_summaries': self._format_summaries,
+            'project_rollup': self._format_rollup,
+            'prp_status': self._format_prp_status,
+        }
+        references = []
+        with tracing.span('capture_watermark'):
+            mark = self._capture_watermark(project_root)
+        # The rest of the generation reads the manifest the watermark refreshed
+        self._manifest_fresh = True
+        previous = Watermarks(self.memory_dir).get(since) if since else None
+        try:
+            if previous is not None:
+                yield from self._iter_delta(project_root, previous, mark)
+                self._record_watermark(mark)
+                return
+            yield self._format_header()
+            if executor is not None:
+                futures = [(name, executor.submit(self._load_section, name, project_root, query))
+                           for name in self.SECTIONS]
+                loaded = ((name, future.result()) for name, future in futures)
+            else:
+                loaded = ((name, self._load_section(name, project_root, query))
+                          for name in self.SECTIONS)
+            if budget_tokens is None:
+                sections = loaded
+            else:
+                context = dict(loaded)
+                with tracing.span('fit_to_budget', budget_tokens=budget_tokens):
+                    context = self._fit_to_budget(context, budget_tokens)
+                sections = ((name, context[name]) for name in self.SECTIONS)
+            for name, data in sections:
+                with tracing.span('format_section', section=name):
+                    section = formatters[name](data)
+                if section:
+                    yield section
+                references.extend(self._references(name, data))
+            yield self._format_next_steps()
+            with tracing.span('record_heat', references=len(references)):
+                self._record_references(references)
+            self._record_watermark(mark)
+        finally:
+            self._manifest_fresh = False
+            if self.cache is not None:
+                self.cache.save()
+
+    def _load_section(self, name, project_root, query=None):
+        """Load one section's data, reusing the cached copy while its inputs are unchanged"""
+        with tracing.span('load_section', section=name) as span:
+            if self.cache is None:
+                return self._compute_section(name, project_root, query)[0]
+
+            key, variant = name, None
+            if name == 'prp_status':
+                key = (name, os.path.abspath(project_root))
+            elif name in ('current_milestone', 'relevant_decisions') and query:
+                # Only the last query is kept, next to the query-less copy
+                key, variant = (name, 'query'), query
+            entry = self.cache.get(key, variant)
+            span.set(cache_hit=entry is not None)
+            if entry is not None:
+                return entry['value']
+
+            started_ns = time.time_ns()
+            data, deps, expires = self._compute_section(name, project_root, query)
+            self.cache.put(key, data, deps, started_ns, expires, variant)
+            return data
+
+    def _compute_section(self, name, project_root, query=None):
+        """Build a section's data along with the input paths it depends on and its expiry"""
+        decision_deps = self.store.watch_paths
+
+        if name == 'current_milestone':
+            path = self._find_latest_milestone()
+            milestone = self._milestone_excerpt(path, query) if path else None
+            return milestone, [self.summaries_dir] + ([path] if path else []), None
+
+        if name == 'recent_decisions':
+            days = 7
+            decisions = self._get_recent_decisions(days=days)
+            return decisions, decision_deps, self._window_expiry(decisions, days)
+
+        if name == 'relevant_decisions':
+            if not query:
+                return [], [], None
+            index = DecisionSearchIndex(self.memory_dir)
+            try:
+                if not index.exists() and self.store.exists():
+                    index.rebuild(self.store.all())
+                results = [decision for _, decision in index.search(query, limit=20)]
+            finally:
+                index.close()
+            # Decisions from the last week are already in "Recent Decisions"
+            cutoff = datetime.now() - timedelta(days=7)
+            recent = [d for d in results if datetime.fromisoformat(str(d['timestamp'])) > cutoff]
+            relevant = [d for d in results if d not in recent][:10]
+            return relevant, [index.path], self._window_expiry(recent, 7)
+
+        if name == 'recent_summaries':
+            # Heat ranks sessions; it is not a dependency, since every prompt
+            # records references and would invalidate the section each time.
+            # A new order is picked up whenever the summaries themselves change.
+            return self._get_recent_summaries(count=5), self.store.session_watch_paths, None
+
+        if name == 'project_rollup':
+            # One small file kept up to date by the summarizer, instead of
+            # every session; the sprint window moves at midnight
+            rollups = SummaryRollups(self.memory_dir)
+            if not rollups.exists():
+                return None, [rollups.path], None
+            tomorrow = datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time())
+            return rollups.view(), [rollups.path], tomorrow.timestamp()
+
+        if name == 'prp_status':
+            documents, directories = discover_prps(project_root)
+            status = self._analyze_prp_status(project_root, documents)
+            # Every PRP and the directories holding them, so an edit, a new
+            # document or a new session (which moves "since last session")
+            # invalidates the section
+            deps = ([os.path.join(project_root, "prp.md"), DriftAggregates(self.memory_dir).path,
+                     self.summaries_dir]
+                    + [os.path.join(project_root, p) for p in documents + directories]
+                    + decision_deps)
+            return status, deps, self._window_expiry(status['drift_warnings'], 30)
+
+        raise ValueError(f"Unknown context section: {name}")
+
+    def _capture_watermark(self, project_root):
+        """Where memory stands as generation starts; anything later shows up in the next delta"""
+        started_ns = time.time_ns()
+        milestone = self._find_latest_milestone()
+        return {
+            'marker': datetime.fromtimestamp(started_ns / 1e9).isoformat(),
+            'started_ns': started_ns,
+            'project_root': os.path.abspath(project_root),
+            'decisions': self.store.position() if self.store.exists() else 0,
+            'prp': _stored_fingerprint(os.path.join(project_root, "prp.md")),
+            'milestone': [milestone, _stored_fingerprint(milestone)] if milestone else None,
+        }
+
+    def _record_watermark(self, mark):
+        if not os.path.isdir(self.memory_dir):
+            return
+        try:
+            Watermarks(self.memory_dir).record(mark)
+            self.last_marker = mark['marker']
+        except OSError:
+            pass
+
+    def _iter_delta(self, project_root, previous, mark):
+        """Yield the sections of a "what's new" prompt relative to a previous watermark"""
+        yield "\n".join([
+            "## What's New Since Last Context",
+            f"Previous context: {previous['marker']}",
+            f"Retrieved at: {datetime.now().isoformat()}\n",
+        ])
+        changed = False
+
+        if mark['milestone'] and mark['milestone'] != previous['milestone']:
+            changed = True
+            yield self._format_milestone(self._milestone_excerpt(mark['milestone'][0]))
+
+        decisions = self.store.appended_since(previous['decisions']) if self.store.exists() else []
+        if decisions:
+            changed = True
+            yield "\n".join(["## New Decisions"]
+                            + [self._format_decision(d) for d in decisions] + [""])
+
+        sessions = self._sessions_since(previous['started_ns'])
+        if sessions:
+            changed = True
+            yield "\n".join(["## New Session Summaries"]
+                            + [self._format_summary(s) for s in sessions] + [""])
+
+        status = self._analyze_prp_status(project_root, since_ns=previous['started_ns'])
+        if mark['prp'] != previous['prp'] or status['changed_requirements']:
+            changed = True
+            status['drift_warnings'] = [
+                {'timestamp': d['timestamp'], 'context': d.get('context', 'Unknown')}
+                for d in decisions if d.get('drift_type') == 'major']
+            yield self._format_prp_status(status)
+
+        if not changed:
+            yield "No new decisions, sessions or PRP changes.\n"
+        yield self._format_digest(project_root)
+
+    def _sessions_since(self, started_ns):
+        """Sessions written or updated after started_ns, newest first"""
+        return self.store.sessions_since(started_ns / 1e9)
+
+    def _format_digest(self, project_root):
+        """Short summary of the memory as a whole; its text only changes when the memory does"""
+        prompt_parts = ["## Memory Digest"]
+        milestone = self._find_latest_milestone()
+        if milestone:
+            header = self._summary_manifest().entries[os.path.basename(milestone)]['header']
+            prompt_parts.append(f"- Current milestone: {header.get('title') or os.path.basename(milestone)}")
+        stats = DriftAggregates(self.memory_dir)
+        if stats.exists():
+            by_type = ", ".join(f"{t}: {c}" for t, c in sorted(stats.data['by_drift_type'].items()))
+            prompt_parts.append(f"- Decisions: {stats.data['total']} ({by_type})")
+        prompt_parts.append(f"- Sessions: {self.store.session_count()}")
+        has_prp = os.path.exists(os.path.join(project_root, "prp.md"))
+        prompt_parts.append(f"- PRP Document: {'Found' if has_prp else 'Not found'}")
+        prompt_parts.append("")
+        return "\n".join(prompt_parts)
+
+    def _references(self, name, data):
+        """Heat events for the decisions and sessions a section put into the prompt"""
+        if name in ('recent_decisions', 'relevant_decisions'):
+            return [('decision', decision_id(d), 'reference', None) for d in data if d.get('timestamp')]
+        if name == 'recent_summaries':
+            return [('session', str(s['session_id']), 'reference', None)
+                    for s in data if s.get('session_id') is not None]
+        return []
+
+    def _record_references(self, references):
+        """Queue the references, applying the queue to heat.db once it is due"""
+        if not references or not os.path.isdir(self.memory_dir):
+            return
+        try:
+            if queue_references(self.memory_dir, references):
+                record_heat(self.memory_dir, [], self.store.all if self.store.exists() else None)
+        except (OSError, sqlite3.Error):
+            # Heat is advisory; a read-only memory directory still gets its context
+            pass
+
+    def _hot_session_ids(self, count):
+        """Ids of the hottest live sessions, or None before any heat was recorded"""
+        heat = MemoryHeat(self.memory_dir)
+        if not heat.exists():
+            return None
+        try:
+            return heat.hot('session', count)
+        finally:
+            heat.close()
+
+    def _fit_to_budget(self, context, budget_tokens):
+        """Drop the lowest-priority items so the prompt fits the token budget"""
+        items = []
+        if context['current_milestone']:
+            items.append(BudgetItem('critical', 3.0,
+                                    self._format_milestone(context['current_milestone']),
+                                    ('current_milestone', None)))
+        # Newer items rank higher; major drift outranks other decisions of the same age
+        for rank, decision in enumerate(context['recent_decisions']):
+            boost = 1.0 if decision.get('drift_type') == 'major' else 0.0
+            items.append(BudgetItem('critical', boost + 1.0 / (1 + rank),
+                                    self._format_decision(decision),
+                                    ('recent_decisions', decision)))
+        for rank, decision in enumerate(context['relevant_decisions']):
+            items.append(BudgetItem('critical', 1.0 / (2 + rank),
+                                    self._format_decision(decision),
+                                    ('relevant_decisions', decision)))
+        for rank, warning in enumerate(context['prp_status']['drift_warnings']):
+            items.append(BudgetItem('reference', 1.0 / (1 + rank),
+                                    self._format_drift_warning(warning),
+                                    ('drift_warnings', warning)))
+        for rank, change in enumerate(context['prp_status'].get('changed_requirements') or []):
+            items.append(BudgetItem('reference', 0.5 / (1 + rank),
+                                    self._format_requirement_change(change),
+                                    ('changed_requirements', change)))
+        for rank, summary in enumerate(context['recent_summaries']):
+            items.append(BudgetItem('historical', 1.0 / (1 + rank),
+                                    self._format_summary(summary),
+                                    ('recent_summaries', summary)))
+        # The rollup stands in for every session, so it outranks any one of them
+        if context['project_rollup']:
+            items.append(BudgetItem('historical', 2.0,
+                                    self._format_rollup(context['project_rollup']),
+                                    ('project_rollup', None)))
+
+        # Fixed prompt text is paid for by the buffer share; any excess is
+        # taken out of the budget available to memory items
+        fixed = self._format_context_prompt({
+            'current_milestone': None, 'recent_decisions': [], 'relevant_decisions': [],
+            'recent_summaries': [], 'project_rollup': None,
+            'prp_status': dict(context['prp_status'], drift_warnings=[], changed_requirements=[]),
+        })
+        overflow = max(0, estimate_tokens(fixed) - int(budget_tokens * BUCKET_SHARES['buffer']))
+        available = max(0, budget_tokens - overflow)
+        # Headings and separators of the sections that end up non-empty are
+        # only known after packing; the packed prompt is measured and the
+        # items repacked into less room until the whole prompt fits
+        while True:
+            fitted = self._keep_items(context, items, pack_items(items, available))
+            excess = estimate_tokens(self._format_context_prompt(fitted)) - budget_tokens
+            if excess <= 0 or available == 0:
+                return fitted
+            available = max(0, available - excess)
+
+    def _keep_items(self, context, items, selected):
+        """The context with only the selected budget items left in it"""
+        kept = {'current_milestone': [], 'recent_decisions': [], 'relevant_decisions': [],
+                'drift_warnings': [], 'changed_requirements': [], 'recent_summaries': [],
+                'project_rollup': []}
+        for i in sorted(selected):
+            kind, payload = items[i].payload
+            kept[kind].append(payload)
+
+        return {
+            'current_milestone': context['current_milestone'] if kept['current_milestone'] else None,
+            'recent_decisions': kept['recent_decisions'],
+            'relevant_decisions': kept['relevant_decisions'],
+            'recent_summaries': kept['recent_summaries'],
+            'project_rollup': context['project_rollup'] if kept['project_rollup'] else None,
+            'prp_status': dict(context['prp_status'], drift_warnings=kept['drift_warnings'],
+                               changed_requirements=kept['changed_requirements']),
         }
-        
-        return self._format_context_prompt(context)
-    
-    def _get_recent_decisions(self, days):
+
+    def _window_expiry(self, decisions, days):
+        """Epoch time at which the oldest decision leaves a sliding window of days"""
+        if not decisions:
+            return None
+        oldest = min(datetime.fromisoformat(str(d['timestamp'])) for d in decisions)
+        return (oldest + timedelta(days=days)).timestamp()
+
+    def _decision_table(self):
+        """Columnar table of all decisions, kept up to date and reused across queries"""
+        with self._lock:
+            self._table = load_decision_table(self.store, self._load_legacy_decisions, self._table)
+            return self._table
+
+    def _load_legacy_decisions(self):
+        data = load_yaml(os.path.join(self.memory_dir, "decisions.yaml")) or {}
+        return data.get('decisions') or []
+
+    def _get_recent_decisions(self, days, drift_type=None):
+        cutoff = datetime.now() - timedelta(days=days)
+        if np is not None:
+            return self._decision_table().select(since=cutoff, drift_type=drift_type)
+        if self.store.exists():
+            return [d for d in self.store.since(cutoff)
+                    if drift_type is None or d.get('drift_type') == drift_type]
+
+        # Legacy layout: a single decisions.yaml that has not been migrated yet
         decisions_path = os.path.join(self.memory_dir, "decisions.yaml")
         if not os.path.exists(decisions_path):
             return []
-            
-        with open(decisions_path, 'r') as f:
-            data = yaml.safe_load(f)
-            
-        cutoff = datetime.now() - timedelta(days=days)
-        recent = [d for d in data.get('decisions', []) 
-                 if datetime.fromisoformat(d['timestamp']) > cutoff]
-        
+
+        data = load_yaml(decisions_path) or {}
+
+        recent = [d for d in data.get('decisions') or []
+                 if datetime.fromisoformat(str(d['timestamp'])) > cutoff
+                 and (drift_type is None or d.get('drift_type') == drift_type)]
+
+        # Newest first like the stores; equal timestamps keep the later entry first
+        recent.reverse()
+        recent.sort(key=lambda d: datetime.fromisoformat(str(d['timestamp'])), reverse=True)
         return recent
-    
+
+    def _summary_manifest(self):
+        """Summaries manifest, refreshed against the directory once per generation.
+
+        Outside a generation every call refreshes it.
+        """
+        with self._lock:
+            if not self._manifest_fresh:
+                self.store.manifest.refresh()
+            return self.store.manifest
+
+    def _find_latest_milestone(self):
+        """Path of the most recently modified milestone file"""
+        latest = self._summary_manifest().latest('milestone', 1)
+        return latest[0] if latest else None
+
     def _get_current_milestone(self):
         """Get the current milestone from summaries"""
-        summaries_dir = os.path.join(self.memory_dir, "summaries")
-        if not os.path.exists(summaries_dir):
-            return None
-            
-        # Find most recent milestone file
-        milestone_files = [f for f in os.listdir(summaries_dir) 
-                          if f.startswith("milestone-") and f.endswith(".md")]
-        
-        if not milestone_files:
-            return None
-            
-        # Sort by modification time and get most recent
-        latest = max(milestone_files, 
-                    key=lambda f: os.path.getmtime(os.path.join(summaries_dir, f)))
-        
-        with open(os.path.join(summaries_dir, latest), 'r') as f:
-            return f.read()
-    
+        path = self._find_latest_milestone()
+        return self._milestone_excerpt(path) if path else None
+
+    def _milestone_excerpt(self, path, query=None):
+        """Milestone text, cut to its headline or query-relevant sections when over the cap"""
+        return MilestoneIndex(self.memory_dir).excerpt(path, query, self.MILESTONE_MAX_BYTES)
+
     def _get_recent_summaries(self, count=5):
-        """Get recent session summaries"""
-        summaries_dir = os.path.join(self.memory_dir, "summaries")
-        if not os.path.exists(summaries_dir):
-            return []
-            
-        # Find session summary files
-        session_files = [f for f in os.listdir(summaries_dir) 
-                        if f.startswith("session-") and f.endswith(".yaml")]
-        
-        if not session_files:
-            return []
-            
-        # Sort by modification time and get most recent
-        session_files.sort(key=lambda f: os.path.getmtime(
-            os.path.join(summaries_dir, f)), reverse=True)
-        
+        """The newest and the hottest session summaries.
+
+        The first NEWEST_SESSION_SLOTS go to the newest sessions, the rest
+        to the hottest, and newer sessions fill any gap.
+        """
+        newest = [str(s) for s in self.store.recent_session_ids(count)]
+        hot = [str(s) for s in self._hot_session_ids(count * 2) or []]
+        candidates = list(dict.fromkeys(newest[:self.NEWEST_SESSION_SLOTS] + hot + newest))
         summaries = []
-        for file in session_files[:count]:
-            with open(os.path.join(summaries_dir, file), 'r') as f:
-                summaries.append(yaml.safe_load(f))
-                
+        # Hot ids can name sessions that are gone; read only as many as fit
+        while candidates and len(summaries) < count:
+            wanted = count - len(summaries)
+            summaries.extend(self.store.sessions_by_id(candidates[:wanted]))
+            candidates = candidates[wanted:]
         return summaries
-    
-    def _analyze_prp_status(self, project_root):
-        """Analyze project status against PRP requirements"""
+
+    def _session_archive(self):
+        return SessionArchive(self.memory_dir)
+
+    def load_session(self, session_id):
+        """One session summary by id, wherever it lives, or None.
+
+        Live sessions are read from the store. Sessions packed by compaction
+        or demoted to the cold tier are read from the archive only when asked
+        for here.
+        """
+        found = self.store.sessions_by_id([session_id])
+        if found:
+            return found[0]
+        archived = self._session_archive().load(session_id)
+        if archived is not None:
+            return archived
+        path = MemoryHeat(self.memory_dir).cold_session_path(session_id)
+        return load_yaml(path, use_sidecar=False) if path else None
+
+    def search(self, query, limit=10):
+        """Stored memory matching a free-text query, best matches first.
+
+        Each result is {'kind': 'decision' or 'session', 'item': ...}. The
+        SQLite backend searches decisions and sessions through FTS5; the
+        file layout searches decisions through the BM25 index.
+        """
+        return self.store.search(query, limit=limit)
+
+    def _analyze_prp_status(self, project_root, documents=None, since_ns=None):
+        """Analyze project status against PRP requirements.
+
+        Requirements changed after since_ns (by default, the end of the
+        last session) are listed from the PRP section index.
+        """
+        with tracing.span('prp_analysis'):
+            return self._prp_status(project_root, documents, since_ns)
+
+    def _prp_status(self, project_root, documents=None, since_ns=None):
         prp_path = os.path.join(project_root, "prp.md")
         status = {
             'has_prp': os.path.exists(prp_path),
             'last_modified': None,
-            'drift_warnings': []
+            'drift_warnings': [],
+            'requirements': None,
+            'changed_requirements': [],
+            'changed_total': 0,
+            'changed_since': 'last context' if since_ns is not None else 'last session',
         }
-        
+
+        index = PRPIndex(self.memory_dir)
+        index.refresh(project_root, documents)
+        totals = index.totals()
+        if totals['documents']:
+            status['requirements'] = totals
+            changes = index.changed_since(self._last_session_ns() if since_ns is None else since_ns)
+            status['changed_requirements'] = changes[:self.CHANGED_REQUIREMENTS_LIMIT]
+            status['changed_total'] = len(changes)
+
         if status['has_prp']:
             status['last_modified'] = datetime.fromtimestamp(
                 os.path.getmtime(prp_path)).isoformat()
+
+            # Materialized on write, so no scan of the last 30 days is needed
+            stats = DriftAggregates(self.memory_dir)
+            if self.store.exists() and stats.exists():
+                cutoff = datetime.now() - timedelta(days=30)
+                status['drift_warnings'] = stats.major_since(cutoff)
+                return status
             
             # Check for drift in recent decisions
-            recent_decisions = self._get_recent_decisions(days=30)
-            for decision in recent_decisions:
-                if decision.get('drift_type') == 'major':
-                    status['drift_warnings'].append({
-                        'timestamp': decision['timestamp'],
-                        'context': decision.get('context', 'Unknown'),
-                        'impact': decision.get('impact', [])
-                    })
-        
+            for decision in self._get_recent_decisions(days=30, drift_type='major'):
+                status['drift_warnings'].append({
+                    'timestamp': decision['timestamp'],
+                    'context': decision.get('context', 'Unknown'),
+                    'impact': decision.get('impact', [])
+                })
+
         return status
-    
+
+    def _last_session_ns(self):
+        """When the most recent session summary was written, or 0 if there is none"""
+        return self.store.last_session_ns()
+
     def _format_context_prompt(self, context):
         """Format context into a prompt for Claude Code"""
-        prompt_parts = []
-        
-        # Header
-        prompt_parts.append("## Current Context Summary")
-        prompt_parts.append(f"Retrieved at: {datetime.now().isoformat()}\n")
-        
-        # Current milestone
-        if context['current_milestone']:
-            prompt_parts.append("## Current Milestone")
-            prompt_parts.append(context['current_milestone'])
-            prompt_parts.append("")
-        
-        # Recent decisions
-        if context['recent_decisions']:
-            prompt_parts.append("## Recent Decisions")
-            for decision in context['recent_decisions']:
-                prompt_parts.append(f"- **{decision.get('timestamp', 'Unknown')}**: {decision.get('context', 'No context')}")
-                if decision.get('rationale'):
-                    prompt_parts.append(f"  - Rationale: {decision['rationale']}")
-                if decision.get('drift_type'):
-                    prompt_parts.append(f"  - Drift Type: {decision['drift_type']}")
-            prompt_parts.append("")
-        
-        # Recent work summaries
-        if context['recent_summaries']:
-            prompt_parts.append("## Recent Session Summaries")
-            for summary in context['recent_summaries']:
-                prompt_parts.append(f"\n### Session {summary.get('session_id', 'Unknown')}")
-                prompt_parts.append(f"- Time: {summary.get('timestamp', 'Unknown')}")
-                prompt_parts.append(f"- Files Modified: {', '.join(summary.get('files_modified', []))}")
-                if summary.get('decisions'):
-                    prompt_parts.append(f"- Decisions Made: {len(summary['decisions'])}")
-            prompt_parts.append("")
-        
-        # PRP Status
-        if context['prp_status']:
-            prompt_parts.append("## PRP Status")
-            status = context['prp_status']
-            if status['has_prp']:
-                prompt_parts.append(f"- PRP Document: Found (last modified: {status['last_modified']})")
-                if status['drift_warnings']:
-                    prompt_parts.append("- ⚠️ Drift Warnings:")
-                    for warning in status['drift_warnings']:
-                        prompt_parts.append(f"  - {warning['timestamp']}: {warning['context']}")
-            else:
-                prompt_parts.append("- PRP Document: Not found")
-            prompt_parts.append("")
-        
-        # Active tasks reminder
-        prompt_parts.append("## Next Steps")
-        prompt_parts.append("Based on the context above, consider:")
-        prompt_parts.append("1. Reviewing recent decisions for consistency")
-        prompt_parts.append("2. Checking if current work aligns with PRP goals")
-        prompt_parts.append("3. Identifying any incomplete tasks from recent sessions")
-        
+        prompt_parts = [self._format_header()]
+        for section in (self._format_milestone(context['current_milestone']),
+                        self._format_decisions(context['recent_decisions']),
+                        self._format_relevant_decisions(context.get('relevant_decisions')),
+                        self._format_summaries(context['recent_summaries']),
+                        self._format_rollup(context.get('project_rollup')),
+                        self._format_prp_status(context['prp_status'])):
+            if section:
+                prompt_parts.append(section)
+        prompt_parts.append(self._format_next_steps())
+
+        return "\n".join(prompt_parts)
+
+    def _format_header(self):
+        return "\n".join([
+            "## Current Context Summary",
+            f"Retrieved at: {datetime.now().isoformat()}\n",
+        ])
+
+    def _format_milestone(self, milestone):
+        if not milestone:
+            return ""
+        return "\n".join(["## Current Milestone", milestone, ""])
+
+    def _format_decision(self, decision):
+        prompt_parts = [f"- **{decision.get('timestamp', 'Unknown')}**: {decision.get('context', 'No context')}"]
+        if decision.get('rationale'):
+            prompt_parts.append(f"  - Rationale: {decision['rationale']}")
+        if decision.get('drift_type'):
+            prompt_parts.append(f"  - Drift Type: {decision['drift_type']}")
+        return "\n".join(prompt_parts)
+
+    def _format_decisions(self, decisions):
+        if not decisions:
+            return ""
+        prompt_parts = ["## Recent Decisions"]
+        for decision in decisions:
+            prompt_parts.append(self._format_decision(decision))
+        prompt_parts.append("")
+        return "\n".join(prompt_parts)
+
+    def _format_relevant_decisions(self, decisions):
+        if not decisions:
+            return ""
+        prompt_parts = ["## Relevant Decisions"]
+        for decision in decisions:
+            prompt_parts.append(self._format_decision(decision))
+        prompt_parts.append("")
+        return "\n".join(prompt_parts)
+
+    def _format_summary(self, summary):
+        prompt_parts = [f"\n### Session {summary.get('session_id', 'Unknown')}"]
+        prompt_parts.append(f"- Time: {summary.get('timestamp', 'Unknown')}")
+        prompt_parts.append(f"- Files Modified: {', '.join(summary.get('files_modified', []))}")
+        if summary.get('decisions'):
+            prompt_parts.append(f"- Decisions Made: {len(summary['decisions'])}")
+        if summary.get('highlights'):
+            prompt_parts.append("- Highlights:")
+            prompt_parts.extend(f"  - {sentence}" for sentence in summary['highlights'])
+        return "\n".join(prompt_parts)
+
+    def _format_summaries(self, summaries):
+        if not summaries:
+            return ""
+        prompt_parts = ["## Recent Session Summaries"]
+        for summary in summaries:
+            prompt_parts.append(self._format_summary(summary))
+        prompt_parts.append("")
+        return "\n".join(prompt_parts)
+
+    def _format_rollup(self, rollup):
+        if not rollup:
+            return ""
+        meso, macro = rollup['meso'], rollup['macro']
+        prompt_parts = ["## Project Rollup"]
+        prompt_parts.append(f"- Sprint (last {SPRINT_DAYS} days): {meso['sessions']} sessions, "
+                            f"{meso['changes']} changes, {meso['decisions']} decisions")
+        if meso['files']:
+            prompt_parts.append(f"  - Most touched: {self._format_file_counts(meso['files'])}")
+        since = f" since {macro['first_session'][:10]}" if macro['first_session'] else ""
+        prompt_parts.append(f"- Project: {macro['sessions']} sessions, {macro['changes']} changes, "
+                            f"{macro['decisions']} decisions{since}")
+        if macro['files']:
+            prompt_parts.append(f"  - Most touched: {self._format_file_counts(macro['files'])}")
+        if rollup['micro']:
+            prompt_parts.append("- Latest changes:")
+            for change in rollup['micro']:
+                prompt_parts.append(f"  - {change['file']}: {change['change']} "
+                                    f"(session {change['session_id']})")
+        prompt_parts.append("")
         return "\n".join(prompt_parts)
+
+    def _format_file_counts(self, files):
+        return ", ".join(f"{path} ({count})" for path, count in files)
+
+    def _format_drift_warning(self, warning):
+        return f"  - {warning['timestamp']}: {warning['context']}"
+
+    def _format_prp_status(self, status):
+        if not status:
+            return ""
+        prompt_parts = ["## PRP Status"]
+        if status['has_prp']:
+            prompt_parts.append(f"- PRP Document: Found (last modified: {status['last_modified']})")
+            if status['drift_warnings']:
+                prompt_parts.append("- ⚠️ Drift Warnings:")
+                for warning in status['drift_warnings']:
+                    prompt_parts.append(self._format_drift_warning(warning))
+        else:
+            prompt_parts.append("- PRP Document: Not found")
+        totals = status.get('requirements')
+        if totals:
+            line = f"- PRP documents: {totals['documents']} ({totals['requirements']} requirements"
+            if totals['checkboxes']:
+                line += f", {totals['checked']}/{totals['checkboxes']} checklist items done"
+            prompt_parts.append(line + ")")
+        if status.get('changed_requirements'):
+            prompt_parts.append(f"- Requirements changed since {status['changed_since']}:")
+            for change in status['changed_requirements']:
+                prompt_parts.append(self._format_requirement_change(change))
+            more = status['changed_total'] - len(status['changed_requirements'])
+            if more > 0:
+                prompt_parts.append(f"  - ... and {more} more")
+        prompt_parts.append("")
+        return "\n".join(prompt_parts)
+
+    def _format_requirement_change(self, change):
+        return f"  - {change['change']}: {change['id']} ({change['title']})"
+
+    def _format_next_steps(self):
+        return "\n".join([
+            "## Next Steps",
+            "Based on the context above, consider:",
+            "1. Reviewing recent decisions for consistency",
+            "2. Checking if current work aligns with PRP goals",
+            "3. Identifying any incomplete tasks from recent sessions",
+        ])
@@ -0,0 +1,229 @@
+import json
+import math
+import os
+import shutil
+import sqlite3
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks
+    fcntl = None
+
+from .timestamps import to_epoch
+
+HALF_LIFE_DAYS = 14
+DECAY_RATE = math.log(2) / (HALF_LIFE_DAYS * 86400)
+
+# Weight each event adds to an item's heat at the moment it happens
+EVENT_WEIGHTS = {
+    'create': 1.0,
+    'modify': 1.0,
+    'reference': 0.2,
+}
+
+# Queued references are applied to heat.db by the next write, or once the
+# queue grows past this many bytes (a few dozen generations)
+PENDING_FLUSH_BYTES = 256 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS heat (
+    item_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    key REAL NOT NULL,
+    refs INTEGER NOT NULL DEFAULT 0,
+    mods INTEGER NOT NULL DEFAULT 0,
+    last_event REAL NOT NULL,
+    tier TEXT NOT NULL DEFAULT 'hot'
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS heat_by_kind ON heat (kind, tier, key);
+"""
+
+
+def _log_add(a, b):
+    """log(exp(a) + exp(b)) without overflow"""
+    if a is None:
+        return b
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+class MemoryHeat:
+    """Decay-weighted heat of decisions and session summaries.
+
+    Heat is the sum of event weights decayed exponentially with a 14-day
+    half-life: create and modify events count fully, references (being
+    included in a generated context) count a fifth. Each item stores the
+    time-shifted key log(sum(w * exp(rate * t))). Heat at any time t is
+    exp(key - rate * t), so ordering by key gives the same answer whenever
+    it is asked. An event only raises one key, and the hottest items come
+    straight off the (kind, tier, key) index without scanning the history.
+
+    Cold sessions can be demoted to an archive tier: their files move to
+    ``archive/cold/``, out of the summaries directory, and are read only on
+    demand. Decisions are not tiered; they stay in the log and are selected
+    by time window and relevance, so their heat only ranks them.
+    """
+
+    def __init__(self, memory_dir=".claude-memory"):
+        self.memory_dir = memory_dir
+        self.path = os.path.join(memory_dir, "heat.db")
+        self.pending_path = os.path.join(memory_dir, "heat-pending.jsonl")
+        self.cold_dir = os.path.join(memory_dir, "archive", "cold")
+        self._conn = None
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def touch_many(self, events):
+        """Apply (kind, item_id, event, epoch or None) events in one transaction"""
+        now = time.time()
+        with self.conn:
+            for kind, item_id, event, when in events:
+                when = now if when is None else when
+                term = math.log(EVENT_WEIGHTS[event]) + DECAY_RATE * when
+                row = self.conn.execute(
+                    "SELECT key, refs, mods, last_event FROM heat WHERE item_id = ?",
+                    (item_id,)).fetchone()
+                key, refs, mods, last_event = row if row else (None, 0, 0, when)
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO heat (item_id, kind, key, refs, mods, last_event, tier) "
+                    "VALUES (?, ?, ?, ?, ?, ?, 'hot')",
+                    (item_id, kind, _log_add(key, term),
+                     refs + (event == 'reference'), mods + (event == 'modify'),
+                     max(last_event, when)))
+
+    def touch(self, kind, item_id, event, when=None):
+        self.touch_many([(kind, item_id, event, when)])
+
+    def heat(self, item_id, now=None):
+        row = self.conn.execute("SELECT key FROM heat WHERE item_id = ?", (item_id,)).fetchone()
+        if not row:
+            return 0.0
+        return math.exp(row[0] - DECAY_RATE * (now or time.time()))
+
+    def hot(self, kind, count):
+        """Ids of the hottest items of a kind that are not archived, hottest first"""
+        rows = self.conn.execute(
+            "SELECT item_id FROM heat WHERE kind = ? AND tier = 'hot' ORDER BY key DESC LIMIT ?",
+            (kind, count))
+        return [item_id for (item_id,) in rows]
+
+    def demote_cold(self, threshold=0.05, now=None):
+        """Move sessions whose heat fell below threshold to the cold tier.
+
+        Returns the ids demoted. Their files are moved out of the summaries
+        directory into the cold archive.
+        """
+        cutoff_key = math.log(threshold) + DECAY_RATE * (now or time.time())
+        rows = self.conn.execute(
+            "SELECT item_id FROM heat WHERE kind = 'session' AND tier = 'hot' AND key < ?",
+            (cutoff_key,)).fetchall()
+        summaries_dir = os.path.join(self.memory_dir, "summaries")
+        with self.conn:
+            for (item_id,) in rows:
+                source = os.path.join(summaries_dir, f"session-{item_id}.yaml")
+                if os.path.exists(source):
+                    os.makedirs(self.cold_dir, exist_ok=True)
+                    shutil.move(source, os.path.join(self.cold_dir, f"session-{item_id}.yaml"))
+                self.conn.execute("UPDATE heat SET tier = 'cold' WHERE item_id = ?", (item_id,))
+        return [item_id for (item_id,) in rows]
+
+    def cold_session_path(self, session_id):
+        """Path of an archived cold session, or None"""
+        path = os.path.join(self.cold_dir, f"session-{session_id}.yaml")
+        return path if os.path.exists(path) else None
+
+
+def decision_id(decision):
+    return str(decision['timestamp'])
+
+
+def seed_heat(memory_dir, heat, decisions, skip=()):
+    """Give every existing decision and session a create event at its own time"""
+    from .sqlite_store import SQLiteStore
+    from .summary_index import SummaryManifest
+
+    events = [('decision', decision_id(d), 'create', to_epoch(d['timestamp']))
+              for d in decisions if d.get('timestamp')]
+    manifest = SummaryManifest(memory_dir)
+    manifest.refresh()
+    for name, meta in manifest.entries.items():
+        if meta['kind'] == 'session':
+            session_id = name[len("session-"):-len(".yaml")]
+            events.append(('session', session_id, 'create', meta['mtime_ns'] / 1e9))
+    store = SQLiteStore(memory_dir)
+    if store.exists():
+        events.extend(('session', session_id, 'create', epoch)
+                      for session_id, epoch in store.session_times() if epoch is not None)
+        store.close()
+    heat.touch_many([e for e in events if e[1] not in skip])
+
+
+@contextmanager
+def _pending_locked(path):
+    """The reference queue, opened for appending and locked against other processes"""
+    with open(path, 'a+') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        yield f
+
+
+def queue_references(memory_dir, events):
+    """Queue (kind, item_id, 'reference', epoch or None) events for heat.db.
+
+    Appending a line costs far less than a SQLite transaction, so reads
+    queue their references and leave them to the next record_heat. Returns
+    True once the queue has grown past PENDING_FLUSH_BYTES and is due.
+    """
+    now = time.time()
+    lines = "".join(json.dumps([kind, item_id, event, now if when is None else when]) + "\n"
+                    for kind, item_id, event, when in events)
+    with _pending_locked(MemoryHeat(memory_dir).pending_path) as f:
+        f.write(lines)
+        f.flush()
+        return f.tell() >= PENDING_FLUSH_BYTES
+
+
+def record_heat(memory_dir, events, decisions=None):
+    """Apply heat events and any queued references, seeding the heat table on first use.
+
+    decisions is a callable returning the full decision history; it is only
+    called when the table has to be seeded. Items being created or modified
+    by these events are left out of the seed so they are not counted twice.
+    """
+    heat = MemoryHeat(memory_dir)
+    try:
+        if not heat.exists():
+            os.makedirs(memory_dir, exist_ok=True)
+            seed_heat(memory_dir, heat, decisions() if decisions else [],
+                      skip={item_id for _, item_id, event, _ in events if event != 'reference'})
+        if not os.path.exists(heat.pending_path):
+            heat.touch_many(events)
+            return
+        with _pending_locked(heat.pending_path) as f:
+            f.seek(0)
+            queued = []
+            for line in f:
+                try:
+                    queued.append(tuple(json.loads(line)))
+                except ValueError:
+                    # A line torn by a crash mid-append
+                    continue
+            heat.touch_many(queued + list(events))
+            f.truncate(0)
+    finally:
+        heat.close()
@@ -0,0 +1,218 @@
+import codecs
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+
+# This module doubles as the client, so it only imports the standard library
+# at module level; the server side loads ContextManager when it starts.
+
+
+class DaemonError(Exception):
+    """The context daemon answered with an error"""
+
+
+def default_socket_path():
+    """Per-user socket path shared by every terminal and agent on the machine"""
+    if os.environ.get('CLAUDE_MEMORY_SOCKET'):
+        return os.environ['CLAUDE_MEMORY_SOCKET']
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return os.path.join(runtime_dir, f"claude-memory-{os.getuid()}.sock")
+
+
+def _send(request, socket_path=None, timeout=5.0, connect_timeout=1.0):
+    """Send one request and return the connected socket's reader after an OK status.
+
+    Raises OSError when no daemon is listening and DaemonError when the
+    daemon rejects the request.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(connect_timeout)
+    try:
+        sock.connect(socket_path or default_socket_path())
+        sock.settimeout(timeout)
+        sock.sendall(json.dumps(request).encode('utf-8') + b"\n")
+        reader = sock.makefile('rb')
+    except OSError:
+        sock.close()
+        raise
+    status = reader.readline().decode('utf-8').rstrip("\n")
+    if status != "OK":
+        reader.close()
+        sock.close()
+        raise DaemonError(status[len("ERR "):] if status.startswith("ERR ") else "no response")
+    return sock, reader
+
+
+def request_context(memory_dir, project_root, budget_tokens=None, query=None,
+                    socket_path=None, timeout=60.0, since=None):
+    """Ask a running daemon for context; returns an iterator of text chunks.
+
+    The connection is made before returning, so callers can fall back to
+    in-process generation on OSError without having written anything.
+    """
+    sock, reader = _send({
+        'command': 'context',
+        'memory_dir': os.path.abspath(memory_dir),
+        'project_root': os.path.abspath(project_root),
+        'budget_tokens': budget_tokens,
+        'query': query,
+        'since': since,
+    }, socket_path, timeout)
+
+    def chunks():
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        try:
+            while True:
+                chunk = reader.read1(65536)
+                if not chunk:
+                    yield decoder.decode(b"", final=True)
+                    return
+                yield decoder.decode(chunk)
+        finally:
+            reader.close()
+            sock.close()
+
+    return chunks()
+
+
+def ping(socket_path=None, timeout=1.0):
+    """True if a daemon is answering on the socket"""
+    try:
+        sock, reader = _send({'command': 'ping'}, socket_path, timeout)
+    except (OSError, DaemonError):
+        return False
+    reader.close()
+    sock.close()
+    return True
+
+
+def shutdown(socket_path=None, timeout=5.0):
+    """Ask a running daemon to exit"""
+    sock, reader = _send({'command': 'shutdown'}, socket_path, timeout)
+    reader.close()
+    sock.close()
+
+
+class _ContextRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        streaming = False
+        try:
+            request = json.loads(self.rfile.readline())
+            command = request.get('command', 'context')
+            if command == 'ping':
+                self.wfile.write(b"OK\n")
+            elif command == 'shutdown':
+                self.wfile.write(b"OK\n")
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+            elif command == 'context':
+                sections = self.server.render(request['memory_dir'], request['project_root'],
+                                              request.get('budget_tokens'), request.get('query'),
+                                              request.get('since'))
+                try:
+                    # The status goes out with the first section, so a request
+                    # that fails before producing anything still gets an ERR
+                    first = next(sections, "")
+                    self.wfile.write(b"OK\n" + first.encode('utf-8'))
+                    streaming = True
+                    for section in sections:
+                        self.wfile.write(section.encode('utf-8'))
+                finally:
+                    sections.close()
+            else:
+                raise ValueError(f"unknown command {command!r}")
+        except Exception as e:
+            if streaming:
+                # Part of the context is already out; closing the connection
+                # is the only signal left
+                return
+            message = str(e).replace("\n", " ")
+            self.wfile.write(f"ERR {type(e).__name__}: {message}\n".encode('utf-8'))
+
+
+class ContextDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Long-lived server that keeps parsed memory in RAM and answers context requests.
+
+    One ContextManager is kept per memory directory, so its section cache
+    stays loaded between requests. A watcher thread polls the inputs of
+    every project that has been requested and reloads changed sections in
+    the background, so requests are usually answered straight from memory.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path=None, poll_interval=2.0):
+        self.socket_path = socket_path or default_socket_path()
+        self.poll_interval = poll_interval
+        self._managers = {}
+        self._projects = set()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+        if os.path.exists(self.socket_path):
+            if ping(self.socket_path):
+                raise DaemonError(f"a daemon is already listening on {self.socket_path}")
+            os.unlink(self.socket_path)
+
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(self.socket_path, _ContextRequestHandler)
+        finally:
+            os.umask(old_umask)
+
+    def _manager(self, memory_dir):
+        """ContextManager and its lock for a memory directory"""
+        from .context_manager import ContextManager
+
+        with self._lock:
+            if memory_dir not in self._managers:
+                self._managers[memory_dir] = (ContextManager(memory_dir), threading.Lock())
+            return self._managers[memory_dir]
+
+    def render(self, memory_dir, project_root, budget_tokens=None, query=None, since=None):
+        """Yield the context prompt as it is produced, one section at a time.
+
+        The chunks join to what reconstruct_context returns. The project's
+        manager stays locked until the generator is exhausted or closed.
+        """
+        manager, lock = self._manager(memory_dir)
+        with self._lock:
+            self._projects.add((memory_dir, project_root))
+        with lock:
+            sections = manager.iter_context(project_root, budget_tokens=budget_tokens,
+                                            query=query, since=since)
+            for i, section in enumerate(sections):
+                yield section if i == 0 else "\n" + section
+
+    def _watch(self):
+        """Reload changed sections of every known project in the background"""
+        while not self._stopped.wait(self.poll_interval):
+            with self._lock:
+                projects = list(self._projects)
+            for memory_dir, project_root in projects:
+                manager, lock = self._manager(memory_dir)
+                try:
+                    with lock:
+                        for name in manager.SECTIONS:
+                            manager._load_section(name, project_root)
+                        manager.cache.save()
+                except Exception:
+                    # A half-written file is picked up again on the next poll
+                    continue
+
+    def serve_forever(self, poll_interval=0.5):
+        watcher = threading.Thread(target=self._watch, daemon=True)
+        watcher.start()
+        try:
+            super().serve_forever(poll_interval)
+        finally:
+            self._stopped.set()
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
@@ -0,0 +1,620 @@
+import bisect
+import heapq
+import json
+import mmap
+import os
+import shutil
+import struct
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from . import tracing
+from .bm25_index import DecisionSearchIndex, index_decision
+from .curation import MemoryHeat, decision_id, record_heat
+from .drift_stats import DriftAggregates, record_decision
+from .fileio import atomic_write
+from .session_archive import SessionArchive
+from .summary_index import SummaryManifest, load_summaries, summary_kind
+from .timestamps import to_epoch
+from .yaml_cache import dump_yaml, load_yaml
+
+# One index record per decision: (sort key as epoch seconds, segment number, byte offset)
+INDEX_RECORD = struct.Struct("<dIQ")
+SEGMENT_BYTES = 4 * 1024 * 1024
+
+
+def update_derived(store, decision):
+    """Fold a newly appended decision into the aggregates and indexes derived from the log"""
+    record_decision(store, decision)
+    index_decision(store, decision)
+    record_heat(store.memory_dir,
+                [('decision', decision_id(decision), 'create', to_epoch(decision['timestamp']))],
+                store.all)
+
+
+def rebuild_derived(memory_dir, decisions):
+    """Recompute the aggregates and indexes derived from the log from scratch"""
+    stats = DriftAggregates(memory_dir)
+    stats.rebuild(decisions)
+    stats.close()
+    index = DecisionSearchIndex(memory_dir)
+    index.rebuild(decisions)
+    index.close()
+
+
+def update_derived_many(store, decisions):
+    """update_derived for decisions that reached the log by another route (a pull, a crash)"""
+    if not decisions:
+        return
+    if DriftAggregates(store.memory_dir).exists() and DecisionSearchIndex(store.memory_dir).exists():
+        for decision in decisions:
+            record_decision(store, decision)
+            index_decision(store, decision)
+    else:
+        # Missing files are rebuilt from a history that already holds these decisions
+        rebuild_derived(store.memory_dir, store.all())
+    record_heat(store.memory_dir,
+                [('decision', decision_id(d), 'create', to_epoch(d['timestamp'])) for d in decisions],
+                store.all)
+
+
+class _IndexKeys:
+    """Sequence view over the sort keys of a memory-mapped index"""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+
+    def __len__(self):
+        return len(self.buffer) // INDEX_RECORD.size
+
+    def __getitem__(self, i):
+        return INDEX_RECORD.unpack_from(self.buffer, i * INDEX_RECORD.size)[0]
+
+
+class DecisionLog:
+    """Append-only, segmented decision log with a sorted timestamp index.
+
+    Decisions are stored as JSON lines in ``decisions/segment-NNNNNN.jsonl``
+    and every append adds a fixed-size record to ``decisions/index.bin``.
+    Index keys never decrease, so a "since" query is a binary search over
+    the index followed by a read of the matching tail of the log.
+
+    The segments are the source of truth; the index is derived from them
+    and is not committed. Complete lines past the last index record (a
+    fresh clone, a pull, or a writer that died between its segment and
+    index writes) are indexed, and folded into the derived files, before
+    the next read or append. A partial final line is truncated.
+
+    Writers hold an exclusive ``flock`` on ``decisions.lock`` and fsync the
+    segment before the index record that points into it. Readers hold a
+    shared lock. Concurrent writers from any number of processes are
+    serialized without lost updates.
+
+    As the store of the file layout it also reads and writes the session
+    summaries, with the same session methods as SQLiteStore.
+    """
+
+    def __init__(self, memory_dir=".claude-memory"):
+        self.memory_dir = memory_dir
+        self.log_dir = os.path.join(memory_dir, "decisions")
+        self.index_path = os.path.join(self.log_dir, "index.bin")
+        self.legacy_path = os.path.join(memory_dir, "decisions.yaml")
+        self.lock_path = os.path.join(memory_dir, "decisions.lock")
+        # Present only while a compaction is switching segments
+        self.compacting_path = os.path.join(self.log_dir, "compacting")
+        self.summaries_dir = os.path.join(memory_dir, "summaries")
+        self._lock_owner = None
+        self._manifest = None
+
+    @property
+    def watch_paths(self):
+        """Files whose fingerprint changes whenever the stored decisions change.
+
+        The directory covers segments replaced by a checkout or pull.
+        """
+        return [self.index_path, self.legacy_path, self.log_dir]
+
+    def exists(self):
+        return os.path.exists(self.index_path) or (
+            os.path.isdir(self.log_dir) and bool(self._segment_numbers()))
+
+    @contextmanager
+    def locked(self, exclusive=False):
+        """Hold the log's advisory lock: exclusive for writers, shared for readers.
+
+        The lock is re-entrant within the thread that holds it, through
+        this DecisionLog.
+        """
+        if fcntl is None or self._lock_owner == threading.get_ident():
+            # Reads made while this process already holds the lock (the
+            # derived-file updates of an append) must not lock again
+            yield
+            return
+        if exclusive:
+            os.makedirs(self.memory_dir, exist_ok=True)
+        try:
+            fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError:
+            if exclusive:
+                raise
+            # Readers of a read-only memory directory go without the lock
+            yield
+            return
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self._lock_owner = threading.get_ident()
+            yield
+        finally:
+            self._lock_owner = None
+            os.close(fd)
+
+    def _segment_path(self, number, log_dir=None):
+        return os.path.join(log_dir or self.log_dir, f"segment-{number:06d}.jsonl")
+
+    def _segment_numbers(self):
+        return sorted(int(name[len("segment-"):-len(".jsonl")])
+                      for name in os.listdir(self.log_dir)
+                      if name.startswith("segment-") and name.endswith(".jsonl"))
+
+    def _first_record(self):
+        with open(self.index_path, 'rb') as f:
+            data = f.read(INDEX_RECORD.size)
+        return INDEX_RECORD.unpack(data) if len(data) == INDEX_RECORD.size else None
+
+    def _last_record(self):
+        size = os.path.getsize(self.index_path)
+        if size < INDEX_RECORD.size:
+            return None
+        with open(self.index_path, 'rb') as f:
+            f.seek(size - size % INDEX_RECORD.size - INDEX_RECORD.size)
+            return INDEX_RECORD.unpack(f.read(INDEX_RECORD.size))
+
+    def _indexed_end(self, last):
+        """(segment, offset) just past the decision the index record last points at"""
+        _, segment, offset = last
+        with open(self._segment_path(segment), 'rb') as f:
+            f.seek(offset)
+            return segment, offset + len(f.readline())
+
+    def _index_stale(self, segments):
+        """Whether the index points at segments that are gone or shorter than it says.
+
+        That is what a pull of another clone's compaction leaves behind:
+        the segments were replaced, but this clone's index.bin was not.
+        """
+        last = self._last_record()
+        if last is None:
+            return False
+        first = self._first_record()
+        if first[1] not in segments or last[1] not in segments:
+            return True
+        return last[2] >= os.path.getsize(self._segment_path(last[1]))
+
+    def _index_current(self):
+        """Whether every complete line in the segments has its index record"""
+        if not os.path.exists(self.index_path) or os.path.exists(self.compacting_path):
+            return False
+        if os.path.getsize(self.index_path) % INDEX_RECORD.size:
+            return False
+        segments = self._segment_numbers()
+        if self._index_stale(segments):
+            return False
+        last = self._last_record()
+        if last is None:
+            return not segments
+        segment, end = self._indexed_end(last)
+        return segments[-1] == segment and os.path.getsize(self._segment_path(segment)) == end
+
+    def _finish_compaction(self):
+        """Settle a compaction that died before removing one of the two generations"""
+        with open(self.compacting_path, 'r') as f:
+            first_new = int(f.read())
+        first = self._first_record() if os.path.exists(self.index_path) else None
+        switched = first is not None and first[1] >= first_new
+        for number in self._segment_numbers():
+            if (number < first_new) == switched:
+                os.remove(self._segment_path(number))
+        os.remove(self.compacting_path)
+
+    def _catch_up(self):
+        """Index every complete line past the last index record; returns their decisions.
+
+        A partial final line, left by a writer that died mid-write, is
+        truncated. A stale index is rebuilt from the segments along with the
+        derived files, and nothing is returned since none of it is new to
+        them. Runs under the exclusive lock.
+        """
+        os.makedirs(self.log_dir, exist_ok=True)
+        if os.path.exists(self.compacting_path):
+            self._finish_compaction()
+        if not os.path.exists(self.index_path):
+            open(self.index_path, 'wb').close()
+        index_size = os.path.getsize(self.index_path)
+        if index_size % INDEX_RECORD.size:
+            with open(self.index_path, 'r+b') as f:
+                f.truncate(index_size - index_size % INDEX_RECORD.size)
+
+        segments = self._segment_numbers()
+        stale = self._index_stale(segments)
+        if stale:
+            open(self.index_path, 'wb').close()
+        last = self._last_record()
+        if last is not None:
+            last_key = last[0]
+            segment, end = self._indexed_end(last)
+        else:
+            last_key = float('-inf')
+            segment, end = (segments[0] if segments else 0), 0
+
+        decisions = []
+        records = []
+        for number in [n for n in segments if n >= segment]:
+            offset = end if number == segment else 0
+            with open(self._segment_path(number), 'r+b') as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    decision = json.loads(line)
+                    last_key = max(last_key, to_epoch(decision['timestamp']))
+                    records.append(INDEX_RECORD.pack(last_key, number, offset))
+                    decisions.append(decision)
+                    offset += len(line)
+                if f.seek(0, os.SEEK_END) > offset:
+                    f.truncate(offset)
+        if records:
+            with open(self.index_path, 'ab') as f:
+                f.write(b"".join(records))
+                f.flush()
+                os.fsync(f.fileno())
+        if stale:
+            # The derived files may count decisions the segments no longer
+            # hold in the same places; start them over too
+            rebuild_derived(self.memory_dir, _newest_first(decisions))
+            return []
+        return decisions
+
+    def _sync_index(self):
+        """Bring the index up to date with the segments before a read"""
+        if not os.path.isdir(self.log_dir) or self._index_current():
+            return
+        try:
+            with self.locked(exclusive=True):
+                update_derived_many(self, self._catch_up())
+        except OSError:
+            # A read-only memory directory is read as it is
+            pass
+
+    def _write(self, decisions, log_dir, last=None, sync=False, first_segment=0, index_path=None):
+        """Append decisions to the segments and index under log_dir"""
+        last_key, segment, _ = last or (float('-inf'), first_segment, 0)
+        segment_path = self._segment_path(segment, log_dir)
+        offset = os.path.getsize(segment_path) if os.path.exists(segment_path) else 0
+
+        records = []
+        lines = {}
+        for decision in decisions:
+            line = (json.dumps(decision, default=str, ensure_ascii=False) + "\n").encode('utf-8')
+            if offset and offset + len(line) > SEGMENT_BYTES:
+                segment += 1
+                offset = 0
+            # Keys are clamped so the index stays sorted even if a decision
+            # carries an older timestamp than the one before it
+            last_key = max(last_key, to_epoch(decision['timestamp']))
+            records.append(INDEX_RECORD.pack(last_key, segment, offset))
+            lines.setdefault(segment, []).append(line)
+            offset += len(line)
+
+        # Segments reach the disk before the index records that point into them
+        for number, chunk in lines.items():
+            with open(self._segment_path(number, log_dir), 'ab') as f:
+                f.write(b"".join(chunk))
+                if sync:
+                    f.flush()
+                    os.fsync(f.fileno())
+        with open(index_path or os.path.join(log_dir, "index.bin"), 'ab') as f:
+            f.write(b"".join(records))
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def append(self, decision):
+        """Durably append a single decision, migrating the legacy YAML first if needed"""
+        with self.locked(exclusive=True):
+            if not self.exists():
+                self._migrate()
+            update_derived_many(self, self._catch_up())
+            self._write([decision], self.log_dir, self._last_record(), sync=True)
+            # Derived files are read-modify-write too; keep them under the lock
+            update_derived(self, decision)
+        return decision
+
+    def migrate(self):
+        """One-time migration of the legacy decisions.yaml into the log"""
+        with self.locked(exclusive=True):
+            return self._migrate()
+
+    def _migrate(self):
+        if self.exists():
+            return 0
+
+        decisions = []
+        if os.path.exists(self.legacy_path):
+            data = load_yaml(self.legacy_path, use_sidecar=False) or {}
+            decisions = [d for d in data.get('decisions') or [] if d.get('timestamp')]
+            for d in decisions:
+                if isinstance(d['timestamp'], datetime):
+                    d['timestamp'] = d['timestamp'].isoformat()
+            decisions.sort(key=lambda d: to_epoch(d['timestamp']))
+
+        # Build the log next to its final location and swap it in at once
+        tmp_dir = self.log_dir + ".migrating"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        open(os.path.join(tmp_dir, "index.bin"), 'wb').close()
+        self._write(decisions, tmp_dir, sync=True)
+        os.replace(tmp_dir, self.log_dir)
+        rebuild_derived(self.memory_dir, decisions)
+        return len(decisions)
+
+    def compact(self):
+        """Rewrite the log in timestamp order into full segments.
+
+        New segments are numbered after the existing ones and a new index
+        is renamed over the old one, so the switch is atomic. Old segments
+        are removed afterwards. A ``compacting`` marker names the first new
+        segment until then, so a compaction that dies part way is settled
+        by the next catch-up. Returns the number of decisions in the
+        compacted log.
+        """
+        with self.locked(exclusive=True):
+            if not self.exists():
+                return 0
+            update_derived_many(self, self._catch_up())
+            first = self._first_record()
+            decisions = self._read_from(first[1], first[2]) if first else []
+            decisions = decisions[:os.path.getsize(self.index_path) // INDEX_RECORD.size]
+            decisions.sort(key=lambda d: to_epoch(d['timestamp']))
+
+            old_segments = self._segment_numbers()
+            first_segment = (old_segments[-1] + 1) if old_segments else 0
+            with open(self.compacting_path, 'w') as f:
+                f.write(str(first_segment))
+                f.flush()
+                os.fsync(f.fileno())
+            tmp_index = f"{self.index_path}.{os.getpid()}.tmp"
+            open(tmp_index, 'wb').close()
+            self._write(decisions, self.log_dir, sync=True,
+                        first_segment=first_segment, index_path=tmp_index)
+            os.replace(tmp_index, self.index_path)
+            _fsync_dir(self.log_dir)
+            for number in old_segments:
+                os.remove(self._segment_path(number))
+            os.remove(self.compacting_path)
+        return len(decisions)
+
+    def _read_from(self, segment, offset):
+        """Read every decision from (segment, offset) to the end of the log"""
+        decisions = []
+        with tracing.span('read_log', segment=segment, offset=offset) as span:
+            while True:
+                path = self._segment_path(segment)
+                if not os.path.exists(path):
+                    break
+                with open(path, 'rb') as f:
+                    f.seek(offset)
+                    # A line without its newline is a write still in progress
+                    decisions.extend(json.loads(line) for line in f if line.endswith(b"\n"))
+                    tracing.count('bytes_read', f.tell() - offset)
+                segment += 1
+                offset = 0
+            tracing.count('entries_parsed', len(decisions))
+            span.set(entries=len(decisions))
+        return decisions
+
+    def since(self, cutoff):
+        """Decisions with a timestamp after cutoff, newest first"""
+        self._sync_index()
+        if not os.path.exists(self.index_path):
+            return [d for d in self.all() if to_epoch(d['timestamp']) > to_epoch(cutoff)]
+        with self.locked():
+            if os.path.getsize(self.index_path) < INDEX_RECORD.size:
+                return []
+
+            cutoff_epoch = to_epoch(cutoff)
+            with open(self.index_path, 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as index:
+                    keys = _IndexKeys(index)
+                    position = bisect.bisect_right(keys, cutoff_epoch)
+                    if position == len(keys):
+                        return []
+                    _, segment, offset = INDEX_RECORD.unpack_from(
+                        index, position * INDEX_RECORD.size)
+            decisions = self._read_from(segment, offset)
+
+        recent = [d for d in decisions if to_epoch(d['timestamp']) > cutoff_epoch]
+        return _newest_first(recent)
+
+    def position(self):
+        """Number of decisions appended so far; a marker for appended_since"""
+        self._sync_index()
+        if not os.path.exists(self.index_path):
+            return 0
+        return os.path.getsize(self.index_path) // INDEX_RECORD.size
+
+    def appended_since(self, position):
+        """Decisions appended after position() returned position, newest first"""
+        self._sync_index()
+        with self.locked():
+            if not os.path.exists(self.index_path) or \
+                    position >= os.path.getsize(self.index_path) // INDEX_RECORD.size:
+                return []
+            with open(self.index_path, 'rb') as f:
+                f.seek(position * INDEX_RECORD.size)
+                _, segment, offset = INDEX_RECORD.unpack(f.read(INDEX_RECORD.size))
+            decisions = self._read_from(segment, offset)
+        decisions.reverse()
+        return decisions
+
+    def all(self):
+        """Every decision in the log, newest first"""
+        if not self.exists():
+            return []
+        self._sync_index()
+        with self.locked():
+            if os.path.exists(self.index_path):
+                first = self._first_record()
+            else:
+                segments = self._segment_numbers()
+                first = (None, segments[0], 0) if segments else None
+            decisions = self._read_from(first[1], first[2]) if first else []
+        return _newest_first(decisions)
+
+    def search(self, query, limit=20):
+        """Decisions ranked by BM25 against free text, best matches first.
+
+        Results are {'kind': 'decision', 'item': ...}, as from
+        SQLiteStore.search; the file layout does not index sessions.
+        """
+        index = DecisionSearchIndex(self.memory_dir)
+        try:
+            if not index.exists() and self.exists():
+                index.rebuild(self.all())
+            return [{'kind': 'decision', 'item': decision}
+                    for _, decision in index.search(query, limit=limit)]
+        finally:
+            index.close()
+
+    # Sessions: one summaries/session-<id>.yaml per live session. Compaction
+    # packs old ones into the session archive, and curation moves cold ones
+    # to archive/cold/.
+
+    @property
+    def manifest(self):
+        """Manifest of the summaries directory"""
+        if self._manifest is None:
+            self._manifest = SummaryManifest(self.memory_dir)
+        return self._manifest
+
+    @property
+    def session_watch_paths(self):
+        """Files whose fingerprint changes whenever the stored sessions change"""
+        return [self.summaries_dir, SessionArchive(self.memory_dir).index_path]
+
+    def _session_path(self, session_id):
+        return os.path.join(self.summaries_dir, f"session-{session_id}.yaml")
+
+    def _live_sessions(self):
+        """session id -> manifest entry, for the files in summaries/"""
+        self.manifest.refresh()
+        return {name[len("session-"):-len(".yaml")]: meta
+                for name, meta in self.manifest.entries.items() if meta['kind'] == 'session'}
+
+    def upsert_sessions(self, summaries, times=None):
+        """Write session summaries, replacing any earlier version.
+
+        times holds an epoch or None per summary; a set epoch becomes the
+        file's mtime, so backdated sessions sort where they happened.
+        """
+        os.makedirs(self.summaries_dir, exist_ok=True)
+        for summary, when in zip(summaries, times or [None] * len(summaries)):
+            path = self._session_path(summary['session_id'])
+            # Replaced rather than rewritten in place, so the summaries
+            # directory changes and the manifest notices
+            with atomic_write(path) as f:
+                dump_yaml(summary, f)
+            if when is not None:
+                os.utime(path, (when, when))
+
+    def session_count(self):
+        """Live and packed sessions"""
+        return len(self._live_sessions()) + len(SessionArchive(self.memory_dir).index)
+
+    def last_session_ns(self):
+        """When the newest live session was written, or 0 if there is none"""
+        return max((meta['mtime_ns'] for meta in self._live_sessions().values()), default=0)
+
+    def recent_session_ids(self, count=5):
+        """Ids of the newest sessions, newest first.
+
+        Packed sessions are older than any live one, so they only fill what
+        the summaries directory cannot.
+        """
+        live = self._live_sessions()
+        newest = heapq.nlargest(count, ((meta['mtime_ns'], session_id)
+                                        for session_id, meta in live.items()))
+        ids = [session_id for _, session_id in newest]
+        if len(ids) < count:
+            packed = [s for s in SessionArchive(self.memory_dir).latest(count) if s not in live]
+            ids.extend(packed[:count - len(ids)])
+        return ids
+
+    def sessions_by_id(self, session_ids):
+        """Live or packed session summaries for the given ids, in the order given"""
+        live = self._live_sessions()
+        paths = [self._session_path(s) for s in session_ids if str(s) in live]
+        loaded = dict(zip(paths, load_summaries(paths)))
+        archive = SessionArchive(self.memory_dir)
+        found = []
+        for session_id in session_ids:
+            path = self._session_path(session_id)
+            if path in loaded:
+                found.append(loaded[path])
+            elif session_id in archive:
+                found.append(archive.load(session_id))
+        return found
+
+    def sessions_since(self, epoch):
+        """Live sessions written after epoch, newest first"""
+        since_ns = int(epoch * 1e9)
+        newer = sorted((meta['mtime_ns'], session_id) for session_id, meta
+                       in self._live_sessions().items() if meta['mtime_ns'] > since_ns)
+        return load_summaries([self._session_path(s) for _, s in reversed(newer)])
+
+    def session_times(self):
+        """(session_id, epoch) for every live session"""
+        return [(session_id, meta['mtime_ns'] / 1e9)
+                for session_id, meta in self._live_sessions().items()]
+
+    def all_sessions(self):
+        """Every stored session summary: live, packed and cold"""
+        sessions = {}
+        for directory in (self.summaries_dir, MemoryHeat(self.memory_dir).cold_dir):
+            if not os.path.isdir(directory):
+                continue
+            for name in sorted(os.listdir(directory)):
+                if summary_kind(name) == 'session':
+                    session_id = name[len("session-"):-len(".yaml")]
+                    sessions.setdefault(session_id, load_yaml(os.path.join(directory, name),
+                                                              use_sidecar=False))
+        # A packed copy is older than a live one of the same session
+        archive = SessionArchive(self.memory_dir)
+        for session_id in archive.index:
+            if session_id not in sessions:
+                sessions[session_id] = archive.load(session_id)
+        return list(sessions.values())
+
+
+def _fsync_dir(path):
+    dir_fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def _newest_first(decisions):
+    """Decisions in append order, sorted newest first by timestamp.
+
+    Concurrent writers can append a decision stamped slightly before the
+    one ahead of it; the stable sort puts it back in place.
+    """
+    decisions.sort(key=lambda d: to_epoch(d['timestamp']))
+    decisions.reverse()
+    return decisions
@@ -0,0 +1,201 @@
+import json
+import os
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from . import tracing
+from .context_cache import file_fingerprint
+from .fileio import atomic_write, write_json
+from .timestamps import to_epoch
+
+TABLE_VERSION = 1
+_ARRAYS = ('epoch_us', 'drift_code', 'context_code', 'offsets', 'heap')
+
+
+class DecisionTable:
+    """Columnar, NumPy-backed table of decisions in append order.
+
+    Columns:
+
+    - ``epoch_us``: int64 timestamps in epoch microseconds (whole seconds
+      would blur decisions made within the same second of a window edge)
+    - ``drift_code`` / ``context_code``: int32 codes into ``drift_types``
+      and ``contexts``
+    - ``offsets`` into ``heap``, a uint8 buffer of each decision's JSON
+
+    Time-window, drift-type and context filters are vectorized comparisons.
+    Only the selected rows are decoded back into dicts. A row costs about 16
+    bytes of columns plus its compact JSON, a fraction of a parsed dict.
+    """
+
+    def __init__(self, epoch_us, drift_code, context_code, offsets, heap,
+                 drift_types, contexts, position=0, source=None):
+        self.epoch_us = epoch_us
+        self.drift_code = drift_code
+        self.context_code = context_code
+        self.offsets = offsets
+        self.heap = heap
+        self.drift_types = drift_types
+        self.contexts = contexts
+        self.position = position
+        self.source = source
+
+    @classmethod
+    def empty(cls):
+        return cls(np.zeros(0, np.int64), np.zeros(0, np.int32), np.zeros(0, np.int32),
+                   np.zeros(1, np.int64), np.zeros(0, np.uint8), [], [])
+
+    @classmethod
+    def from_decisions(cls, decisions, position=0):
+        """Build a table from decisions given oldest first"""
+        return cls.empty().extend(decisions, position)
+
+    def extend(self, decisions, position):
+        """A new table with decisions (oldest first) appended after this one's rows"""
+        drift_types = list(self.drift_types)
+        contexts = list(self.contexts)
+        drift_lookup = {value: code for code, value in enumerate(drift_types)}
+        context_lookup = {value: code for code, value in enumerate(contexts)}
+
+        epochs, drift_codes, context_codes, blobs = [], [], [], []
+        for decision in decisions:
+            if not decision.get('timestamp'):
+                continue
+            drift_type = decision.get('drift_type')
+            context = decision.get('context')
+            if drift_type not in drift_lookup:
+                drift_lookup[drift_type] = len(drift_types)
+                drift_types.append(drift_type)
+            if context not in context_lookup:
+                context_lookup[context] = len(contexts)
+                contexts.append(context)
+            epochs.append(round(to_epoch(decision['timestamp']) * 1_000_000))
+            drift_codes.append(drift_lookup[drift_type])
+            context_codes.append(context_lookup[context])
+            blobs.append(json.dumps(decision, default=str, ensure_ascii=False,
+                                    separators=(',', ':')).encode('utf-8'))
+        tracing.count('entries_parsed', len(blobs))
+
+        lengths = np.fromiter((len(b) for b in blobs), np.int64, len(blobs))
+        offsets = np.concatenate([self.offsets, self.offsets[-1] + np.cumsum(lengths)])
+        heap = np.concatenate([self.heap, np.frombuffer(b"".join(blobs), np.uint8)])
+        return DecisionTable(
+            np.concatenate([self.epoch_us, np.array(epochs, np.int64)]),
+            np.concatenate([self.drift_code, np.array(drift_codes, np.int32)]),
+            np.concatenate([self.context_code, np.array(context_codes, np.int32)]),
+            offsets, heap, drift_types, contexts, position, self.source)
+
+    def __len__(self):
+        return len(self.epoch_us)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in _ARRAYS)
+
+    def decision(self, row):
+        return json.loads(self.heap[self.offsets[row]:self.offsets[row + 1]].tobytes())
+
+    def mask(self, since=None, drift_type=None, context=None):
+        """Boolean row mask for the given filters, each one vectorized"""
+        selected = np.ones(len(self), bool)
+        if since is not None:
+            selected &= self.epoch_us > round(to_epoch(since) * 1_000_000)
+        if drift_type is not None:
+            code = self.drift_types.index(drift_type) if drift_type in self.drift_types else -1
+            selected &= self.drift_code == code
+        if context is not None:
+            code = self.contexts.index(context) if context in self.contexts else -1
+            selected &= self.context_code == code
+        return selected
+
+    def select(self, since=None, drift_type=None, context=None):
+        """Matching decisions, newest first.
+
+        Rows are ordered by timestamp, since appends (a pull, a backdated
+        decision) can arrive out of order; among equal timestamps the last
+        appended comes first.
+        """
+        rows = np.flatnonzero(self.mask(since, drift_type, context))
+        rows = rows[np.argsort(self.epoch_us[rows], kind='stable')][::-1]
+        return [self.decision(row) for row in rows]
+
+    def save(self, directory, source):
+        """Write the columns as .npy files, with metadata naming their source"""
+        os.makedirs(directory, exist_ok=True)
+        for name in _ARRAYS:
+            with atomic_write(os.path.join(directory, f"{name}.npy"), 'wb') as f:
+                np.save(f, getattr(self, name))
+        meta = {'version': TABLE_VERSION, 'source': source, 'position': self.position,
+                'drift_types': self.drift_types, 'contexts': self.contexts}
+        write_json(os.path.join(directory, "meta.json"), meta)
+
+    @classmethod
+    def load(cls, directory, source):
+        """Memory-map a saved table, or None if it is missing or from another source"""
+        try:
+            with open(os.path.join(directory, "meta.json"), 'r') as f:
+                meta = json.load(f)
+            if meta.get('version') != TABLE_VERSION or meta.get('source') != source:
+                return None
+            arrays = [np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r')
+                      for name in _ARRAYS]
+        except (OSError, ValueError):
+            return None
+        return cls(*arrays, meta['drift_types'], meta['contexts'], meta['position'], source)
+
+
+def _source_identity(path):
+    """Path and inode of the file a table was built from; appends keep both"""
+    fingerprint = file_fingerprint(path)
+    return [path, fingerprint[2]] if fingerprint else None
+
+
+def load_decision_table(store, legacy_decisions=None, table=None):
+    """Table of every decision in store, brought up to date with as little work as possible.
+
+    An in-memory table (from an earlier call) or the copy saved under
+    cache/decision-table is reused while its source file is the same one.
+    Decisions appended since are added from store.appended_since, so the
+    full history is only parsed once. Without a store, legacy_decisions (a
+    callable returning decisions.yaml's list) is used and rebuilt whenever
+    that file changes.
+    """
+    directory = os.path.join(store.memory_dir, "cache", "decision-table")
+    if store.exists():
+        source = _source_identity(store.watch_paths[0])
+        position = store.position()
+    else:
+        legacy_path = os.path.join(store.memory_dir, "decisions.yaml")
+        fingerprint = file_fingerprint(legacy_path)
+        source = [legacy_path] + list(fingerprint) if fingerprint else None
+        position = 0
+    if source is None:
+        return DecisionTable.empty()
+
+    with tracing.span('decision_table') as span:
+        if table is None or table.source != source or table.position > position:
+            table = DecisionTable.load(directory, source)
+            if table is not None and table.position > position:
+                table = None
+        if table is not None and table.position == position:
+            span.set(rebuilt=False)
+            return table
+
+        if table is not None:
+            new = store.appended_since(table.position)
+            table = table.extend(reversed(new), position)
+        elif store.exists():
+            table = DecisionTable.from_decisions(reversed(store.all()), position)
+        else:
+            table = DecisionTable.from_decisions(legacy_decisions() if legacy_decisions else [])
+        table.source = source
+        span.set(rebuilt=True, rows=len(table))
+        try:
+            table.save(directory, source)
+        except OSError:
+            # A read-only memory directory just rebuilds the table each time
+            pass
+        return table
@@ -0,0 +1,184 @@
+import json
+import os
+import sqlite3
+from collections import Counter
+from datetime import datetime, timedelta
+
+from .fileio import write_json
+from .timestamps import as_datetime
+
+# Every major drift from the last MAJOR_WINDOW_DAYS is kept, and at least
+# the newest LATEST_MAJOR_LIMIT whatever their age
+MAJOR_WINDOW_DAYS = 30
+LATEST_MAJOR_LIMIT = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS context_counts (
+    context TEXT NOT NULL,
+    drift_type TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (context, drift_type)
+) WITHOUT ROWID;
+"""
+
+
+def _trim_major(warnings, now=None):
+    """Sort major-drift warnings newest first and drop the old ones past the limit"""
+    warnings.sort(key=lambda w: as_datetime(w['timestamp']), reverse=True)
+    cutoff = (now or datetime.now()) - timedelta(days=MAJOR_WINDOW_DAYS)
+    keep = LATEST_MAJOR_LIMIT
+    while keep < len(warnings) and as_datetime(warnings[keep]['timestamp']) > cutoff:
+        keep += 1
+    del warnings[keep:]
+
+
+class DriftAggregates:
+    """Drift statistics maintained on every decision write.
+
+    ``drift-stats.json`` in the memory directory holds what stays small
+    however long the history grows:
+
+    - counts per drift_type
+    - per-day counts per drift_type, from which rolling window totals are
+      summed without touching the decisions themselves
+    - the major-drift decisions of the last MAJOR_WINDOW_DAYS, and at least
+      the newest LATEST_MAJOR_LIMIT of any age
+
+    Counts per (context, drift_type) grow with every new context string, so
+    they live in ``drift-stats.db`` (SQLite), one row per pair, and an
+    append updates a single row.
+
+    ``rebuild`` recomputes everything from the full decision history.
+    """
+
+    def __init__(self, memory_dir=".claude-memory"):
+        self.path = os.path.join(memory_dir, "drift-stats.json")
+        self.db_path = os.path.join(memory_dir, "drift-stats.db")
+        self._data = None
+        self._conn = None
+
+    def exists(self):
+        # Stats written before the context counts moved out of the JSON file
+        # have no database and get rebuilt
+        return os.path.exists(self.path) and os.path.exists(self.db_path)
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @staticmethod
+    def _empty():
+        return {
+            'total': 0,
+            'by_drift_type': {},
+            'daily': {},
+            'latest_major': [],
+        }
+
+    @property
+    def data(self):
+        if self._data is None:
+            try:
+                with open(self.path, 'r') as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError):
+                self._data = self._empty()
+        return self._data
+
+    def _add(self, data, decision):
+        """Fold decision into data; returns its (context, drift_type) pair"""
+        drift_type = decision.get('drift_type') or 'unspecified'
+        context = decision.get('context') or 'Unknown'
+        day = as_datetime(decision['timestamp']).date().isoformat()
+
+        data['total'] += 1
+        data['by_drift_type'][drift_type] = data['by_drift_type'].get(drift_type, 0) + 1
+        per_day = data['daily'].setdefault(day, {})
+        per_day[drift_type] = per_day.get(drift_type, 0) + 1
+
+        if drift_type == 'major':
+            data['latest_major'].append({
+                'timestamp': str(decision['timestamp']),
+                'context': context,
+                'impact': decision.get('impact', []),
+            })
+        return context, drift_type
+
+    def _count_contexts(self, pairs):
+        self.conn.executemany(
+            "INSERT INTO context_counts (context, drift_type, count) VALUES (?, ?, ?) "
+            "ON CONFLICT (context, drift_type) DO UPDATE SET count = count + excluded.count",
+            [(context, drift_type, count) for (context, drift_type), count in pairs.items()])
+
+    def _save(self, data):
+        write_json(self.path, data)
+        self._data = data
+
+    def record(self, decision):
+        """Fold one newly written decision into the aggregates"""
+        data = self.data
+        pair = self._add(data, decision)
+        _trim_major(data['latest_major'])
+        with self.conn:
+            self._count_contexts({pair: 1})
+        self._save(data)
+
+    def rebuild(self, decisions):
+        """Recompute the aggregates from scratch"""
+        data = self._empty()
+        pairs = Counter(self._add(data, decision) for decision in decisions
+                        if decision.get('timestamp'))
+        _trim_major(data['latest_major'])
+        with self.conn:
+            self.conn.execute("DELETE FROM context_counts")
+            self._count_contexts(pairs)
+        self._save(data)
+        return data
+
+    def top_contexts(self, limit=10):
+        """(context, decisions, major decisions) for the busiest context areas"""
+        return self.conn.execute(
+            "SELECT context, SUM(count) AS total, "
+            "SUM(CASE WHEN drift_type = 'major' THEN count ELSE 0 END) "
+            "FROM context_counts GROUP BY context ORDER BY total DESC LIMIT ?", (limit,)).fetchall()
+
+    def window_totals(self, days, now=None):
+        """Decision counts per drift_type over the last `days` calendar days"""
+        today = (now or datetime.now()).date()
+        totals = {}
+        for offset in range(days):
+            day = (today - timedelta(days=offset)).isoformat()
+            for drift_type, count in self.data['daily'].get(day, {}).items():
+                totals[drift_type] = totals.get(drift_type, 0) + count
+        return totals
+
+    def major_since(self, cutoff):
+        """Major-drift warnings newer than cutoff, newest first.
+
+        Complete for any cutoff within the last MAJOR_WINDOW_DAYS.
+        """
+        return [w for w in self.data['latest_major'] if as_datetime(w['timestamp']) > cutoff]
+
+
+def record_decision(store, decision):
+    """Fold a decision just appended to store into its aggregates.
+
+    Stores written before aggregates existed get them rebuilt from the full
+    history on their first new decision.
+    """
+    stats = DriftAggregates(store.memory_dir)
+    try:
+        if stats.exists():
+            stats.record(decision)
+        else:
+            stats.rebuild(store.all())
+    finally:
+        stats.close()
@@ -0,0 +1,151 @@
+import re
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from . import tracing
+from .bm25_index import STOPWORDS
+
+HIGHLIGHT_SENTENCES = 5
+DAMPING = 0.85
+ITERATIONS = 30
+TOLERANCE = 1e-6
+# Candidates this similar to a sentence already chosen are skipped
+REDUNDANCY = 0.8
+
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?;])\s+|\n+")
+# bm25_index's token pattern, plus the newlines that separate sentences
+_TOKEN_OR_BREAK = re.compile(r"[a-z0-9]+|\n")
+# bm25_index's camelCase split, as a zero-width match (no template to expand)
+_CAMEL_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+
+def split_sentences(texts):
+    """Sentences of each text, in order, without blanks or exact repeats"""
+    sentences = []
+    seen = set()
+    for text in texts:
+        for sentence in _SENTENCE_BREAK.split(str(text)):
+            sentence = sentence.strip()
+            if sentence and sentence not in seen:
+                seen.add(sentence)
+                sentences.append(sentence)
+    return sentences
+
+
+def session_sentences(changes, decisions):
+    """Sentences of a session: each change as "<file>: <change>", then each decision"""
+    texts = [f"{c['file']}: {c.get('change', '')}" if c.get('file') else c.get('change', '')
+             for c in changes or []]
+    texts.extend(str(d) for d in decisions or [])
+    return split_sentences(texts)
+
+
+def _tfidf(sentences):
+    """L2-normalized TF-IDF vectors of sentences as (rows, cols, values) triplets.
+
+    Tokens are the same as bm25_index.tokenize produces, but the case
+    folding runs once over all sentences and term counting is vectorized.
+    """
+    text = "\n".join(s.replace("\n", " ") for s in sentences)
+    if not text.islower():
+        text = _CAMEL_BOUNDARY.sub(" ", text).lower()
+    tokens = _TOKEN_OR_BREAK.findall(text)
+    vocabulary = {term: i for i, term in enumerate(dict.fromkeys(tokens))}
+    width = len(vocabulary)
+    ids = np.fromiter(map(vocabulary.__getitem__, tokens), np.int64, len(tokens))
+    breaks = ids == vocabulary.get("\n", -1)
+    token_rows = np.cumsum(breaks)
+    # Newlines, one-letter tokens and stopwords are dropped, as in tokenize
+    keep = np.fromiter((len(term) > 1 and term not in STOPWORDS for term in vocabulary), bool, width)
+    if width:
+        token_rows, ids = token_rows[keep[ids]], ids[keep[ids]]
+
+    # One entry per (sentence, term) with its count, ordered by sentence
+    pairs, counts = np.unique(token_rows * max(width, 1) + ids, return_counts=True)
+    rows = pairs // max(width, 1)
+    cols = pairs % max(width, 1)
+    tf = 1.0 + np.log(counts.astype(np.float64))
+    df = np.bincount(cols, minlength=width)
+    # Smoothed IDF, so a term in every sentence still counts a little
+    values = tf * (np.log((1 + len(sentences)) / (1 + df[cols])) + 1.0)
+    norms = np.sqrt(np.bincount(rows, weights=values * values, minlength=len(sentences)))
+    values /= np.where(norms > 0, norms, 1.0)[rows]
+    return rows, cols, values, width
+
+
+def textrank(sentences, damping=DAMPING, iterations=ITERATIONS):
+    """TextRank score of every sentence under TF-IDF cosine similarity.
+
+    With X the normalized TF-IDF matrix, the similarity matrix is
+    X·Xᵀ without its diagonal. It is never built. Each power iteration
+    applies it as X·(Xᵀ·r) with two bincounts over the non-zero entries,
+    so a step costs O(non-zeros) rather than O(n²). Thousands of lines
+    rank in a few milliseconds.
+    """
+    n = len(sentences)
+    rows, cols, values, width = _tfidf(sentences)
+
+    # Self-similarity is left out: the diagonal of X·Xᵀ is each row's squared norm
+    diagonal = np.bincount(rows, weights=values * values, minlength=n)
+
+    def similarity_times(vector):
+        projected = np.bincount(cols, weights=values * vector[rows], minlength=width)
+        return np.bincount(rows, weights=values * projected[cols], minlength=n) - diagonal * vector
+
+    degree = similarity_times(np.ones(n))
+    # Sentences with no similar neighbour spread their rank evenly instead
+    dangling = degree <= 1e-12
+    degree[dangling] = 1.0
+    rank = np.full(n, 1.0 / n)
+    for _ in range(iterations):
+        spread = rank / degree
+        spread[dangling] = 0.0
+        updated = (1 - damping) / n + damping * (similarity_times(spread) + rank[dangling].sum() / n)
+        if np.abs(updated - rank).sum() < TOLERANCE:
+            rank = updated
+            break
+        rank = updated
+    return rank, (rows, cols, values)
+
+
+def extract(sentences, count=HIGHLIGHT_SENTENCES):
+    """The count most representative sentences, in their original order.
+
+    Sentences are ranked by TextRank and taken best first, skipping any
+    that nearly repeat one already taken. Without NumPy the first count
+    sentences are used.
+    """
+    if len(sentences) <= count:
+        return list(sentences)
+    if np is None:
+        return sentences[:count]
+
+    with tracing.span('extract_sentences', sentences=len(sentences)):
+        rank, (rows, cols, values) = textrank(sentences)
+        bounds = np.searchsorted(rows, np.arange(len(sentences) + 1))
+
+        def vector(i):
+            return dict(zip(cols[bounds[i]:bounds[i + 1]].tolist(),
+                            values[bounds[i]:bounds[i + 1]].tolist()))
+
+        chosen = []
+        vectors = []
+        # Earlier sentences win ties
+        for i in np.lexsort((np.arange(len(sentences)), -rank)):
+            candidate = vector(i)
+            if any(sum(w * other.get(t, 0.0) for t, w in candidate.items()) > REDUNDANCY
+                   for other in vectors):
+                continue
+            chosen.append(int(i))
+            vectors.append(candidate)
+            if len(chosen) == count:
+                break
+    return [sentences[i] for i in sorted(chosen)]
+
+
+def summarize_session(changes, decisions, count=HIGHLIGHT_SENTENCES):
+    """A session's changes and decisions compressed to count representative sentences"""
+    return extract(session_sentences(changes, decisions), count)
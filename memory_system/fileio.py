@@ -0,0 +1,34 @@
+import json
+import os
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_write(path, mode='w', durable=False):
+    """Open a temporary file that replaces path when the block completes.
+
+    Readers see the old file or the new one, never a partial write; if the
+    block fails the temporary file is removed and path is left alone. With
+    durable the data is fsynced before the rename, for state that has to
+    survive a crash.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, mode) as f:
+            yield f
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_json(path, data, durable=False, **options):
+    """Atomically replace path with data as JSON; options go to json.dump"""
+    with atomic_write(path, durable=durable) as f:
+        json.dump(data, f, **options)
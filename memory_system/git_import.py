@@ -0,0 +1,271 @@
+import json
+import os
+import subprocess
+import tempfile
+from datetime import datetime
+
+from . import tracing
+from .fileio import write_json
+from .summarizer import ProgressiveSummarizer
+
+SESSION_GAP_MINUTES = 120
+BATCH_SESSIONS = 200
+# Caps that keep one runaway session (a bot, a vendored import) bounded
+MAX_SESSION_COMMITS = 100
+MAX_SESSION_FILES = 200
+# Open sessions of authors who went quiet are closed every this many commits
+SWEEP_EVERY = 256
+STATE_VERSION = 1
+
+_RECORD = "\x1e"
+_FIELD = "\x1f"
+LOG_FORMAT = "%x1e%H%x1f%an%x1f%ae%x1f%at%x1f%s"
+
+
+class GitImportError(Exception):
+    pass
+
+
+def _unquote(path):
+    # core.quotePath=false leaves only paths with quotes, backslashes or
+    # control characters quoted
+    if len(path) > 1 and path[0] == path[-1] == '"':
+        return path[1:-1].replace('\\"', '"').replace('\\t', '\t').replace('\\\\', '\\')
+    return path
+
+
+def _run_git(repo, *args):
+    try:
+        result = subprocess.run(["git", "-C", repo, *args], capture_output=True, text=True)
+    except OSError as e:
+        raise GitImportError(f"cannot run git: {e}")
+    return result
+
+
+def iter_commits(repo, since=None, rev="HEAD"):
+    """Non-merge commits of repo reachable from rev, oldest first.
+
+    One ``git log --numstat`` process is streamed line by line, so only
+    the commit being parsed is held in memory. since, a commit id,
+    excludes it and its ancestors. Each commit is a dict with sha, author,
+    email, time (epoch seconds of the author date), subject and files, a
+    list of (path, added, deleted) line counts. Binary files count 0.
+    """
+    command = ["git", "-C", repo, "-c", "core.quotePath=false", "log", "--reverse",
+               "--no-merges", "--no-renames", "--numstat", f"--format={LOG_FORMAT}",
+               f"{since}..{rev}" if since else rev, "--"]
+    with tempfile.TemporaryFile() as stderr:
+        try:
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr,
+                                       text=True, encoding="utf-8", errors="replace")
+        except OSError as e:
+            raise GitImportError(f"cannot run git: {e}")
+        completed = False
+        try:
+            commit = None
+            for line in process.stdout:
+                line = line.rstrip("\n")
+                if line.startswith(_RECORD):
+                    if commit is not None:
+                        yield commit
+                    sha, author, email, when, subject = line[1:].split(_FIELD, 4)
+                    commit = {'sha': sha, 'author': author, 'email': email,
+                              'time': int(when), 'subject': subject, 'files': []}
+                elif line and commit is not None:
+                    added, deleted, path = line.split("\t", 2)
+                    commit['files'].append((_unquote(path),
+                                            int(added) if added.isdigit() else 0,
+                                            int(deleted) if deleted.isdigit() else 0))
+            if commit is not None:
+                yield commit
+            completed = True
+        finally:
+            process.stdout.close()
+            if not completed:
+                process.kill()
+            process.wait()
+        if process.returncode != 0:
+            stderr.seek(0)
+            message = stderr.read().decode("utf-8", "replace").strip()
+            raise GitImportError(message or f"git log exited with {process.returncode}")
+
+
+def _new_session(commit):
+    return {
+        'author': commit['author'],
+        'email': commit['email'],
+        'start': commit['time'],
+        'end': commit['time'],
+        'first_commit': commit['sha'],
+        'last_commit': commit['sha'],
+        'commits': 0,
+        'subjects': [],
+        # path -> [added, deleted, index of the last subject that touched it]
+        'files': {},
+        'more_files': 0,
+    }
+
+
+def _add_commit(session, commit):
+    session['start'] = min(session['start'], commit['time'])
+    session['end'] = max(session['end'], commit['time'])
+    session['last_commit'] = commit['sha']
+    session['commits'] += 1
+    session['subjects'].append(commit['subject'])
+    subject = len(session['subjects']) - 1
+    files = session['files']
+    for path, added, deleted in commit['files']:
+        entry = files.get(path)
+        if entry is None:
+            if len(files) >= MAX_SESSION_FILES:
+                session['more_files'] += 1
+                continue
+            entry = files[path] = [0, 0, subject]
+        entry[0] += added
+        entry[1] += deleted
+        entry[2] = subject
+
+
+def session_summary(session):
+    """create_session_summaries input for a grouped session.
+
+    Each file touched becomes a change described by the last commit
+    subject that touched it and its line counts; the distinct commit
+    subjects are the session's decisions. Files past MAX_SESSION_FILES
+    are only counted, as files_omitted.
+    """
+    changes = [{'file': path, 'change': f"{session['subjects'][subject]} (+{added} -{deleted})"}
+               for path, (added, deleted, subject) in session['files'].items()]
+    summary = {
+        'session_id': f"git-{session['first_commit'][:12]}",
+        'timestamp': datetime.fromtimestamp(session['end']),
+        'changes': changes,
+        'decisions': list(dict.fromkeys(s for s in session['subjects'] if s)),
+        'source': 'git',
+        'author': f"{session['author']} <{session['email']}>",
+        'started': datetime.fromtimestamp(session['start']).isoformat(),
+        'commits': session['commits'],
+        'first_commit': session['first_commit'],
+        'last_commit': session['last_commit'],
+    }
+    if session['more_files']:
+        summary['files_omitted'] = session['more_files']
+    return summary
+
+
+class GitHistoryImporter:
+    """Backfill session summaries from a repository's git history.
+
+    Commits are read oldest first in a single streamed ``git log`` pass
+    and grouped into sessions per author: a session ends when its author
+    has not committed for gap_minutes, or when it reaches
+    MAX_SESSION_COMMITS. Finished sessions are written through
+    ProgressiveSummarizer in batches of batch_size.
+
+    Progress is kept in ``git-import.json`` in the memory directory: the
+    last commit read and the sessions still open at that point. It is
+    saved after every batch, so an interrupted or later run continues
+    from there. Session ids come from each session's first commit, so a
+    session written again (extended by new commits, or re-read after a
+    crash between a batch and its save) replaces its earlier summary.
+
+    Memory stays bounded by one batch plus the open sessions, each capped
+    at MAX_SESSION_COMMITS commits and MAX_SESSION_FILES files, whatever
+    the length of the history.
+    """
+
+    def __init__(self, memory_dir=".claude-memory", repo=".", gap_minutes=SESSION_GAP_MINUTES,
+                 batch_size=BATCH_SESSIONS, backend=None):
+        self.memory_dir = memory_dir
+        self.repo = os.path.abspath(repo)
+        self.gap = gap_minutes * 60
+        self.batch_size = batch_size
+        self.backend = backend
+        self.state_path = os.path.join(memory_dir, "git-import.json")
+
+    def load_state(self):
+        try:
+            with open(self.state_path, 'r') as f:
+                state = json.load(f)
+            if state.get('version') == STATE_VERSION:
+                return state
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def _save_state(self, state):
+        write_json(self.state_path, state, durable=True)
+
+    def _start_state(self, rev, restart):
+        state = None if restart else self.load_state()
+        if state is None:
+            return {'version': STATE_VERSION, 'repo': self.repo, 'last_commit': None,
+                    'clock': 0, 'open': {}, 'commits': 0, 'sessions': 0}
+        if state['repo'] != self.repo:
+            raise GitImportError(f"{self.state_path} belongs to {state['repo']}; "
+                                 "import into another memory directory or restart")
+        last = state['last_commit']
+        if last and _run_git(self.repo, "merge-base", "--is-ancestor", last, rev).returncode != 0:
+            raise GitImportError(f"last imported commit {last[:12]} is not in the history of {rev}; "
+                                 "the history was rewritten, restart the import")
+        return state
+
+    def run(self, rev="HEAD", max_commits=None, restart=False):
+        """Import the commits reachable from rev that are not imported yet.
+
+        max_commits stops early, leaving the rest for the next run. With
+        restart the saved progress is ignored and the whole history is
+        read again. Returns the number of commits read and summaries
+        written in this run.
+        """
+        state = self._start_state(rev, restart)
+        os.makedirs(os.path.join(self.memory_dir, "summaries"), exist_ok=True)
+        summarizer = ProgressiveSummarizer(self.memory_dir, self.backend)
+        sessions = state['open']
+        ready = []
+        commits = written = 0
+
+        def close_quiet():
+            for key in [k for k, s in sessions.items() if state['clock'] - s['end'] > self.gap]:
+                ready.append(sessions.pop(key))
+
+        def flush(final=False):
+            nonlocal written
+            batch = [session_summary(s) for s in ready]
+            if final:
+                # Open sessions are written too, and rewritten if later commits extend them
+                batch.extend(session_summary(s) for s in sessions.values())
+            if batch:
+                with tracing.span('git_import_batch', sessions=len(batch)):
+                    summarizer.create_session_summaries(batch)
+            written += len(batch)
+            state['sessions'] += len(ready)
+            del ready[:]
+            self._save_state(state)
+
+        with tracing.span('git_import', rev=rev) as span:
+            for commit in iter_commits(self.repo, state['last_commit'], rev):
+                key = (commit['email'] or commit['author']).lower()
+                session = sessions.get(key)
+                if session is not None and (commit['time'] - session['end'] > self.gap
+                                            or session['commits'] >= MAX_SESSION_COMMITS):
+                    ready.append(sessions.pop(key))
+                    session = None
+                if session is None:
+                    session = sessions[key] = _new_session(commit)
+                _add_commit(session, commit)
+                state['clock'] = max(state['clock'], commit['time'])
+                state['last_commit'] = commit['sha']
+                state['commits'] += 1
+                commits += 1
+                if commits % SWEEP_EVERY == 0:
+                    close_quiet()
+                if len(ready) >= self.batch_size:
+                    flush()
+                if max_commits and commits >= max_commits:
+                    break
+            close_quiet()
+            # Nothing new: the open sessions were written by the last run
+            flush(final=commits > 0)
+            span.set(commits=commits, summaries=written)
+        return {'commits': commits, 'summaries': written}
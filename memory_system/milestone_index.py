@@ -0,0 +1,158 @@
+import json
+import mmap
+import os
+import re
+from collections import Counter
+
+from . import tracing
+from .bm25_index import tokenize
+from .context_cache import file_fingerprint
+from .fileio import write_json
+
+MILESTONE_MAX_BYTES = 8192
+SECTION_TERMS = 32
+
+_HEADING_OR_FENCE = re.compile(rb"^(?:(#{1,6})[ \t]+([^\r\n]*?)[ \t#]*|(```|~~~)[^\r\n]*)\r?$", re.M)
+
+
+def scan_sections(buffer):
+    """(level, title, start, end) byte ranges of a Markdown buffer's sections.
+
+    Text before the first heading is a level-0 section titled ''. Headings
+    inside fenced code blocks are ignored.
+    """
+    sections = []
+    fence = None
+    start, level, title = 0, 0, ""
+    for match in _HEADING_OR_FENCE.finditer(buffer):
+        if match.group(3):
+            marker = match.group(3)
+            fence = None if fence == marker else (fence or marker)
+            continue
+        if fence:
+            continue
+        if match.start() > start or level:
+            sections.append((level, title, start, match.start()))
+        level = len(match.group(1))
+        title = match.group(2).decode('utf-8', 'replace')
+        start = match.start()
+    sections.append((level, title, start, len(buffer)))
+    return [s for s in sections if s[3] > s[2]]
+
+
+class MilestoneIndex:
+    """Cached section index of milestone files, read through mmap.
+
+    The index (heading level, title, byte range and the section's most
+    frequent terms) is built once per file version and kept in
+    ``cache/milestone-index.json``, keyed by the file's mtime, size and
+    inode. Excerpting then touches only the bytes of the sections chosen.
+    """
+
+    def __init__(self, memory_dir=".claude-memory"):
+        self.path = os.path.join(memory_dir, "cache", "milestone-index.json")
+        self._entries = None
+
+    @property
+    def entries(self):
+        if self._entries is None:
+            try:
+                with open(self.path, 'r') as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            write_json(self.path, self.entries)
+        except OSError:
+            pass
+
+    def sections(self, path):
+        """Section list for a milestone file, rebuilding the index if it changed"""
+        fingerprint = list(file_fingerprint(path) or [])
+        entry = self.entries.get(path)
+        if entry and entry['fingerprint'] == fingerprint:
+            return entry['sections']
+
+        with tracing.span('milestone_index', path=path), open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                sections = []
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    sections = []
+                    for level, title, start, end in scan_sections(buffer):
+                        terms = Counter(tokenize(buffer[start:end].decode('utf-8', 'replace')))
+                        sections.append([level, title, start, end,
+                                         [t for t, _ in terms.most_common(SECTION_TERMS)]])
+                    tracing.count('bytes_read', len(buffer))
+        # Only the latest milestone is ever asked for; keep the cache small
+        self._entries = {path: {'fingerprint': fingerprint, 'sections': sections}}
+        self._save()
+        return sections
+
+    def excerpt(self, path, query=None, max_bytes=MILESTONE_MAX_BYTES):
+        """The milestone text cut down to at most about max_bytes.
+
+        Files within the cap are returned whole. Otherwise the preamble and
+        title come first. Then come the sections that best match query
+        (heading terms weigh triple), or without a query the top-level
+        sections in document order. Chosen sections keep document order and
+        the last one may be cut at a line boundary (or, within a single long
+        line, at a character boundary). Omitted second-level
+        headings are listed so the reader knows what else exists.
+        """
+        size = os.path.getsize(path)
+        if size <= max_bytes:
+            with open(path, 'r') as f:
+                text = f.read()
+            tracing.count('bytes_read', len(text))
+            return text
+
+        sections = self.sections(path)
+        ranked = [i for i, s in enumerate(sections) if s[0] <= 1]
+        terms = set(tokenize(query)) if query else set()
+        rest = [i for i in range(len(sections)) if i not in ranked]
+        if terms:
+            def score(i):
+                level, title, _, _, top = sections[i]
+                return 3 * len(terms & set(tokenize(title))) + len(terms & set(top))
+            rest = sorted((i for i in rest if score(i) > 0), key=lambda i: (-score(i), i))
+        else:
+            rest = [i for i in rest if sections[i][0] <= 2]
+        ranked += rest
+
+        chosen = {}
+        remaining = max_bytes
+        for i in ranked:
+            start, end = sections[i][2], sections[i][3]
+            if remaining <= 0:
+                break
+            chosen[i] = min(end - start, remaining)
+            remaining -= end - start
+
+        parts = []
+        with tracing.span('milestone_excerpt', path=path), open(path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            for i in sorted(chosen):
+                start, end = sections[i][2], sections[i][3]
+                piece = buffer[start:start + chosen[i]]
+                tracing.count('bytes_read', len(piece))
+                if chosen[i] < end - start:
+                    cut = piece.rfind(b"\n") + 1
+                    if not cut:
+                        # A single long line: cut at the start of the
+                        # character the cap falls in
+                        cut = len(piece)
+                        while cut and buffer[start + cut] & 0xC0 == 0x80:
+                            cut -= 1
+                    piece = piece[:cut] + b"...\n"
+                parts.append(piece.decode('utf-8', 'replace'))
+
+        omitted = [s[1] for i, s in enumerate(sections) if s[0] == 2 and i not in chosen]
+        if omitted:
+            parts.append(f"\n_Also in this milestone: {'; '.join(omitted[:20])}"
+                         f"{'; ...' if len(omitted) > 20 else ''}_\n")
+        return "".join(parts)
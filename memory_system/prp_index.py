@@ -0,0 +1,221 @@
+import hashlib
+import json
+import os
+import re
+import time
+
+from . import tracing
+from .context_cache import RACY_WINDOW_NS, file_fingerprint
+from .fileio import write_json
+from .milestone_index import scan_sections
+
+INDEX_VERSION = 1
+KEEP_REMOVED = 200
+
+_CHECKBOX = re.compile(rb"^[ \t]*[-*+][ \t]+\[([ xX])\]", re.M)
+_SLUG_JUNK = re.compile(r"[^a-z0-9]+")
+
+
+def discover_prps(project_root):
+    """PRP documents of a project, as sorted paths relative to project_root.
+
+    Covers ``prp.md`` at the root and every Markdown file under ``PRPs/``
+    and ``use-cases/*/PRPs/``. Also returns the directories that were
+    walked; adding or removing a document changes one of their mtimes.
+    """
+    found = []
+    directories = []
+    if os.path.isfile(os.path.join(project_root, "prp.md")):
+        found.append("prp.md")
+
+    roots = ["PRPs"]
+    use_cases = os.path.join(project_root, "use-cases")
+    if os.path.isdir(use_cases):
+        directories.append("use-cases")
+        roots.extend(os.path.join("use-cases", name, "PRPs") for name in sorted(os.listdir(use_cases)))
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(os.path.join(project_root, root)):
+            dirnames.sort()
+            relative = os.path.relpath(dirpath, project_root)
+            directories.append(relative)
+            found.extend(os.path.join(relative, name) for name in filenames if name.endswith(".md"))
+    return sorted(found), directories
+
+
+def _slug(title):
+    return _SLUG_JUNK.sub("-", title.lower()).strip("-") or "section"
+
+
+def parse_requirements(data, path):
+    """Requirement sections of a PRP document, keyed by stable id.
+
+    Every heading starts a requirement. Its id is the document path and
+    the slugs of the heading and its parent headings, such as
+    ``PRPs/auth.md#goal/success-criteria``. Ids stay the same as long as
+    the headings do, whatever changes around them. Text before the first
+    heading is ``<path>#_``. The hash covers the section's own text, not
+    its subsections, so an edit marks only the section it is in.
+    """
+    requirements = {}
+    parents = []
+    for level, title, start, end in scan_sections(data):
+        body = data[start:end]
+        if level == 0:
+            if not body.strip():
+                continue
+            slug = "_"
+        else:
+            del parents[level - 1:]
+            parents.extend([""] * (level - 1 - len(parents)))
+            parents.append(_slug(title))
+            slug = "/".join(p for p in parents if p)
+        requirement_id = f"{path}#{slug}"
+        suffix = 2
+        while requirement_id in requirements:
+            requirement_id = f"{path}#{slug}~{suffix}"
+            suffix += 1
+        checks = _CHECKBOX.findall(body)
+        requirements[requirement_id] = {
+            'title': title,
+            'level': level,
+            'hash': hashlib.sha1(body.replace(b"\r\n", b"\n").rstrip()).hexdigest()[:16],
+            'checked': sum(1 for c in checks if c != b" "),
+            'checkboxes': len(checks),
+        }
+    return requirements
+
+
+class PRPIndex:
+    """Incremental index of the requirement sections in a project's PRPs.
+
+    Stored in ``prp-index.json`` in the memory directory. For each
+    document it keeps the file's fingerprint and hash and, per requirement
+    id, a content hash plus ``changed_ns``, when the requirement last
+    changed. A refresh stats every document but reads only the ones whose
+    fingerprint changed. It re-hashes their sections and moves
+    ``changed_ns`` only for the sections that differ. Requirements that
+    disappear are kept in a short ``removed`` list so they can be
+    reported too.
+    """
+
+    def __init__(self, memory_dir=".claude-memory"):
+        self.path = os.path.join(memory_dir, "prp-index.json")
+        self._data = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            try:
+                with open(self.path, 'r') as f:
+                    self._data = json.load(f)
+                if self._data.get('version') != INDEX_VERSION:
+                    self._data = None
+            except (OSError, ValueError):
+                self._data = None
+            if self._data is None:
+                self._data = {'version': INDEX_VERSION, 'project_root': None,
+                              'files': {}, 'removed': []}
+        return self._data
+
+    def _save(self):
+        try:
+            write_json(self.path, self.data)
+        except OSError:
+            # A read-only memory directory re-reads changed documents next time
+            pass
+
+    def refresh(self, project_root, documents=None):
+        """Bring the index up to date with the project's PRPs.
+
+        documents, if given, is the list discover_prps already returned.
+        Returns the number of documents that were read.
+        """
+        data = self.data
+        project_root = os.path.abspath(project_root)
+        if data['project_root'] != project_root:
+            data.update(project_root=project_root, files={}, removed=[])
+
+        now_ns = time.time_ns()
+        paths = documents if documents is not None else discover_prps(project_root)[0]
+        files = data['files']
+        removed = data['removed']
+        # The first build is the baseline, not a batch of new requirements
+        baseline = not files
+        parsed = 0
+        dirty = False
+        with tracing.span('prp_index', documents=len(paths)) as span:
+            for path in paths:
+                fingerprint = list(file_fingerprint(os.path.join(project_root, path)) or [])
+                if not fingerprint:
+                    continue
+                entry = files.get(path)
+                # A file modified within the racy window of the last read may
+                # have changed again without its fingerprint showing it
+                if (entry and entry['fingerprint'] == fingerprint
+                        and entry['indexed_ns'] - fingerprint[0] > RACY_WINDOW_NS):
+                    continue
+                with open(os.path.join(project_root, path), 'rb') as f:
+                    content = f.read()
+                tracing.count('bytes_read', len(content))
+                parsed += 1
+                dirty = True
+                digest = hashlib.sha1(content).hexdigest()
+                if entry and entry['hash'] == digest:
+                    entry.update(fingerprint=fingerprint, indexed_ns=now_ns)
+                    continue
+
+                changed_ns = 0 if baseline else fingerprint[0]
+                old = entry['requirements'] if entry else {}
+                requirements = parse_requirements(content, path)
+                for requirement_id, requirement in requirements.items():
+                    previous = old.get(requirement_id)
+                    if previous is None:
+                        requirement.update(changed_ns=changed_ns, change='added')
+                    elif previous['hash'] != requirement['hash']:
+                        requirement.update(changed_ns=changed_ns, change='modified')
+                    else:
+                        requirement.update(changed_ns=previous['changed_ns'], change=previous['change'])
+                for requirement_id, requirement in old.items():
+                    if requirement_id not in requirements:
+                        removed.append({'id': requirement_id, 'title': requirement['title'],
+                                        'changed_ns': changed_ns})
+                files[path] = {'fingerprint': fingerprint, 'indexed_ns': now_ns,
+                               'hash': digest, 'requirements': requirements}
+
+            for path in set(files) - set(paths):
+                dirty = True
+                removed.extend({'id': requirement_id, 'title': requirement['title'],
+                                'changed_ns': now_ns}
+                               for requirement_id, requirement in files.pop(path)['requirements'].items())
+            del removed[:-KEEP_REMOVED]
+            span.set(parsed=parsed)
+        if dirty:
+            self._save()
+        return parsed
+
+    def changed_since(self, since_ns):
+        """Requirements added, modified or removed after since_ns, newest first.
+
+        Each is a dict with id, title, change ('added', 'modified' or
+        'removed') and changed_ns.
+        """
+        changes = [dict(id=requirement_id, title=requirement['title'],
+                        change=requirement['change'], changed_ns=requirement['changed_ns'])
+                   for entry in self.data['files'].values()
+                   for requirement_id, requirement in entry['requirements'].items()
+                   if requirement['changed_ns'] > since_ns]
+        changes.extend(dict(removed, change='removed') for removed in self.data['removed']
+                       if removed['changed_ns'] > since_ns)
+        changes.sort(key=lambda c: (-c['changed_ns'], c['id']))
+        return changes
+
+    def totals(self):
+        """Document, requirement and checkbox counts across the index"""
+        files = self.data['files'].values()
+        requirements = [r for entry in files for r in entry['requirements'].values()]
+        return {
+            'documents': len(self.data['files']),
+            'requirements': sum(1 for r in requirements if r['level'] > 0),
+            'checked': sum(r['checked'] for r in requirements),
+            'checkboxes': sum(r['checkboxes'] for r in requirements),
+        }
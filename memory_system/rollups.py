@@ -0,0 +1,192 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+from .fileio import write_json
+from .timestamps import as_datetime
+
+SPRINT_DAYS = 14
+MICRO_CHANGES = 20
+MESO_CHANGES = 50
+TOP_FILES = 10
+
+
+def _add_counts(target, counts, sign=1):
+    for key, value in counts.items():
+        total = target.get(key, 0) + sign * value
+        if total > 0:
+            target[key] = total
+        else:
+            target.pop(key, None)
+
+
+def _top(counts, limit=TOP_FILES):
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+
+class SummaryRollups:
+    """Micro, meso and macro rollups of the session summaries, kept on write.
+
+    Stored as ``rollups.json`` in the memory directory:
+
+    - ``recent``: the latest changes across sessions, newest first, capped
+      at MESO_CHANGES. The first MICRO_CHANGES of them are the micro view.
+    - ``daily``: per-day session, change and decision counts and file touch
+      counts. The meso (sprint) view sums the last SPRINT_DAYS of them.
+    - ``macro``: the same counts over the whole project, plus the first and
+      last session times.
+
+    Every aggregate can be merged: counts add up, and the recent list is
+    re-capped. Rewriting a session subtracts its previous version first.
+    ``rebuild`` recomputes everything from the full session history.
+    """
+
+    def __init__(self, memory_dir=".claude-memory"):
+        self.path = os.path.join(memory_dir, "rollups.json")
+        self._data = None
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    @staticmethod
+    def _empty():
+        return {
+            'recent': [],
+            'daily': {},
+            'macro': {'sessions': 0, 'changes': 0, 'decisions': 0, 'files': {},
+                      'first_session': None, 'last_session': None},
+        }
+
+    @property
+    def data(self):
+        if self._data is None:
+            try:
+                with open(self.path, 'r') as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError):
+                self._data = self._empty()
+        return self._data
+
+    def _apply(self, data, summary, sign):
+        """Add (sign 1) or take away (sign -1) one session's contribution"""
+        when = as_datetime(summary['timestamp'])
+        changes = summary.get('changes') or []
+        counts = {
+            'sessions': 1,
+            'changes': len(changes),
+            'decisions': len(summary.get('decisions') or []),
+        }
+        files = {}
+        for change in changes:
+            if change.get('file'):
+                files[change['file']] = files.get(change['file'], 0) + 1
+
+        day = data['daily'].get(when.date().isoformat())
+        if day is None and sign > 0:
+            day = data['daily'][when.date().isoformat()] = {
+                'sessions': 0, 'changes': 0, 'decisions': 0, 'files': {}}
+        # Days older than the sprint window are pruned; their sessions then
+        # only count towards the macro totals
+        for target in ([day] if day is not None else []) + [data['macro']]:
+            for key, value in counts.items():
+                target[key] += sign * value
+            _add_counts(target['files'], files, sign)
+
+        session_id = str(summary['session_id'])
+        recent = [c for c in data['recent'] if c['session_id'] != session_id]
+        if sign > 0:
+            recent.extend({'session_id': session_id, 'timestamp': when.isoformat(),
+                           'file': c.get('file'), 'change': c.get('change')} for c in changes)
+            macro = data['macro']
+            stamp = when.isoformat()
+            if macro['first_session'] is None or stamp < macro['first_session']:
+                macro['first_session'] = stamp
+            if macro['last_session'] is None or stamp > macro['last_session']:
+                macro['last_session'] = stamp
+        recent.sort(key=lambda c: c['timestamp'], reverse=True)
+        data['recent'] = recent[:MESO_CHANGES]
+
+    def _prune(self, data, now=None):
+        cutoff = ((now or datetime.now()) - timedelta(days=SPRINT_DAYS)).date().isoformat()
+        for day in [d for d in data['daily'] if d <= cutoff]:
+            del data['daily'][day]
+
+    def _save(self, data):
+        write_json(self.path, data)
+        self._data = data
+
+    def record(self, summary, previous=None):
+        """Fold a newly written session summary in, replacing previous if it was rewritten"""
+        self.record_many([(summary, previous)])
+
+    def record_many(self, pairs):
+        """record for a batch of (summary, previous) pairs, saving once"""
+        data = self.data
+        for summary, previous in pairs:
+            if previous is not None and previous.get('timestamp'):
+                self._apply(data, previous, -1)
+            self._apply(data, summary, 1)
+        self._prune(data)
+        self._save(data)
+
+    def rebuild(self, summaries):
+        """Recompute every rollup from scratch"""
+        data = self._empty()
+        for summary in summaries:
+            if summary and summary.get('timestamp'):
+                self._apply(data, summary, 1)
+        self._prune(data)
+        self._save(data)
+        return data
+
+    def micro(self):
+        """The most recent changes across sessions, newest first"""
+        return self.data['recent'][:MICRO_CHANGES]
+
+    def meso(self, now=None):
+        """Totals over the last SPRINT_DAYS days and the changes made in them"""
+        today = (now or datetime.now()).date()
+        totals = {'sessions': 0, 'changes': 0, 'decisions': 0, 'files': {}}
+        for offset in range(SPRINT_DAYS):
+            day = self.data['daily'].get((today - timedelta(days=offset)).isoformat())
+            if day is None:
+                continue
+            for key in ('sessions', 'changes', 'decisions'):
+                totals[key] += day[key]
+            _add_counts(totals['files'], day['files'])
+        cutoff = (today - timedelta(days=SPRINT_DAYS - 1)).isoformat()
+        totals['recent'] = [c for c in self.data['recent'] if c['timestamp'] >= cutoff]
+        return totals
+
+    def macro(self):
+        """Totals over the whole project"""
+        return self.data['macro']
+
+    def view(self, now=None):
+        """Compact micro/meso/macro view for the context prompt"""
+        meso = self.meso(now)
+        del meso['recent']
+        macro = self.macro()
+        return {
+            'micro': self.micro(),
+            'meso': dict(meso, files=_top(meso['files'])),
+            'macro': dict(macro, files=_top(macro['files'])),
+        }
+
+
+def record_session(memory_dir, summary, previous=None, all_sessions=None):
+    """Fold a session summary just written into the rollups.
+
+    all_sessions, a callable returning every session summary, is used
+    instead when there is no rollups.json yet.
+    """
+    record_sessions(memory_dir, [(summary, previous)], all_sessions)
+
+
+def record_sessions(memory_dir, pairs, all_sessions=None):
+    """record_session for a batch of (summary, previous) pairs"""
+    rollups = SummaryRollups(memory_dir)
+    if rollups.exists() or all_sessions is None:
+        rollups.record_many(pairs)
+    else:
+        rollups.rebuild(all_sessions())
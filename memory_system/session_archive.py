@@ -0,0 +1,158 @@
+import heapq
+import json
+import os
+import struct
+import time
+import zlib
+
+import yaml
+
+from . import tracing
+from .fileio import atomic_write, write_json
+from .summary_index import summary_kind
+from .yaml_cache import SafeLoader
+
+SEGMENT_MAGIC = b"CMSPACK1"
+# Trailer at the end of a segment: offset and length of its table, then magic
+SEGMENT_TRAILER = struct.Struct("<QQ8s")
+
+
+def _session_id(name):
+    return name[len("session-"):-len(".yaml")]
+
+
+class SessionArchive:
+    """Packed, compressed segments of old session summaries.
+
+    Compaction moves session files into ``archive/sessions-NNNNNN.pack``.
+    Each session is stored as its original YAML, zlib-compressed on its
+    own. The segment ends with a table of session id to (offset, length,
+    mtime_ns) and a fixed-size trailer pointing at that table, so every
+    segment is self-describing. ``archive/sessions-index.json`` merges
+    the tables of all segments; reading one session is one seek and one
+    read in its segment.
+    """
+
+    def __init__(self, memory_dir=".claude-memory"):
+        self.memory_dir = memory_dir
+        self.archive_dir = os.path.join(memory_dir, "archive")
+        self.index_path = os.path.join(self.archive_dir, "sessions-index.json")
+        self._index = None
+
+    def exists(self):
+        return os.path.exists(self.index_path)
+
+    @property
+    def index(self):
+        """session id -> [segment name, offset, length, mtime_ns]"""
+        if self._index is None:
+            try:
+                with open(self.index_path, 'r') as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def __contains__(self, session_id):
+        return str(session_id) in self.index
+
+    def _save_index(self, index):
+        write_json(self.index_path, index, durable=True)
+        self._index = index
+
+    def read_raw(self, session_id):
+        """The archived YAML text of a session, or None"""
+        entry = self.index.get(str(session_id))
+        if entry is None:
+            return None
+        segment, offset, length, _ = entry
+        with open(os.path.join(self.archive_dir, segment), 'rb') as f:
+            f.seek(offset)
+            tracing.count('bytes_read', length)
+            return zlib.decompress(f.read(length)).decode('utf-8')
+
+    def load(self, session_id):
+        """An archived session summary, or None"""
+        text = self.read_raw(session_id)
+        return yaml.load(text, Loader=SafeLoader) if text is not None else None
+
+    def latest(self, count):
+        """Ids of the count most recently modified archived sessions, newest first"""
+        candidates = ((entry[3], session_id) for session_id, entry in self.index.items())
+        return [session_id for _, session_id in heapq.nlargest(count, candidates)]
+
+    def _next_segment_name(self):
+        numbers = [int(name[len("sessions-"):-len(".pack")])
+                   for name in os.listdir(self.archive_dir)
+                   if name.startswith("sessions-") and name.endswith(".pack")]
+        return f"sessions-{max(numbers, default=0) + 1:06d}.pack"
+
+    def _write_segment(self, paths):
+        """Pack session files into a new segment; returns its name and table"""
+        name = self._next_segment_name()
+        path = os.path.join(self.archive_dir, name)
+        table = {}
+        with atomic_write(path, 'wb', durable=True) as f:
+            f.write(SEGMENT_MAGIC)
+            for source in paths:
+                with open(source, 'rb') as src:
+                    data = zlib.compress(src.read(), 6)
+                table[_session_id(os.path.basename(source))] = [
+                    f.tell(), len(data), os.stat(source).st_mtime_ns]
+                f.write(data)
+            table_bytes = json.dumps(table).encode('utf-8')
+            table_offset = f.tell()
+            f.write(table_bytes)
+            f.write(SEGMENT_TRAILER.pack(table_offset, len(table_bytes), SEGMENT_MAGIC))
+        return name, table
+
+    def compact(self, older_than_days=90, source_dirs=None, now=None):
+        """Pack session files last modified more than older_than_days ago.
+
+        Sessions are taken from the summaries directory and the cold tier.
+        The segment and the merged index are written and synced before any
+        source file is removed, so an interrupted compaction leaves every
+        session readable. Returns the number of sessions packed.
+        """
+        if source_dirs is None:
+            source_dirs = [os.path.join(self.memory_dir, "summaries"),
+                           os.path.join(self.archive_dir, "cold")]
+        cutoff_ns = int(((now or time.time()) - older_than_days * 86400) * 1e9)
+
+        paths = []
+        for directory in source_dirs:
+            if not os.path.isdir(directory):
+                continue
+            with os.scandir(directory) as it:
+                paths.extend(e.path for e in it
+                             if summary_kind(e.name) == 'session'
+                             and e.stat().st_mtime_ns < cutoff_ns)
+        if not paths:
+            return 0
+
+        os.makedirs(self.archive_dir, exist_ok=True)
+        name, table = self._write_segment(paths)
+        index = dict(self.index)
+        for session_id, (offset, length, mtime_ns) in table.items():
+            index[session_id] = [name, offset, length, mtime_ns]
+        self._save_index(index)
+        for path in paths:
+            os.remove(path)
+        return len(paths)
+
+    def rebuild_index(self):
+        """Recreate the merged index from the tables stored in each segment"""
+        index = {}
+        names = sorted(name for name in os.listdir(self.archive_dir)
+                       if name.startswith("sessions-") and name.endswith(".pack"))
+        for name in names:
+            with open(os.path.join(self.archive_dir, name), 'rb') as f:
+                f.seek(-SEGMENT_TRAILER.size, os.SEEK_END)
+                table_offset, table_length, magic = SEGMENT_TRAILER.unpack(f.read(SEGMENT_TRAILER.size))
+                if magic != SEGMENT_MAGIC:
+                    raise ValueError(f"not a session archive segment: {name}")
+                f.seek(table_offset)
+                for session_id, entry in json.loads(f.read(table_length)).items():
+                    index[session_id] = [name] + entry
+        self._save_index(index)
+        return len(index)
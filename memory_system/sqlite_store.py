@@ -0,0 +1,290 @@
+import json
+import os
+import re
+import sqlite3
+
+from . import tracing
+from .decision_log import DecisionLog, rebuild_derived, update_derived
+from .summary_index import SummaryManifest, summary_kind
+from .timestamps import to_epoch
+from .yaml_cache import load_yaml
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decisions (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    epoch REAL NOT NULL,
+    drift_type TEXT,
+    context TEXT,
+    session_id TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS decisions_epoch ON decisions (epoch);
+CREATE INDEX IF NOT EXISTS decisions_drift_type ON decisions (drift_type, epoch);
+CREATE INDEX IF NOT EXISTS decisions_context ON decisions (context, epoch);
+CREATE INDEX IF NOT EXISTS decisions_session_id ON decisions (session_id);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL UNIQUE,
+    timestamp TEXT,
+    epoch REAL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_epoch ON sessions (epoch);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS memory_fts USING fts5(
+    context, rationale, changes, kind UNINDEXED
+);
+"""
+
+
+def _decision_fts_rowid(decision_id):
+    # Decisions and sessions share one FTS table; even rowids are decisions
+    return decision_id * 2
+
+
+def _session_fts_rowid(session_row):
+    return session_row * 2 + 1
+
+
+def _fts_query(query):
+    """FTS5 MATCH expression for free text: each word quoted, any of them matching"""
+    return " OR ".join(f'"{term}"' for term in re.findall(r"\w+", query))
+
+
+class SQLiteStore:
+    """SQLite backend for decisions and session summaries.
+
+    Decisions and sessions are kept as JSON documents with indexed columns
+    for timestamp, drift_type, context and session_id, plus an FTS5 table
+    over context, rationale and changes. It offers the same decision
+    interface as DecisionLog (exists, append, since, all), so it can stand
+    in for the file layout, and the same session methods (upsert_sessions,
+    sessions_by_id, session_count, ...). Appends take the same
+    ``decisions.lock`` as DecisionLog, so the derived files stay consistent
+    across writers.
+    """
+
+    def __init__(self, memory_dir=".claude-memory"):
+        self.memory_dir = memory_dir
+        self.db_path = os.path.join(memory_dir, "memory.db")
+        self._conn = None
+        self._log = DecisionLog(memory_dir)
+        self._manifest = None
+
+    @property
+    def watch_paths(self):
+        """Files whose fingerprint changes whenever the stored data changes"""
+        return [self.db_path]
+
+    @property
+    def session_watch_paths(self):
+        return [self.db_path]
+
+    @property
+    def manifest(self):
+        """Manifest of the summaries directory, which still holds the milestones"""
+        if self._manifest is None:
+            self._manifest = SummaryManifest(self.memory_dir)
+        return self._manifest
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            os.makedirs(self.memory_dir, exist_ok=True)
+            # Callers that share a store across threads (the context daemon)
+            # serialize access themselves
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def exists(self):
+        return os.path.exists(self.db_path)
+
+    def _insert_decision(self, decision):
+        cursor = self.conn.execute(
+            "INSERT INTO decisions (timestamp, epoch, drift_type, context, session_id, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (str(decision['timestamp']), to_epoch(decision['timestamp']),
+             decision.get('drift_type'), decision.get('context'), decision.get('session_id'),
+             json.dumps(decision, default=str, ensure_ascii=False)))
+        self.conn.execute(
+            "INSERT INTO memory_fts (rowid, context, rationale, changes, kind) VALUES (?, ?, ?, '', 'decision')",
+            (_decision_fts_rowid(cursor.lastrowid), decision.get('context') or '',
+             decision.get('rationale') or ''))
+
+    def _upsert_session(self, summary):
+        timestamp = summary.get('timestamp')
+        row = self.conn.execute(
+            "INSERT INTO sessions (session_id, timestamp, epoch, data) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (session_id) DO UPDATE SET "
+            "timestamp = excluded.timestamp, epoch = excluded.epoch, data = excluded.data "
+            "RETURNING id",
+            (str(summary['session_id']), str(timestamp) if timestamp else None,
+             to_epoch(timestamp) if timestamp else None,
+             json.dumps(summary, default=str, ensure_ascii=False))).fetchone()[0]
+
+        changes = "\n".join(
+            c.get('change', '') if isinstance(c, dict) else str(c)
+            for c in summary.get('changes') or [])
+        decisions = "\n".join(str(d) for d in summary.get('decisions') or [])
+        fts_rowid = _session_fts_rowid(row)
+        self.conn.execute("DELETE FROM memory_fts WHERE rowid = ?", (fts_rowid,))
+        self.conn.execute(
+            "INSERT INTO memory_fts (rowid, context, rationale, changes, kind) VALUES (?, ?, '', ?, 'session')",
+            (fts_rowid, decisions, changes))
+
+    def locked(self, exclusive=False):
+        """Hold ``decisions.lock``, shared with DecisionLog"""
+        return self._log.locked(exclusive)
+
+    def upsert_sessions(self, summaries, times=None):
+        """Write session summaries in one transaction, replacing any earlier version.
+
+        times is accepted for symmetry with DecisionLog; sessions are
+        ordered by their own timestamp here.
+        """
+        with self.conn:
+            for summary in summaries:
+                self._upsert_session(summary)
+
+    def append(self, decision):
+        # The derived files are read, updated and rewritten; without the lock
+        # concurrent writers would lose each other's updates
+        with self.locked(exclusive=True):
+            with self.conn:
+                self._insert_decision(decision)
+            update_derived(self, decision)
+        return decision
+
+    def since(self, cutoff):
+        """Decisions with a timestamp after cutoff, newest first"""
+        with tracing.span('sqlite_since'):
+            rows = self.conn.execute(
+                "SELECT data FROM decisions WHERE epoch > ? ORDER BY epoch DESC, id DESC",
+                (to_epoch(cutoff),))
+            decisions = [json.loads(data) for (data,) in rows]
+        tracing.count('entries_parsed', len(decisions))
+        return decisions
+
+    def position(self):
+        """Row id of the newest decision; a marker for appended_since"""
+        return self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM decisions").fetchone()[0]
+
+    def appended_since(self, position):
+        """Decisions inserted after position() returned position, newest first"""
+        rows = self.conn.execute(
+            "SELECT data FROM decisions WHERE id > ? ORDER BY id DESC", (position,))
+        return [json.loads(data) for (data,) in rows]
+
+    def sessions_since(self, epoch):
+        """Sessions saved after epoch, newest first"""
+        rows = self.conn.execute(
+            "SELECT data FROM sessions WHERE epoch > ? ORDER BY epoch DESC, id DESC", (epoch,))
+        return [json.loads(data) for (data,) in rows]
+
+    def all(self):
+        """Every decision, newest first"""
+        rows = self.conn.execute("SELECT data FROM decisions ORDER BY epoch DESC, id DESC")
+        return [json.loads(data) for (data,) in rows]
+
+    def session_times(self):
+        """(session_id, epoch) for every stored session"""
+        return self.conn.execute("SELECT session_id, epoch FROM sessions").fetchall()
+
+    def sessions_by_id(self, session_ids):
+        """Session summaries for the given ids, in the order given"""
+        if not session_ids:
+            return []
+        placeholders = ",".join("?" * len(session_ids))
+        rows = dict(self.conn.execute(
+            f"SELECT session_id, data FROM sessions WHERE session_id IN ({placeholders})",
+            [str(s) for s in session_ids]))
+        return [json.loads(rows[str(s)]) for s in session_ids if str(s) in rows]
+
+    def all_sessions(self):
+        """Every stored session summary"""
+        if not self.exists():
+            return []
+        return [json.loads(data) for (data,) in self.conn.execute("SELECT data FROM sessions")]
+
+    def recent_session_ids(self, count=5):
+        """Ids of the most recent sessions, newest first"""
+        rows = self.conn.execute(
+            "SELECT session_id FROM sessions ORDER BY epoch DESC, id DESC LIMIT ?", (count,))
+        return [session_id for (session_id,) in rows]
+
+    def session_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def last_session_ns(self):
+        """When the newest session was saved, or 0 if there is none"""
+        epoch = self.conn.execute("SELECT MAX(epoch) FROM sessions").fetchone()[0]
+        return int(epoch * 1e9) if epoch is not None else 0
+
+    def search(self, query, limit=20):
+        """Full-text search over decisions and sessions, best matches first.
+
+        query is free text; punctuation and FTS5 operators in it are
+        treated as word separators.
+        """
+        match = _fts_query(query)
+        if not match or not self.exists():
+            return []
+        rows = self.conn.execute(
+            "SELECT f.kind, COALESCE(d.data, s.data) FROM memory_fts f "
+            "LEFT JOIN decisions d ON f.kind = 'decision' AND d.id = f.rowid / 2 "
+            "LEFT JOIN sessions s ON f.kind = 'session' AND s.id = (f.rowid - 1) / 2 "
+            "WHERE memory_fts MATCH ? ORDER BY rank LIMIT ?",
+            (match, limit))
+        return [{'kind': kind, 'item': json.loads(data)} for kind, data in rows]
+
+    def import_memory_dir(self):
+        """Load decisions and session summaries from the file-based layout.
+
+        Returns (decision count, session count). Decisions already in the
+        database are left alone, so the import is meant to run once on an
+        empty store.
+        """
+        log = DecisionLog(self.memory_dir)
+        if log.exists():
+            decisions = log.all()
+        elif os.path.exists(log.legacy_path):
+            decisions = (load_yaml(log.legacy_path) or {}).get('decisions') or []
+        else:
+            decisions = []
+
+        summaries_dir = os.path.join(self.memory_dir, "summaries")
+        session_paths = []
+        if os.path.isdir(summaries_dir):
+            with os.scandir(summaries_dir) as it:
+                session_paths = [e.path for e in it if summary_kind(e.name) == 'session']
+
+        with self.conn:
+            for decision in reversed(decisions):
+                if decision.get('timestamp'):
+                    self._insert_decision(decision)
+            for path in session_paths:
+                summary = load_yaml(path, use_sidecar=False)
+                if summary and summary.get('session_id') is not None:
+                    self._upsert_session(summary)
+        rebuild_derived(self.memory_dir, decisions)
+        return len(decisions), len(session_paths)
+
+
+def open_decision_store(memory_dir=".claude-memory", backend=None):
+    """Decision store for a memory directory.
+
+    backend is 'sqlite' or 'files'; by default the SQLite store is used
+    once a memory.db exists and the append-only log otherwise.
+    """
+    store = SQLiteStore(memory_dir)
+    if backend == 'sqlite' or (backend is None and store.exists()):
+        return store
+    return DecisionLog(memory_dir)
@@ -1,26 +1,82 @@
 import os
 import datetime
-import yaml
+
+from .curation import MemoryHeat, record_heat
+from .extractive import summarize_session
+from .rollups import record_sessions
+from .sqlite_store import open_decision_store
+from .yaml_cache import load_yaml
 
 class ProgressiveSummarizer:
-    def __init__(self, memory_dir=".claude-memory"):
+    def __init__(self, memory_dir=".claude-memory", backend=None):
         self.memory_dir = memory_dir
         self.summaries_dir = os.path.join(memory_dir, "summaries")
+        self.store = open_decision_store(memory_dir, backend)
         
     def create_session_summary(self, session_id, changes, decisions):
-        """Create a summary of a coding session"""
-        summary = {
-            'session_id': session_id,
-            'timestamp': datetime.datetime.now().isoformat(),
-            'changes': changes,
-            'decisions': decisions,
-            'files_modified': list(set([c['file'] for c in changes]))
-        }
-        
-        filename = f"session-{session_id}.yaml"
-        filepath = os.path.join(self.summaries_dir, filename)
-        
-        with open(filepath, 'w') as f:
-            yaml.dump(summary, f)
-        
-        return summary
+        """Create a summary of a coding session.
+
+        The changes and decisions are also compressed into a few
+        representative ``highlights`` sentences (TextRank, no model call).
+        The session is folded into the micro/meso/macro rollups, replacing
+        its earlier version if the session is being rewritten.
+        """
+        return self.create_session_summaries(
+            [{'session_id': session_id, 'changes': changes, 'decisions': decisions}])[0]
+
+    def create_session_summaries(self, sessions):
+        """Write a batch of session summaries, as create_session_summary does for one.
+
+        Each session is a dict with session_id, changes and decisions. An
+        optional ``timestamp`` (datetime) backdates the session: it is
+        stored as the summary's time, the summary file's mtime and its heat
+        event time, so imported history sorts where it happened. Any other
+        keys are kept in the summary. The SQLite rows go in one
+        transaction, and the rollups and heat table are updated once for
+        the whole batch.
+        """
+        summaries = []
+        pairs = []
+        events = []
+        written = {}
+        # Earlier versions of the batch's sessions, read in one go
+        stored = {str(s.get('session_id')): s for s in self.store.sessions_by_id(
+            list(dict.fromkeys(str(s['session_id']) for s in sessions))) if s}
+        for session in sessions:
+            changes = session['changes']
+            decisions = session['decisions']
+            when = session.get('timestamp')
+            session_id = session['session_id']
+            summary = {
+                'session_id': session_id,
+                'timestamp': (when or datetime.datetime.now()).isoformat(),
+                'changes': changes,
+                'decisions': decisions,
+                'files_modified': list(set([c['file'] for c in changes])),
+                'highlights': summarize_session(changes, decisions),
+            }
+            summary.update((key, value) for key, value in session.items() if key not in summary)
+            if session_id in written:
+                previous = written[session_id]
+            else:
+                previous = self._load_previous(session_id, stored)
+            event = 'modify' if previous is not None else 'create'
+            written[session_id] = summary
+            summaries.append(summary)
+            pairs.append((summary, previous))
+            events.append(('session', str(session_id), event, when.timestamp() if when else None))
+
+        self.store.upsert_sessions(summaries, [when for _, _, _, when in events])
+        record_sessions(self.memory_dir, pairs, self.store.all_sessions)
+        record_heat(self.memory_dir, events, self.store.all if self.store.exists() else None)
+        return summaries
+
+    def _load_previous(self, session_id, stored):
+        """The stored summary a rewrite of session_id replaces, or None.
+
+        stored holds the live and packed summaries already read for the batch.
+        """
+        if str(session_id) in stored:
+            return stored[str(session_id)]
+        path = MemoryHeat(self.memory_dir).cold_session_path(session_id)
+        return (load_yaml(path, use_sidecar=False) or {}) if path else None
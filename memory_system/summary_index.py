@@ -0,0 +1,183 @@
+import heapq
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import tracing
+from .context_cache import RACY_WINDOW_NS
+from .fileio import write_json
+from .yaml_cache import load_yaml
+
+
+def summary_kind(name):
+    """Classify a summaries directory entry as 'session', 'milestone' or None"""
+    if name.startswith("session-") and name.endswith(".yaml"):
+        return 'session'
+    if name.startswith("milestone-") and name.endswith(".md"):
+        return 'milestone'
+    return None
+
+
+def _read_milestone_header(path):
+    """The milestone's title, from its first line"""
+    try:
+        with open(path, 'r') as f:
+            first_line = f.readline().strip()
+    except (OSError, UnicodeDecodeError):
+        return {}
+    return {'title': first_line.lstrip('#').strip()}
+
+
+class SummaryManifest:
+    """Persistent manifest of session and milestone files in the summaries directory.
+
+    Entries record name, kind, mtime and size, plus the title of each
+    milestone. Each refresh walks the directory once with ``os.scandir``.
+    Session files are never opened, and a milestone's first line is only
+    re-read when its mtime or size changed since the last refresh.
+
+    The walk is skipped while the directory itself is unchanged: session
+    files are written by replacing them, which updates the directory, so
+    only the milestones, which may be edited in place, are stat'ed then.
+
+    A refresh replaces ``entries`` rather than changing it, so a thread
+    reading the manifest while another refreshes it sees a consistent copy.
+    """
+
+    def __init__(self, memory_dir=".claude-memory"):
+        self.summaries_dir = os.path.join(memory_dir, "summaries")
+        self.path = os.path.join(memory_dir, "cache", "summaries-manifest.json")
+        self.entries = {}
+        # The directory's [mtime_ns, inode] and when it was last walked
+        self.directory = None
+        self.checked_ns = 0
+        self._refresh_lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self.entries = data.get('entries', {})
+            self.directory = data.get('directory')
+            self.checked_ns = data.get('checked_ns', 0)
+        except (OSError, ValueError, AttributeError):
+            self.entries = {}
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            write_json(self.path, {'entries': self.entries, 'directory': self.directory,
+                                   'checked_ns': self.checked_ns})
+        except OSError:
+            # A read-only memory directory rescans its summaries next time
+            pass
+
+    def refresh(self):
+        """Bring the manifest in line with the directory, saving it if anything changed"""
+        with self._refresh_lock:
+            return self._refresh()
+
+    def _refresh(self):
+        tracing.count('files_stat')
+        try:
+            st = os.stat(self.summaries_dir)
+        except OSError:
+            return False
+        directory = [st.st_mtime_ns, st.st_ino]
+        # A directory modified just before the last walk may change again
+        # without its mtime moving, so it is walked until it settles
+        if directory == self.directory and st.st_mtime_ns < self.checked_ns - RACY_WINDOW_NS:
+            return self._refresh_milestones()
+
+        self.directory = directory
+        self.checked_ns = time.time_ns()
+        entries = dict(self.entries)
+        changed = False
+        seen = set()
+        with tracing.span('manifest_refresh') as span, os.scandir(self.summaries_dir) as it:
+            for entry in it:
+                kind = summary_kind(entry.name)
+                if kind is None:
+                    continue
+                seen.add(entry.name)
+                st = entry.stat()
+                known = entries.get(entry.name)
+                if known and known['mtime_ns'] == st.st_mtime_ns and known['size'] == st.st_size:
+                    continue
+                entries[entry.name] = {
+                    'kind': kind,
+                    'mtime_ns': st.st_mtime_ns,
+                    'size': st.st_size,
+                }
+                if kind == 'milestone':
+                    entries[entry.name]['header'] = _read_milestone_header(entry.path)
+                    tracing.count('entries_parsed')
+                changed = True
+            tracing.count('files_stat', len(seen))
+            span.set(entries=len(seen))
+
+        for name in set(entries) - seen:
+            del entries[name]
+            changed = True
+
+        self.entries = entries
+        # Saved even when no entry changed, to record the directory walked
+        self.save()
+        return changed
+
+    def _refresh_milestones(self):
+        """Re-stat the milestones, the one kind of file edited in place"""
+        entries = None
+        for name, meta in self.entries.items():
+            if meta['kind'] != 'milestone':
+                continue
+            path = os.path.join(self.summaries_dir, name)
+            tracing.count('files_stat')
+            try:
+                st = os.stat(path)
+            except OSError:
+                st = None
+            if st is not None and meta['mtime_ns'] == st.st_mtime_ns and meta['size'] == st.st_size:
+                continue
+            if entries is None:
+                entries = dict(self.entries)
+            if st is None:
+                del entries[name]
+                continue
+            entries[name] = {
+                'kind': 'milestone',
+                'mtime_ns': st.st_mtime_ns,
+                'size': st.st_size,
+                'header': _read_milestone_header(path),
+            }
+            tracing.count('entries_parsed')
+        if entries is None:
+            return False
+        self.entries = entries
+        self.save()
+        return True
+
+    def latest(self, kind, count):
+        """Paths of the count most recently modified files of a kind, newest first"""
+        candidates = ((meta['mtime_ns'], name) for name, meta in self.entries.items()
+                      if meta['kind'] == kind)
+        return [os.path.join(self.summaries_dir, name)
+                for _, name in heapq.nlargest(count, candidates)]
+
+
+def load_summaries(paths, max_workers=8):
+    """Parse several session summaries concurrently, preserving order"""
+    def load(path):
+        # Session files are small and numerous; a sidecar per file would
+        # double inode use for little gain
+        return load_yaml(path, use_sidecar=False)
+
+    tracing.count('entries_parsed', len(paths))
+    with tracing.span('load_summaries', count=len(paths)):
+        if len(paths) <= 1:
+            return [load(path) for path in paths]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as pool:
+            return list(pool.map(load, paths))
@@ -0,0 +1,11 @@
+from datetime import datetime
+
+
+def as_datetime(value):
+    """A timestamp as a datetime, whether stored as one or as an ISO string"""
+    return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+
+
+def to_epoch(value):
+    """Convert an ISO string or datetime timestamp to epoch seconds"""
+    return as_datetime(value).timestamp()
@@ -0,0 +1,150 @@
+import atexit
+import json
+import os
+import threading
+import time
+
+TRACE_ENV = "CLAUDE_MEMORY_TRACE"
+TRACE_FORMAT_ENV = "CLAUDE_MEMORY_TRACE_FORMAT"
+
+_tracer = None
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'args', 'start_ns')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end_ns = time.perf_counter_ns()
+        self.tracer.events.append(
+            (self.name, self.start_ns, end_ns - self.start_ns, threading.get_ident(), self.args))
+        return False
+
+    def set(self, **args):
+        """Attach more arguments to the span, e.g. a result size known only at the end"""
+        self.args.update(args)
+
+
+class Tracer:
+    """Collected spans and counters for one traced run.
+
+    Spans are (name, start, duration, thread, args) tuples on a list,
+    counters a dict of totals. A list append is atomic under the GIL, so
+    spans take no lock; a counter's read-add-store is not, so counters
+    are updated under a lock.
+    """
+
+    def __init__(self):
+        self.origin_ns = time.perf_counter_ns()
+        self.events = []
+        self.counters = {}
+        self.counters_lock = threading.Lock()
+
+    def count(self, name, value=1):
+        with self.counters_lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def to_json(self):
+        """Spans, per-name totals and counters as plain data"""
+        totals = {}
+        spans = []
+        for name, start_ns, dur_ns, tid, args in self.events:
+            total = totals.setdefault(name, {'count': 0, 'total_ms': 0.0})
+            total['count'] += 1
+            total['total_ms'] += dur_ns / 1e6
+            spans.append({'name': name, 'start_ms': (start_ns - self.origin_ns) / 1e6,
+                          'duration_ms': dur_ns / 1e6, 'thread': tid, 'args': args})
+        with self.counters_lock:
+            counters = dict(self.counters)
+        return {'spans': spans, 'totals': totals, 'counters': counters}
+
+    def to_chrome(self):
+        """Chrome trace-event format, for chrome://tracing or Perfetto"""
+        pid = os.getpid()
+        events = [{'name': name, 'ph': 'X', 'pid': pid, 'tid': tid,
+                   'ts': (start_ns - self.origin_ns) / 1000, 'dur': dur_ns / 1000,
+                   'args': {k: str(v) for k, v in args.items()}}
+                  for name, start_ns, dur_ns, tid, args in self.events]
+        end_us = max((e['ts'] + e['dur'] for e in events), default=0)
+        with self.counters_lock:
+            counters = dict(self.counters)
+        events.extend({'name': name, 'ph': 'C', 'pid': pid, 'tid': 0, 'ts': end_us,
+                       'args': {name: value}} for name, value in counters.items())
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write(self, path, fmt='json'):
+        data = self.to_chrome() if fmt == 'chrome' else self.to_json()
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=1)
+
+
+def span(name, **args):
+    """Context manager timing a block; a shared no-op while tracing is off"""
+    if _tracer is None:
+        return _NOOP_SPAN
+    return _Span(_tracer, name, args)
+
+
+def count(name, value=1):
+    """Add to a counter (bytes_read, files_stat, entries_parsed, ...) while tracing"""
+    tracer = _tracer
+    if tracer is not None:
+        tracer.count(name, value)
+
+
+def enabled():
+    return _tracer is not None
+
+
+def start_tracing():
+    """Begin collecting spans and counters; returns the tracer"""
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def stop_tracing():
+    """Stop collecting; returns the tracer that was active, if any"""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def _trace_from_environment():
+    path = os.environ.get(TRACE_ENV)
+    if not path:
+        return
+    fmt = os.environ.get(TRACE_FORMAT_ENV, 'json')
+    start_tracing()
+
+    def write_at_exit():
+        tracer = stop_tracing()
+        if tracer is not None:
+            tracer.write(path, fmt)
+
+    atexit.register(write_at_exit)
+
+
+_trace_from_environment()
@@ -0,0 +1,42 @@
+import json
+import os
+
+from .fileio import write_json
+
+KEEP_WATERMARKS = 20
+
+
+class Watermarks:
+    """Markers recorded each time a context is generated.
+
+    A watermark notes where the decision store ended, when generation
+    started, and the fingerprints of the PRP and current milestone. It is
+    what a delta context is measured against. Kept in ``watermarks.json``;
+    only the most recent KEEP_WATERMARKS are retained.
+    """
+
+    def __init__(self, memory_dir=".claude-memory"):
+        self.path = os.path.join(memory_dir, "watermarks.json")
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def get(self, marker):
+        """The watermark recorded under marker ('last' for the newest), or None"""
+        marks = self._load()
+        if marker == 'last':
+            return marks[-1] if marks else None
+        for mark in marks:
+            if mark['marker'] == marker:
+                return mark
+        return None
+
+    def record(self, mark):
+        marks = self._load()
+        marks.append(mark)
+        del marks[:-KEEP_WATERMARKS]
+        write_json(self.path, marks)
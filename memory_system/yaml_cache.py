@@ -0,0 +1,121 @@
+import base64
+import json
+import os
+import time
+from datetime import date, datetime
+
+import yaml
+
+from . import tracing
+from .context_cache import RACY_WINDOW_NS
+from .fileio import atomic_write
+
+# Prefer the libyaml bindings; they parse and emit several times faster
+try:
+    from yaml import CSafeDumper as SafeDumper
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeDumper, SafeLoader
+
+SIDECAR_DIR = "__yamlcache__"
+SIDECAR_MAGIC = "claude-memory-yaml-2"
+
+# Safe-loaded YAML holds a few types JSON lacks; they are written as
+# one-key objects under these tags
+_TAGS = {
+    '\x00datetime': datetime.fromisoformat,
+    '\x00date': date.fromisoformat,
+    '\x00bytes': base64.b64decode,
+    '\x00set': set,
+}
+
+
+def sidecar_path(path):
+    """Location of the parsed-data sidecar for a YAML file, like __pycache__ for .py"""
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, SIDECAR_DIR, name + ".json")
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {'\x00datetime': value.isoformat()}
+    if isinstance(value, date):
+        return {'\x00date': value.isoformat()}
+    if isinstance(value, bytes):
+        return {'\x00bytes': base64.b64encode(value).decode('ascii')}
+    if isinstance(value, (set, frozenset)):
+        return {'\x00set': list(value)}
+    raise TypeError(f"{type(value).__name__} has no sidecar encoding")
+
+
+def _decode(obj):
+    if len(obj) == 1:
+        tag, value = next(iter(obj.items()))
+        if tag in _TAGS:
+            return _TAGS[tag](value)
+    return obj
+
+
+def _source_key(st):
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def load_yaml(path, use_sidecar=True):
+    """Parse a YAML file, reusing the sidecar while the source is unchanged.
+
+    The sidecar is keyed by the source's mtime, size and inode, so any
+    edit, including one made by hand in an editor, invalidates it. Sources
+    modified too recently to trust their timestamp are parsed but not
+    cached. Sidecars are JSON rather than pickle, since they sit inside
+    the project tree and may come from a cloned repository.
+    """
+    with tracing.span('load_yaml', path=path) as span:
+        return _load_yaml(path, use_sidecar, span)
+
+
+def _load_yaml(path, use_sidecar, span):
+    tracing.count('files_stat')
+    st = os.stat(path)
+    key = _source_key(st)
+    cache_path = sidecar_path(path)
+
+    if use_sidecar:
+        try:
+            with open(cache_path, 'r') as f:
+                magic, cached_key, data = json.load(f, object_hook=_decode)
+            if magic == SIDECAR_MAGIC and tuple(cached_key) == key:
+                span.set(sidecar=True)
+                return data
+        except (OSError, ValueError, TypeError):
+            pass
+
+    with open(path, 'r') as f:
+        data = yaml.load(f, Loader=SafeLoader)
+    tracing.count('bytes_read', st.st_size)
+    tracing.count('yaml_files_parsed')
+
+    if use_sidecar and key[0] < time.time_ns() - RACY_WINDOW_NS and _source_key(os.stat(path)) == key:
+        _write_sidecar(cache_path, key, data)
+    return data
+
+
+def _write_sidecar(cache_path, key, data):
+    try:
+        text = json.dumps([SIDECAR_MAGIC, key, data], default=_encode)
+    except (TypeError, ValueError):
+        return
+    # Tuples and non-string keys do not survive JSON; such files go uncached
+    if json.loads(text, object_hook=_decode)[2] != data:
+        return
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with atomic_write(cache_path) as f:
+            f.write(text)
+    except OSError:
+        # A read-only tree just means no sidecar
+        pass
+
+
+def dump_yaml(data, stream=None, **kwargs):
+    """yaml.dump using the fastest available safe dumper"""
+    return yaml.dump(data, stream, Dumper=SafeDumper, **kwargs)
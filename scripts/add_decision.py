@@ -1,15 +1,16 @@
 #!/usr/bin/env python3
 """
-Interactive script to add decisions to decisions.yaml
+Interactive script to add decisions to the decision log
 """
 import os
 import sys
-import yaml
 from datetime import datetime
 
 # Add parent directory to path to find memory_system
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from memory_system.sqlite_store import open_decision_store
+
 def get_input(prompt, default=None):
     """Get user input with optional default"""
     if default:
@@ -52,14 +53,7 @@ def add_decision():
     print("\nThis tool helps you document important architectural decisions,")
     print("technology changes, or significant deviations from your original plan.\n")
     
-    # Load existing decisions
-    decisions_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.claude-memory', 'decisions.yaml')
-    
-    if os.path.exists(decisions_file):
-        with open(decisions_file, 'r') as f:
-            data = yaml.safe_load(f) or {'decisions': []}
-    else:
-        data = {'decisions': []}
+    memory_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.claude-memory')
     
     # Check if user wants to proceed
     proceed = input("Do you want to add a new decision? (y/n): ").strip().lower()
@@ -100,16 +94,13 @@ def add_decision():
         print("Cancelled.")
         return
     
-    # Add to decisions list (at the beginning)
-    data['decisions'].insert(0, decision)
-    
-    # Save
-    os.makedirs(os.path.dirname(decisions_file), exist_ok=True)
-    with open(decisions_file, 'w') as f:
-        yaml.dump(data, f, default_flow_style=False, sort_keys=False)
+    # Append to the decision log
+    os.makedirs(memory_dir, exist_ok=True)
+    store = open_decision_store(memory_dir)
+    store.append(decision)
     
     print("\n✅ Decision saved successfully!")
-    print(f"📁 Location: {decisions_file}")
+    print(f"📁 Location: {os.path.dirname(store.watch_paths[0])}")
     
     # Offer to generate context
     gen_context = input("\nGenerate updated context for Claude? (y/n): ").strip().lower()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Generate context for many projects in parallel (e.g. every sub-project of a monorepo)
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add parent directory to path to find memory_system
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory_system.batch import discover_projects, reconstruct_many
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate Claude Code context for many projects")
+    parser.add_argument("roots", nargs="*", help="Project roots, each with its own .claude-memory/")
+    parser.add_argument("--discover", metavar="DIR",
+                        help="Also process every project under DIR that has a .claude-memory/")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Maximum worker processes (default: number of CPUs)")
+    parser.add_argument("--budget", type=int, default=None, help="Token budget per project")
+    parser.add_argument("--output", default="current_context.md",
+                        help="File name written inside each project root")
+    args = parser.parse_args()
+    
+    roots = list(args.roots)
+    if args.discover:
+        roots.extend(discover_projects(args.discover))
+    if not roots:
+        parser.error("no project roots given")
+    
+    print(f"🧠 Generating context for {len(roots)} projects")
+    start = time.perf_counter()
+    failures = 0
+    for result in reconstruct_many(roots, max_workers=args.workers, budget_tokens=args.budget):
+        if result.error:
+            failures += 1
+            print(f"❌ {result.project_root} ({result.seconds * 1000:.0f} ms): {result.error}")
+            continue
+        with open(os.path.join(result.project_root, args.output), 'w') as f:
+            f.write(result.context + "\n")
+        print(f"✓ {result.project_root} ({result.seconds * 1000:.0f} ms)")
+    
+    print(f"\nDone in {time.perf_counter() - start:.2f}s, {failures} failed")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark YAML loading of a large decisions file: pure-Python loader vs
+libyaml loader vs sidecar cache hit
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import yaml
+
+# Add parent directory to path to find memory_system
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory_system.yaml_cache import SafeLoader, dump_yaml, load_yaml
+
+def make_decisions(count):
+    start = datetime(2024, 1, 1)
+    return {'decisions': [{
+        'timestamp': (start + timedelta(minutes=i)).isoformat(),
+        'context': f"Area {i % 40}",
+        'prp_requirement': "Not specified",
+        'actual_implementation': f"Implementation detail number {i}",
+        'drift_type': ('enhancement', 'minor', 'major')[i % 3],
+        'rationale': "Better performance and maintainability",
+        'impact': [f"module_{i % 17}.py", f"module_{i % 23}.py"],
+        'approved': True
+    } for i in range(count)]}
+
+def timed(label, fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<28} {best * 1000:10.1f} ms")
+    return best
+
+def main(count=50000):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "decisions.yaml")
+        with open(path, 'w') as f:
+            dump_yaml(make_decisions(count), f, default_flow_style=False, sort_keys=False)
+        # Make the file old enough for the sidecar to be trusted
+        old = time.time() - 60
+        os.utime(path, (old, old))
+
+        print(f"Loading {count} decisions ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+        def pure_python():
+            with open(path, 'r') as f:
+                yaml.load(f, Loader=yaml.SafeLoader)
+
+        def libyaml():
+            with open(path, 'r') as f:
+                yaml.load(f, Loader=SafeLoader)
+
+        baseline = timed("yaml.safe_load (pure Python)", pure_python, repeat=1)
+        if SafeLoader is not yaml.SafeLoader:
+            timed("CSafeLoader (libyaml)", libyaml, repeat=1)
+        else:
+            print("  libyaml not available")
+        load_yaml(path)
+        cached = timed("load_yaml (sidecar hit)", lambda: load_yaml(path))
+        print(f"  speedup vs pure Python:      {baseline / cached:10.1f}x")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark ContextManager against a synthetic .claude-memory tree
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Add parent directory to path to find memory_system
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory_system.benchmark import (benchmark_report, compare_reports, generate_memory,
+                                     load_report, run_benchmarks)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark context reconstruction")
+    parser.add_argument("--decisions", type=int, default=10000)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--milestone-kb", type=int, default=16)
+    parser.add_argument("--days", type=int, default=365, help="History span of the synthetic data")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", choices=("files", "sqlite"), default="files")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed runs per phase")
+    parser.add_argument("--phase", action="append", help="Only run this phase (repeatable)")
+    parser.add_argument("--workdir", help="Generate the tree here and keep it (default: temporary)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Earlier JSON results to compare against")
+    args = parser.parse_args()
+    
+    workdir = args.workdir or tempfile.mkdtemp(prefix="claude-memory-bench-")
+    params = {k: getattr(args, k) for k in
+              ("decisions", "sessions", "milestone_kb", "days", "seed", "backend", "repeat")}
+    try:
+        if not os.path.exists(os.path.join(workdir, ".claude-memory")):
+            start = time.perf_counter()
+            generate_memory(workdir, args.decisions, args.sessions, args.milestone_kb,
+                            args.days, args.seed, args.backend)
+            print(f"✓ Generated {args.decisions} decisions and {args.sessions} sessions "
+                  f"in {time.perf_counter() - start:.1f}s")
+        
+        results = run_benchmarks(workdir, args.repeat, args.phase)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    
+    print(f"\n{'phase':<24}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'peak KB':>10}  file ops")
+    for name, r in results.items():
+        ops = ", ".join(f"{k}={v}" for k, v in sorted(r['file_ops'].items()))
+        print(f"{name:<24}{r['p50_ms']:>10.2f}{r['p90_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+              f"{r['peak_kb']:>10.0f}  {ops}")
+    
+    report = benchmark_report(params, results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+    
+    if args.compare:
+        print(f"\nCompared with {args.compare} (p50):")
+        for name, before, after, ratio in compare_reports(load_report(args.compare), report):
+            marker = "⚠️ " if ratio > 1.2 else "  "
+            print(f"{marker}{name:<24}{before:>10.2f} → {after:>8.2f} ms  ({ratio:.2f}x)")
+
+if __name__ == "__main__":
+    main()
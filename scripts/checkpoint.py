@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Create, list and restore deduplicated checkpoints of .claude-memory
+"""
+import argparse
+import os
+import sys
+
+# Add parent directory to path to find memory_system
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory_system.checkpoint import CheckpointError, CheckpointStore
+
+def _size(n):
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage memory checkpoints")
+    parser.add_argument("--memory-dir", default=".claude-memory")
+    sub = parser.add_subparsers(dest="command", required=True)
+    create = sub.add_parser("create", help="Snapshot the memory directory")
+    create.add_argument("name", nargs="?", help="Checkpoint name (default: timestamp)")
+    restore = sub.add_parser("restore", help="Restore a checkpoint")
+    restore.add_argument("name")
+    sub.add_parser("list", help="List checkpoints")
+    args = parser.parse_args()
+    
+    store = CheckpointStore(args.memory_dir)
+    try:
+        if args.command == "create":
+            manifest = store.create(args.name)
+            print(f"✓ Checkpoint {manifest['name']}: {len(manifest['files'])} files, "
+                  f"{_size(manifest['total_bytes'])} ({_size(manifest['stored_bytes'])} new)")
+        elif args.command == "restore":
+            rewritten, removed = store.restore(args.name)
+            print(f"✓ Restored {args.name}: {len(rewritten)} files rewritten, {len(removed)} removed")
+        else:
+            snapshots = store.list()
+            if not snapshots:
+                print("No checkpoints yet")
+            for manifest in snapshots:
+                print(f"  {manifest['name']:<24} {manifest['created'][:19]}  "
+                      f"{len(manifest['files']):>6} files  {_size(manifest['total_bytes']):>8}  "
+                      f"+{_size(manifest['stored_bytes'])}")
+    except CheckpointError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,82 @@
 """
 Helper script to generate context for Claude Code
 """
+import argparse
 import os
 import sys
 
 # Add parent directory to path to find memory_system
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from memory_system.context_manager import ContextManager
+from memory_system.daemon import DaemonError, request_context
 
-def get_claude_context():
+def get_claude_context(budget_tokens=None, query=None, since=None):
+    from memory_system.context_manager import ContextManager
     cm = ContextManager()
-    return cm.reconstruct_context(".")
+    return cm.reconstruct_context(".", budget_tokens=budget_tokens, query=query, since=since)
+
+def stream_claude_context(out, budget_tokens=None, query=None, since=None):
+    """Write context sections to out as soon as each one is ready"""
+    from memory_system.context_manager import ContextManager
+    cm = ContextManager()
+    sections = cm.iter_context(".", budget_tokens=budget_tokens, query=query, since=since)
+    for i, section in enumerate(sections):
+        out.write(section if i == 0 else "\n" + section)
+        out.flush()
+    out.write("\n")
+    out.flush()
+
+def stream_from_daemon(out, budget_tokens=None, query=None, since=None):
+    """Copy context from a running context daemon; False if none is reachable"""
+    try:
+        chunks = request_context(".claude-memory", ".", budget_tokens=budget_tokens, query=query,
+                                 since=since)
+    except (OSError, DaemonError):
+        return False
+    for chunk in chunks:
+        out.write(chunk)
+        out.flush()
+    out.write("\n")
+    out.flush()
+    return True
 
 if __name__ == "__main__":
-    print(get_claude_context())
+    parser = argparse.ArgumentParser(description="Generate context for Claude Code")
+    parser.add_argument("--budget", type=int, default=None,
+                        help="Token budget for the generated context (40/30/20/10 split)")
+    parser.add_argument("--topic", default=None,
+                        help="Also include older decisions relevant to this topic (BM25 ranking)")
+    parser.add_argument("--git", action="store_true",
+                        help="Also include older decisions relevant to the files in `git diff`")
+    parser.add_argument("--since", default=None, metavar="MARKER",
+                        help="Only emit what changed since the context generated at MARKER")
+    parser.add_argument("--delta", action="store_true",
+                        help="Only emit what changed since the last generated context (--since last)")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Record timing spans and counters to PATH (implies --no-daemon)")
+    parser.add_argument("--trace-format", choices=("json", "chrome"), default="json",
+                        help="Trace output: summary JSON or Chrome trace-event format")
+    parser.add_argument("--no-daemon", action="store_true",
+                        help="Always generate context in-process, even if a context daemon is running")
+    args = parser.parse_args()
+    
+    query = args.topic
+    since = "last" if args.delta else args.since
+    if args.git:
+        from memory_system.bm25_index import git_diff_query
+        query = " ".join(filter(None, [query, git_diff_query(".")]))
+    
+    if args.trace:
+        from memory_system import tracing
+        tracing.start_tracing()
+    
+    try:
+        if args.trace or args.no_daemon or not stream_from_daemon(sys.stdout, args.budget, query, since):
+            stream_claude_context(sys.stdout, args.budget, query, since)
+        if args.trace:
+            tracing.stop_tracing().write(args.trace, args.trace_format)
+    except BrokenPipeError:
+        # The reader went away (e.g. `| head`); stop quietly
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
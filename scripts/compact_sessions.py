@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Pack old session summaries into compressed archive segments
+"""
+import argparse
+import os
+import sys
+
+# Add parent directory to path to find memory_system
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory_system.session_archive import SessionArchive
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact old session summaries")
+    parser.add_argument("memory_dir", nargs="?", default=".claude-memory")
+    parser.add_argument("--older-than", type=float, default=90, metavar="DAYS",
+                        help="Pack sessions not modified for this many days (default: 90)")
+    parser.add_argument("--rebuild-index", action="store_true",
+                        help="Recreate the archive index from the segments")
+    args = parser.parse_args()
+    
+    archive = SessionArchive(args.memory_dir)
+    if args.rebuild_index:
+        count = archive.rebuild_index()
+        print(f"✓ Indexed {count} archived sessions")
+        return
+    
+    packed = archive.compact(args.older_than)
+    if packed:
+        print(f"✓ Packed {packed} sessions into {archive.archive_dir}")
+    else:
+        print(f"No sessions older than {args.older_than:g} days")
+    print(f"📦 {len(archive.index)} sessions archived in total")
+
+if __name__ == "__main__":
+    main()
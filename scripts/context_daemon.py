@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Resident context daemon - keeps parsed memory in RAM and serves context over a Unix socket
+"""
+import argparse
+import os
+import sys
+
+# Add parent directory to path to find memory_system
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory_system.daemon import ContextDaemon, default_socket_path, ping, shutdown
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve Claude Code context from a resident process")
+    parser.add_argument("--socket", default=None,
+                        help=f"Unix socket path (default: {default_socket_path()})")
+    parser.add_argument("--poll-interval", type=float, default=2.0,
+                        help="Seconds between checks of .claude-memory/ and prp.md for changes")
+    parser.add_argument("--stop", action="store_true", help="Stop a running daemon")
+    parser.add_argument("--status", action="store_true", help="Check whether a daemon is running")
+    args = parser.parse_args()
+    
+    socket_path = args.socket or default_socket_path()
+    if args.status:
+        print(f"✓ Daemon running on {socket_path}" if ping(socket_path) else "Daemon not running")
+    elif args.stop:
+        try:
+            shutdown(socket_path)
+            print("✓ Daemon stopped")
+        except OSError:
+            print("Daemon not running")
+    else:
+        server = ContextDaemon(socket_path, poll_interval=args.poll_interval)
+        print(f"🧠 Context daemon listening on {socket_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Show the hottest memory items and demote cold ones to the archive tier
+"""
+import argparse
+import os
+import sys
+
+# Add parent directory to path to find memory_system
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory_system.curation import MemoryHeat, record_heat
+from memory_system.sqlite_store import open_decision_store
+
+def main():
+    parser = argparse.ArgumentParser(description="Curate hot and cold memory")
+    parser.add_argument("memory_dir", nargs="?", default=".claude-memory")
+    parser.add_argument("--top", type=int, default=10, help="Items to list per kind")
+    parser.add_argument("--demote", type=float, metavar="HEAT",
+                        help="Move sessions whose heat fell below HEAT to the cold archive")
+    args = parser.parse_args()
+    
+    heat = MemoryHeat(args.memory_dir)
+    seeded = not heat.exists()
+    store = open_decision_store(args.memory_dir)
+    # Also applies the references queued by recent context generations
+    record_heat(args.memory_dir, [], store.all if store.exists() else None)
+    if seeded:
+        print(f"✓ Seeded {heat.path}")
+    
+    for kind in ('decision', 'session'):
+        print(f"\n🔥 Hottest {kind}s:")
+        for item_id in heat.hot(kind, args.top):
+            print(f"  {heat.heat(item_id):8.3f}  {item_id}")
+    
+    if args.demote is not None:
+        demoted = heat.demote_cold(args.demote)
+        print(f"\n🧊 Demoted {len(demoted)} sessions below heat {args.demote}")
+        print(f"  Cold session files are kept in {heat.cold_dir}")
+    heat.close()
+
+if __name__ == "__main__":
+    main()
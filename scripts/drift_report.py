@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Drift dashboard from the materialized aggregates in .claude-memory/drift-stats.json and drift-stats.db
+"""
+import argparse
+import os
+import sys
+
+# Add parent directory to path to find memory_system
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory_system.drift_stats import DriftAggregates
+from memory_system.sqlite_store import open_decision_store
+from memory_system.yaml_cache import load_yaml
+
+def load_history(memory_dir):
+    """Every decision, from the decision store or else the legacy decisions.yaml"""
+    store = open_decision_store(memory_dir)
+    if store.exists():
+        return store.all()
+    data = load_yaml(os.path.join(memory_dir, "decisions.yaml")) or {}
+    return data.get('decisions') or []
+
+def main():
+    parser = argparse.ArgumentParser(description="Show drift statistics")
+    parser.add_argument("memory_dir", nargs="?", default=".claude-memory")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Recompute the aggregates from the full decision history")
+    args = parser.parse_args()
+    
+    stats = DriftAggregates(args.memory_dir)
+    if args.rebuild or not stats.exists():
+        stats.rebuild(load_history(args.memory_dir))
+        print(f"✓ Rebuilt {stats.path}")
+    
+    data = stats.data
+    print(f"\n📊 Drift Report ({data['total']} decisions)")
+    print("=" * 50)
+    
+    print("\nBy drift type:")
+    for drift_type, count in sorted(data['by_drift_type'].items(), key=lambda kv: -kv[1]):
+        print(f"  {drift_type:<20} {count:>8}")
+    
+    print("\nRolling totals:")
+    for days in (7, 30, 90):
+        totals = stats.window_totals(days)
+        summary = ", ".join(f"{t}: {c}" for t, c in sorted(totals.items())) or "none"
+        print(f"  last {days:>2} days: {summary}")
+    
+    print("\nTop context areas:")
+    for context, count, major in stats.top_contexts(10):
+        print(f"  {context[:40]:<40} {count:>6} ({major} major)")
+    
+    if data['latest_major']:
+        print("\n⚠️  Latest major drift:")
+        for warning in data['latest_major'][:5]:
+            print(f"  - {warning['timestamp']}: {warning['context']}")
+        if len(data['latest_major']) > 5:
+            print(f"  ... and {len(data['latest_major']) - 5} more")
+    stats.close()
+
+if __name__ == "__main__":
+    main()
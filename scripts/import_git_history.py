@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Backfill session summaries from a repository's git history
+
+Run it again later to import only the commits made since the last run.
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add parent directory to path to find memory_system
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory_system.git_import import (BATCH_SESSIONS, SESSION_GAP_MINUTES, GitHistoryImporter,
+                                      GitImportError)
+
+def main():
+    parser = argparse.ArgumentParser(description="Import git history as session summaries")
+    parser.add_argument("repo", nargs="?", default=".")
+    parser.add_argument("--memory-dir", default=None,
+                        help="Memory directory (default: REPO/.claude-memory)")
+    parser.add_argument("--rev", default="HEAD", help="Import commits reachable from REV")
+    parser.add_argument("--gap", type=float, default=SESSION_GAP_MINUTES, metavar="MINUTES",
+                        help=f"Idle time that ends an author's session (default: {SESSION_GAP_MINUTES})")
+    parser.add_argument("--batch", type=int, default=BATCH_SESSIONS,
+                        help=f"Summaries written per batch (default: {BATCH_SESSIONS})")
+    parser.add_argument("--max-commits", type=int, default=None,
+                        help="Stop after this many commits; the next run continues")
+    parser.add_argument("--backend", choices=("files", "sqlite"), default=None)
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignore saved progress and import the whole history again")
+    args = parser.parse_args()
+
+    memory_dir = args.memory_dir or os.path.join(args.repo, ".claude-memory")
+    importer = GitHistoryImporter(memory_dir, args.repo, args.gap, args.batch, args.backend)
+    state = importer.load_state()
+    if state and state['last_commit'] and not args.restart:
+        print(f"↻ Resuming after commit {state['last_commit'][:12]} "
+              f"({state['commits']} commits imported so far)")
+
+    start = time.time()
+    try:
+        result = importer.run(args.rev, args.max_commits, args.restart)
+    except GitImportError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    if not result['commits']:
+        print("✓ Already up to date")
+        return
+    print(f"✓ Imported {result['commits']} commits as {result['summaries']} session summaries "
+          f"in {time.time() - start:.1f}s")
+    print(f"📁 Progress saved in {importer.state_path}")
+
+if __name__ == "__main__":
+    main()
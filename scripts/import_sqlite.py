@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Import the file-based .claude-memory layout into the SQLite backend (memory.db)
+"""
+import os
+import sys
+
+# Add parent directory to path to find memory_system
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory_system.sqlite_store import SQLiteStore
+
+def import_memory(memory_dir):
+    store = SQLiteStore(memory_dir)
+    if store.exists():
+        print(f"❌ {store.db_path} already exists; remove it to re-import")
+        return
+    
+    decisions, sessions = store.import_memory_dir()
+    store.close()
+    print(f"✓ Imported {decisions} decisions and {sessions} sessions into {store.db_path}")
+    print("  ContextManager and the decision scripts now use the SQLite backend")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        import_memory(sys.argv[1])
+    else:
+        import_memory(os.path.join(os.getcwd(), ".claude-memory"))
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+One-time migration of .claude-memory/decisions.yaml into the append-only decision log
+
+Pass --compact to rewrite an existing log in timestamp order instead.
+"""
+import os
+import sys
+
+# Add parent directory to path to find memory_system
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory_system.decision_log import DecisionLog
+
+def migrate(memory_dir):
+    log = DecisionLog(memory_dir)
+    if log.exists():
+        print(f"✓ Decision log already exists at {log.log_dir}")
+        return
+    
+    count = log.migrate()
+    print(f"✓ Migrated {count} decisions into {log.log_dir}")
+    print(f"  {log.legacy_path} is no longer read and can be archived")
+
+def compact(memory_dir):
+    log = DecisionLog(memory_dir)
+    if not log.exists():
+        print(f"❌ No decision log at {log.log_dir}")
+        return
+    
+    count = log.compact()
+    print(f"✓ Compacted {count} decisions in {log.log_dir}")
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if a != "--compact"]
+    memory_dir = args[0] if args else os.path.join(os.getcwd(), ".claude-memory")
+    if "--compact" in sys.argv[1:]:
+        compact(memory_dir)
+    else:
+        migrate(memory_dir)
@@ -4,22 +4,16 @@ Quick decision entry - minimal prompts for fast documentation
 """
 import os
 import sys
-import yaml
 from datetime import datetime
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from memory_system.sqlite_store import open_decision_store
+
 def quick_decision():
     """Quick decision entry with minimal prompts"""
-    decisions_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.claude-memory', 'decisions.yaml')
-    
-    # Load existing
-    if os.path.exists(decisions_file):
-        with open(decisions_file, 'r') as f:
-            data = yaml.safe_load(f) or {'decisions': []}
-    else:
-        data = {'decisions': []}
+    memory_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.claude-memory')
     
     print("\n⚡ Quick Decision Entry")
     print("=" * 30)
@@ -49,11 +43,8 @@ def quick_decision():
         'approved': True
     }
     
-    # Add and save
-    data['decisions'].insert(0, decision)
-    
-    with open(decisions_file, 'w') as f:
-        yaml.dump(data, f, default_flow_style=False, sort_keys=False)
+    # Append to the decision log
+    open_decision_store(memory_dir).append(decision)
     
     print(f"\n✅ Saved: {context} - {change}")
 
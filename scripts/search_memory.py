@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Search stored decisions and session summaries
+"""
+import argparse
+import os
+import sys
+
+# Add parent directory to path to find memory_system
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory_system.context_manager import ContextManager
+
+def print_result(result):
+    item = result['item']
+    if result['kind'] == 'decision':
+        print(f"📝 [{item['timestamp']}] {item.get('context', '')}")
+        if item.get('rationale'):
+            print(f"   {item['rationale']}")
+    else:
+        print(f"🗂  Session {item['session_id']} ({item.get('timestamp', '')})")
+        for highlight in (item.get('highlights') or item.get('decisions') or [])[:3]:
+            print(f"   - {highlight}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Search decisions and session summaries")
+    parser.add_argument("query", nargs="+")
+    parser.add_argument("--memory-dir", default=".claude-memory")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--backend", choices=("files", "sqlite"), default=None)
+    args = parser.parse_args()
+
+    cm = ContextManager(args.memory_dir, use_cache=False, backend=args.backend)
+    results = cm.search(" ".join(args.query), limit=args.limit)
+    if not results:
+        print("No matches")
+        return
+    for result in results:
+        print_result(result)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+"""
+Storage checks for the Claude Code Memory System
+
+Behavioral checks for the decision log, the context manager and the
+memory tools built around them. Everything runs in a temporary directory;
+unlike test_system.py it needs neither Neo4j nor an existing .claude-memory.
+"""
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from multiprocessing import Process
+
+# Add parent directory to path to find memory_system
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory_system.benchmark import generate_memory
+from memory_system.checkpoint import DERIVED_FILES, CheckpointStore
+from memory_system.context_budget import estimate_tokens
+from memory_system.context_manager import ContextManager
+from memory_system.decision_log import DecisionLog
+from memory_system.drift_stats import DriftAggregates
+from memory_system.extractive import extract, session_sentences, summarize_session
+from memory_system.git_import import GitHistoryImporter, GitImportError
+from memory_system.milestone_index import MilestoneIndex
+from memory_system.prp_index import PRPIndex, discover_prps
+from memory_system.rollups import SummaryRollups
+from memory_system.session_archive import SessionArchive
+from memory_system.sqlite_store import open_decision_store
+from memory_system.summarizer import ProgressiveSummarizer
+from memory_system.yaml_cache import dump_yaml
+
+WRITERS = 4
+APPENDS_PER_WRITER = 25
+
+def make_decision(context, when=None, drift_type='minor'):
+    return {
+        'timestamp': (when or datetime.now()).isoformat(),
+        'context': context,
+        'prp_requirement': 'Not specified',
+        'actual_implementation': f'Implementation of {context}',
+        'drift_type': drift_type,
+        'rationale': f'Rationale for {context}',
+        'impact': [],
+        'approved': True,
+    }
+
+def without_timestamps(text):
+    """Context text without the lines that change on every generation"""
+    return [line for line in text.splitlines()
+            if not line.startswith(("Retrieved at:", "Previous context:"))]
+
+def append_decisions(memory_dir, backend, writer):
+    store = open_decision_store(memory_dir, backend)
+    for i in range(APPENDS_PER_WRITER):
+        store.append(make_decision(f"writer {writer} decision {i}"))
+
+def test_concurrent_append(root):
+    """Parallel writers lose neither decisions nor aggregate updates"""
+    print("Testing concurrent appends...")
+    expected = WRITERS * APPENDS_PER_WRITER
+    for backend in ('files', 'sqlite'):
+        memory_dir = os.path.join(root, f"concurrent-{backend}")
+        os.makedirs(memory_dir)
+        writers = [Process(target=append_decisions, args=(memory_dir, backend, w))
+                   for w in range(WRITERS)]
+        for process in writers:
+            process.start()
+        for process in writers:
+            process.join()
+        assert all(p.exitcode == 0 for p in writers), [p.exitcode for p in writers]
+
+        decisions = open_decision_store(memory_dir, backend).all()
+        assert len(decisions) == expected, len(decisions)
+        assert len({d['context'] for d in decisions}) == expected
+        stats = DriftAggregates(memory_dir)
+        assert stats.data['total'] == expected, stats.data['total']
+        assert sum(count for _, count, _ in stats.top_contexts(expected)) == expected
+        stats.close()
+        print(f"✓ {backend}: {WRITERS} writers stored and counted {expected} decisions")
+
+def test_crash_tail_repair(root):
+    """A crash mid-append leaves a torn line that the next writer repairs"""
+    print("\nTesting crash-tail repair...")
+    memory_dir = os.path.join(root, "crash")
+    log = DecisionLog(memory_dir)
+    for i in range(5):
+        log.append(make_decision(f"before crash {i}"))
+
+    segment = sorted(name for name in os.listdir(log.log_dir) if name.startswith("segment-"))[-1]
+    with open(os.path.join(log.log_dir, segment), 'ab') as f:
+        # A complete line whose index record was never written, then a torn one
+        f.write((json.dumps(make_decision("written, not indexed")) + "\n").encode('utf-8'))
+        f.write(b'{"timestamp": "2099-01')
+
+    assert len(log.all()) == 6, len(log.all())
+    log.append(make_decision("after crash"))
+    contexts = [d['context'] for d in log.all()]
+    assert len(contexts) == 7 and contexts[0] == "after crash", contexts
+    assert DriftAggregates(memory_dir).data['total'] == 7
+    print("✓ Complete line indexed, torn line dropped, aggregates caught up")
+
+def test_compaction(root):
+    """Compaction keeps every decision and orders the log by timestamp"""
+    print("\nTesting compaction...")
+    memory_dir = os.path.join(root, "compact")
+    log = DecisionLog(memory_dir)
+    now = datetime.now()
+    # Backdated appends arrive out of timestamp order
+    for i in range(30):
+        log.append(make_decision(f"decision {i}", now - timedelta(minutes=(i * 7) % 30)))
+
+    assert log.compact() == 30
+    timestamps = [d['timestamp'] for d in log.all()]
+    assert len(timestamps) == 30 and timestamps == sorted(timestamps, reverse=True)
+    assert not os.path.exists(log.compacting_path)
+    log.append(make_decision("after compaction"))
+    assert log.all()[0]['context'] == "after compaction" and log.position() == 31
+    print("✓ 30 decisions compacted in timestamp order; appends continue afterwards")
+
+def test_stale_index_after_pull(root):
+    """A clone that pulls another clone's compaction rebuilds its own index"""
+    print("\nTesting a stale index after a pull...")
+    project_root = os.path.join(root, "clone-b")
+    theirs = DecisionLog(os.path.join(root, "clone-a", ".claude-memory"))
+    now = datetime.now()
+    for i in range(20):
+        theirs.append(make_decision(f"shared {i}", now - timedelta(minutes=(i * 7) % 20)))
+    memory_dir = os.path.join(project_root, ".claude-memory")
+    shutil.copytree(theirs.memory_dir, memory_dir)
+
+    theirs.compact()
+    theirs.append(make_decision("pulled"))
+    # The pull brings the segments; the gitignored index.bin stays behind
+    ours = DecisionLog(memory_dir)
+    for name in os.listdir(ours.log_dir):
+        if name.startswith("segment-"):
+            os.remove(os.path.join(ours.log_dir, name))
+    for name in os.listdir(theirs.log_dir):
+        if name.startswith("segment-"):
+            shutil.copy(os.path.join(theirs.log_dir, name), ours.log_dir)
+
+    assert ours.position() == 21 and len(ours.all()) == 21
+    assert "pulled" in ContextManager(memory_dir, use_cache=False).reconstruct_context(project_root)
+    ours.append(make_decision("after pull"))
+    assert ours.all()[0]['context'] == "after pull"
+    assert DriftAggregates(memory_dir).data['total'] == 22
+    print("✓ Index and aggregates rebuilt from the pulled segments; appends continue")
+
+def test_decision_order(root):
+    """Recent decisions come newest first in every layout, so a tight budget keeps the newest"""
+    print("\nTesting decision order...")
+    now = datetime.now()
+    # Oldest first, the order both layouts store them in
+    decisions = [make_decision(f"order {i}", now - timedelta(hours=i)) for i in reversed(range(5))]
+    for layout in ('legacy', 'log'):
+        project_root = os.path.join(root, f"order-{layout}")
+        memory_dir = os.path.join(project_root, ".claude-memory")
+        os.makedirs(memory_dir)
+        if layout == 'legacy':
+            with open(os.path.join(memory_dir, "decisions.yaml"), 'w') as f:
+                dump_yaml({'decisions': decisions}, f)
+        else:
+            log = DecisionLog(memory_dir)
+            for decision in decisions:
+                log.append(decision)
+
+        cm = ContextManager(memory_dir, use_cache=False)
+        full = re.findall(r"\*\*: (order \d)", cm.reconstruct_context(project_root))
+        assert full == [f"order {i}" for i in range(5)], (layout, full)
+        tight = re.findall(r"\*\*: (order \d)", cm.reconstruct_context(project_root, budget_tokens=120))
+        assert tight and tight == full[:len(tight)], (layout, tight)
+        print(f"✓ {layout}: newest first; a 120-token budget keeps {', '.join(tight)}")
+
+def test_bm25_ranking(root):
+    """Search ranks the best match first, and appended decisions are searchable at once"""
+    print("\nTesting BM25 ranking...")
+    project_root = os.path.join(root, "bm25")
+    memory_dir = os.path.join(project_root, ".claude-memory")
+    log = DecisionLog(memory_dir)
+    month_ago = datetime.now() - timedelta(days=30)
+    for i in range(20):
+        log.append(make_decision(f"routine change {i}", month_ago))
+    log.append(make_decision("Cache the dashboard refresh", month_ago))
+    log.append(make_decision("Rotate session tokens on every refresh", month_ago))
+
+    cm = ContextManager(memory_dir, use_cache=False)
+    ranked = [r['item']['context'] for r in cm.search("refresh tokens")]
+    assert ranked == ["Rotate session tokens on every refresh", "Cache the dashboard refresh"], ranked
+    log.append(make_decision("Sign webhooks with a shared secret"))
+    assert cm.search("webhook secret")[0]['item']['context'] == "Sign webhooks with a shared secret"
+
+    context = cm.reconstruct_context(project_root, query="refresh tokens")
+    relevant = context.split("## Relevant Decisions")[1].split("## ")[0]
+    assert "Rotate session tokens" in relevant and "routine change" not in relevant
+    print("✓ Matching decisions ranked by BM25; a month-old match makes Relevant Decisions")
+
+def make_session(session_id, change, when):
+    return {'session_id': session_id, 'changes': [{'file': f"{session_id}.py", 'change': change}],
+            'decisions': [], 'timestamp': when}
+
+def test_archive_compaction(root):
+    """Old sessions are packed into the archive and still load by id"""
+    print("\nTesting session archive compaction...")
+    project_root = os.path.join(root, "archive")
+    memory_dir = os.path.join(project_root, ".claude-memory")
+    now = datetime.now()
+    ProgressiveSummarizer(memory_dir).create_session_summaries(
+        [make_session(f"old-{i}", f"Old change {i}", now - timedelta(days=200 + i)) for i in range(10)]
+        + [make_session(f"new-{i}", f"New change {i}", now - timedelta(days=i)) for i in range(3)])
+
+    assert SessionArchive(memory_dir).compact(older_than_days=90) == 10
+    live = sorted(os.listdir(os.path.join(memory_dir, "summaries")))
+    assert live == [f"session-new-{i}.yaml" for i in range(3)], live
+    cm = ContextManager(memory_dir, use_cache=False)
+    assert cm.load_session("old-4")['changes'][0]['change'] == "Old change 4"
+    assert cm.load_session("new-1")['session_id'] == "new-1"
+    assert cm.load_session("no-such-session") is None
+
+    # Packed sessions only fill the slots live ones cannot
+    recent = re.findall(r"### Session (\S+)", cm.reconstruct_context(project_root))
+    assert recent == ["new-0", "new-1", "new-2", "old-0", "old-1"], recent
+    assert SessionArchive(memory_dir).rebuild_index() == 10
+    print("✓ 10 sessions packed; load_session reads them back and they fill recent summaries")
+
+def test_checkpoint_restore(root):
+    """A restore brings back the decisions and sessions and rebuilds the derived files"""
+    print("\nTesting checkpoint create and restore...")
+    now = datetime.now()
+    for backend in ('files', 'sqlite'):
+        memory_dir = os.path.join(root, f"checkpoint-{backend}")
+        store = open_decision_store(memory_dir, backend)
+        summarizer = ProgressiveSummarizer(memory_dir, backend)
+        for i in range(10):
+            store.append(make_decision(f"kept {i}", now - timedelta(minutes=10 - i)))
+        summarizer.create_session_summaries([make_session("kept", "Kept change", now)])
+        checkpoints = CheckpointStore(memory_dir)
+        before = checkpoints.create("before")
+        assert not any(path in DERIVED_FILES for path in before['files']), sorted(before['files'])
+
+        for i in range(5):
+            store.append(make_decision(f"dropped {i}"))
+        summarizer.create_session_summaries([make_session("dropped", "Dropped change", now)])
+        after = checkpoints.create("after")
+        assert after['stored_bytes'] < after['total_bytes'], after['stored_bytes']
+
+        checkpoints.restore("before")
+        store = open_decision_store(memory_dir, backend)
+        contexts = [d['context'] for d in store.all()]
+        assert contexts == [f"kept {i}" for i in reversed(range(10))], contexts
+        assert [s['session_id'] for s in store.all_sessions()] == ["kept"]
+        stats = DriftAggregates(memory_dir)
+        assert stats.data['total'] == 10, stats.data['total']
+        stats.close()
+        assert store.search("kept", 5) and not store.search("dropped", 5)
+        store.append(make_decision("after restore"))
+        assert store.all()[0]['context'] == "after restore"
+        print(f"✓ {backend}: restored 10 decisions and 1 session; derived files rebuilt")
+
+def test_milestone_excerpt(root):
+    """A milestone over the cap keeps its title and the sections the query asks about"""
+    print("\nTesting milestone excerpts...")
+    project_root = os.path.join(root, "milestone")
+    memory_dir = os.path.join(project_root, ".claude-memory")
+    summaries_dir = os.path.join(memory_dir, "summaries")
+    os.makedirs(summaries_dir)
+    topics = [f"Topic {i}" for i in range(19)] + ["Segment compaction"]
+    path = os.path.join(summaries_dir, "milestone-002.md")
+    with open(path, 'w') as f:
+        f.write("# Milestone 2: Storage\n\nShip the new storage layer.\n\n")
+        for topic in topics:
+            f.write(f"## {topic}\n\n")
+            f.write(f"Notes on {topic.lower()}.\n" * 30)
+    assert os.path.getsize(path) > ContextManager.MILESTONE_MAX_BYTES
+
+    index = MilestoneIndex(memory_dir)
+    plain = index.excerpt(path, max_bytes=ContextManager.MILESTONE_MAX_BYTES)
+    assert plain.startswith("# Milestone 2: Storage") and "Segment compaction" in plain.split("_Also")[-1]
+    assert len(plain.encode('utf-8')) < ContextManager.MILESTONE_MAX_BYTES + 1024, len(plain)
+    asked = index.excerpt(path, "compaction", ContextManager.MILESTONE_MAX_BYTES)
+    assert asked.startswith("# Milestone 2: Storage") and "## Segment compaction" in asked
+
+    cm = ContextManager(memory_dir, use_cache=False)
+    context = cm.reconstruct_context(project_root, query="segment compaction")
+    assert "## Segment compaction" in context and "## Topic 18" not in context
+    print(f"✓ {os.path.getsize(path)}-byte milestone cut to {len(plain)} bytes; the query picks its section")
+
+def write_file(path, text, mtime=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text)
+    if mtime:
+        os.utime(path, (mtime, mtime))
+
+def test_prp_index(root):
+    """A refresh reads only changed PRPs and reports only the sections that changed"""
+    print("\nTesting the PRP index...")
+    project_root = os.path.join(root, "prp")
+    memory_dir = os.path.join(project_root, ".claude-memory")
+    os.makedirs(memory_dir)
+    # Old enough to be outside the racy window
+    old = time.time() - 60
+    auth = "# Auth\n\n## Goal\n\nLog in.\n\n## Success criteria\n\n- [x] Login\n- [ ] Logout\n"
+    write_file(os.path.join(project_root, "prp.md"), "# Project\n\nOverview.\n", old)
+    write_file(os.path.join(project_root, "PRPs", "auth.md"), auth, old)
+    write_file(os.path.join(project_root, "use-cases", "cli", "PRPs", "cli.md"), "# CLI\n\n## Flags\n", old)
+    documents, _ = discover_prps(project_root)
+    assert documents == ["PRPs/auth.md", "prp.md", "use-cases/cli/PRPs/cli.md"], documents
+
+    index = PRPIndex(memory_dir)
+    assert index.refresh(project_root, documents) == 3
+    assert index.changed_since(0) == []
+    assert index.totals() == {'documents': 3, 'requirements': 6, 'checked': 1, 'checkboxes': 2}
+    assert PRPIndex(memory_dir).refresh(project_root) == 0
+
+    mark = time.time_ns()
+    write_file(os.path.join(project_root, "PRPs", "auth.md"),
+               auth.replace("- [ ] Logout", "- [x] Logout").replace("## Goal\n\nLog in.\n\n", ""))
+    index = PRPIndex(memory_dir)
+    assert index.refresh(project_root) == 1
+    changes = sorted((c['id'], c['change']) for c in index.changed_since(mark - 1))
+    # The parent heading's own text is unchanged, so only its subsections show
+    assert changes == [("PRPs/auth.md#auth/goal", 'removed'),
+                       ("PRPs/auth.md#auth/success-criteria", 'modified')], changes
+    assert index.totals()['checked'] == 2
+    print("✓ 3 PRPs indexed; an edit re-read 1 and reported only its changed sections")
+
+def test_rollups(root):
+    """Rollups kept on write match a rebuild, and a rewritten session replaces its old counts"""
+    print("\nTesting summary rollups...")
+    memory_dir = os.path.join(root, "rollups")
+    now = datetime.now()
+    summarizer = ProgressiveSummarizer(memory_dir)
+    summarizer.create_session_summaries([
+        make_session("old", "Old change", now - timedelta(days=60)),
+        make_session("mid", "Mid change", now - timedelta(days=3)),
+        make_session("new", "First try", now - timedelta(hours=1)),
+    ])
+    summarizer.create_session_summaries([make_session("new", "Second try", now - timedelta(hours=1))])
+
+    rollups = SummaryRollups(memory_dir)
+    macro = rollups.macro()
+    assert (macro['sessions'], macro['changes'], sorted(macro['files'])) == (3, 3, ["mid.py", "new.py", "old.py"]), macro
+    meso = rollups.meso()
+    assert (meso['sessions'], meso['changes']) == (2, 2), meso
+    assert [c['change'] for c in rollups.micro()] == ["Second try", "Mid change", "Old change"]
+    view = rollups.view()
+    assert view['meso']['files'] == [("mid.py", 1), ("new.py", 1)], view['meso']
+
+    kept = json.loads(json.dumps(rollups.data))
+    rebuilt = SummaryRollups(memory_dir).rebuild(summarizer.store.all_sessions())
+    assert rebuilt == kept, (rebuilt, kept)
+    print("✓ 3 sessions rolled up on write; a rewrite replaced its counts; a rebuild agrees")
+
+def test_textrank_highlights(root):
+    """Highlights are the central sentences, in order, without near repeats or outliers"""
+    print("\nTesting TextRank highlights...")
+    project_root = os.path.join(root, "highlights")
+    memory_dir = os.path.join(project_root, ".claude-memory")
+    log_file = "memory_system/decision_log.py"
+    changes = [{'file': log_file, 'change': f"Index segment {i} of the decision log on append"} for i in range(8)]
+    changes += [
+        {'file': log_file, 'change': "Repair a torn decision log segment before the next append"},
+        {'file': log_file, 'change': "Repair a torn decision log segment before the next append too"},
+        {'file': "LICENSE", 'change': "Bump the copyright year"},
+        {'file': "docs/theme.css", 'change': "Darken the footer colour"},
+    ]
+    decisions = ["Keep the decision log append-only"]
+    sentences = session_sentences(changes, decisions)
+    highlights = extract(sentences, 3)
+    assert len(highlights) == 3, highlights
+    positions = [sentences.index(h) for h in highlights]
+    assert positions == sorted(positions), positions
+    assert sum("Repair a torn" in h for h in highlights) == 1, highlights
+    assert not any("copyright" in h or "footer" in h for h in highlights), highlights
+    assert extract(sentences[:2], 3) == sentences[:2]
+
+    ProgressiveSummarizer(memory_dir).create_session_summaries(
+        [{'session_id': "textrank", 'changes': changes, 'decisions': decisions}])
+    summary = ContextManager(memory_dir, use_cache=False).load_session("textrank")
+    assert summary['highlights'] == summarize_session(changes, decisions), summary['highlights']
+    context = ContextManager(memory_dir, use_cache=False).reconstruct_context(project_root)
+    assert f"  - {summary['highlights'][0]}" in context
+    print(f"✓ {len(sentences)} sentences cut to {len(highlights)}; summaries carry and show highlights")
+
+def git_commit(repo, author, when, path):
+    """Commit a change to path in repo as author, dated when (epoch seconds)"""
+    with open(os.path.join(repo, path), 'a') as f:
+        f.write(f"{author} {when}\n")
+    env = dict(os.environ, GIT_AUTHOR_NAME=author, GIT_AUTHOR_EMAIL=f"{author}@example.com",
+               GIT_COMMITTER_NAME=author, GIT_COMMITTER_EMAIL=f"{author}@example.com",
+               GIT_AUTHOR_DATE=f"@{when} +0000", GIT_COMMITTER_DATE=f"@{when} +0000")
+    subprocess.run(["git", "-C", repo, "add", path], check=True, env=env)
+    subprocess.run(["git", "-C", repo, "commit", "-q", "-m", f"Update {path}"], check=True, env=env)
+
+def imported_sessions(memory_dir):
+    return sorted((s['session_id'], s['commits'], s['author'])
+                  for s in open_decision_store(memory_dir).all_sessions())
+
+def test_git_import_resume(root):
+    """An interrupted import resumes where it stopped and ends where a full import does"""
+    print("\nTesting git history import with resume...")
+    repo = os.path.join(root, "git-repo")
+    os.makedirs(repo)
+    subprocess.run(["git", "init", "-q", repo], check=True)
+    start = int(time.time()) - 86400
+    # ada works in two sessions five hours apart; bob once, in between
+    for author, minutes, path in [("ada", 0, "a.py"), ("bob", 5, "b.py"), ("ada", 10, "a.py"),
+                                  ("ada", 20, "c.py"), ("ada", 300, "a.py")]:
+        git_commit(repo, author, start + minutes * 60, path)
+
+    memory_dir = os.path.join(root, "git-resume")
+    importer = GitHistoryImporter(memory_dir, repo)
+    assert importer.run(max_commits=3)['commits'] == 3
+    assert importer.load_state()['commits'] == 3
+    assert GitHistoryImporter(memory_dir, repo).run()['commits'] == 2
+    assert GitHistoryImporter(memory_dir, repo).run() == {'commits': 0, 'summaries': 0}
+
+    full_dir = os.path.join(root, "git-full")
+    assert GitHistoryImporter(full_dir, repo).run()['commits'] == 5
+    sessions = imported_sessions(memory_dir)
+    assert sessions == imported_sessions(full_dir), (sessions, imported_sessions(full_dir))
+    assert sorted((commits, author) for _, commits, author in sessions) == [
+        (1, "ada <ada@example.com>"), (1, "bob <bob@example.com>"), (3, "ada <ada@example.com>")], sessions
+
+    # A rewritten history is refused until the import restarts
+    env = dict(os.environ, GIT_COMMITTER_NAME="ada", GIT_COMMITTER_EMAIL="ada@example.com")
+    subprocess.run(["git", "-C", repo, "commit", "-q", "--amend", "-m", "Reworded"], check=True, env=env)
+    try:
+        GitHistoryImporter(memory_dir, repo).run()
+        assert False, "import continued over a rewritten history"
+    except GitImportError:
+        pass
+    assert GitHistoryImporter(memory_dir, repo).run(restart=True)['commits'] == 5
+    print(f"✓ 3 + 2 commits imported in two runs into {len(sessions)} sessions, as in one run")
+
+def test_delta_mode(project_root):
+    """A delta context shows only what changed since its watermark"""
+    print("\nTesting delta mode...")
+    memory_dir = os.path.join(project_root, ".claude-memory")
+    cm = ContextManager(memory_dir)
+    cm.reconstruct_context(project_root)
+    marker = cm.last_marker
+    assert marker
+
+    unchanged = cm.reconstruct_context(project_root, since=marker)
+    assert "No new decisions, sessions or PRP changes." in unchanged
+
+    open_decision_store(memory_dir).append(make_decision("delta decision"))
+    ProgressiveSummarizer(memory_dir).create_session_summary(
+        "delta-session", [{"file": "delta.py", "change": "Added delta mode"}], [])
+    delta = cm.reconstruct_context(project_root, since=cm.last_marker)
+    assert "## New Decisions" in delta and "delta decision" in delta
+    assert "## New Session Summaries" in delta and "delta-session" in delta
+    assert "## Recent Decisions" not in delta
+
+    unknown = cm.reconstruct_context(project_root, since="no-such-marker")
+    assert "## Current Context Summary" in unknown
+    print("✓ Delta lists only new decisions and sessions; unknown markers give the full context")
+
+def test_budget_limits(project_root):
+    """Budgeted contexts never exceed their token budget"""
+    print("\nTesting budget limits...")
+    memory_dir = os.path.join(project_root, ".claude-memory")
+    cm = ContextManager(memory_dir, use_cache=False)
+    for budget in (200, 500, 1000, 2000, 4000):
+        context = cm.reconstruct_context(project_root, budget_tokens=budget)
+        tokens = estimate_tokens(context)
+        assert tokens <= budget, (budget, tokens)
+        print(f"✓ budget {budget:>5}: {tokens} tokens")
+
+def test_cache_invalidation(project_root):
+    """Cached sections are reused until their inputs change"""
+    print("\nTesting cache invalidation...")
+    memory_dir = os.path.join(project_root, ".claude-memory")
+    # Inputs modified just before generation are treated as racy and not cached
+    time.sleep(0.1)
+    cm = ContextManager(memory_dir)
+    first = cm.reconstruct_context(project_root)
+    assert without_timestamps(cm.reconstruct_context(project_root)) == without_timestamps(first)
+    assert os.path.exists(cm.cache.path)
+
+    open_decision_store(memory_dir).append(make_decision("cache invalidation decision"))
+    ProgressiveSummarizer(memory_dir).create_session_summary(
+        "cache-session", [{"file": "cache.py", "change": "Invalidate on write"}], [])
+    cached = cm.reconstruct_context(project_root)
+    fresh = ContextManager(memory_dir, use_cache=False).reconstruct_context(project_root)
+    assert "cache invalidation decision" in cached and "cache-session" in cached
+    assert without_timestamps(cached) == without_timestamps(fresh)
+    print("✓ New decisions and sessions show up; cached output matches an uncached run")
+
+if __name__ == "__main__":
+    print("Claude Code Memory System Storage Checks")
+    print("=" * 50)
+
+    root = tempfile.mkdtemp(prefix="memory-storage-")
+    try:
+        test_concurrent_append(root)
+        test_crash_tail_repair(root)
+        test_compaction(root)
+        test_stale_index_after_pull(root)
+        test_decision_order(root)
+        test_bm25_ranking(root)
+        test_archive_compaction(root)
+        test_checkpoint_restore(root)
+        test_milestone_excerpt(root)
+        test_prp_index(root)
+        test_rollups(root)
+        test_textrank_highlights(root)
+        test_git_import_resume(root)
+        project_root = os.path.join(root, "project")
+        generate_memory(project_root, decisions=500, sessions=30)
+        test_delta_mode(project_root)
+        test_budget_limits(project_root)
+        test_cache_invalidation(project_root)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    print("\n✅ All storage checks passed!")
@@ -15,6 +15,7 @@ load_neo4j_config()
 
 from memory_system.summarizer import ProgressiveSummarizer
 from memory_system.context_manager import ContextManager
+from memory_system.sqlite_store import open_decision_store
 from memory_system.semantic_graph import SemanticCodeGraph
 
 def test_summarizer():
@@ -55,7 +56,6 @@ def test_context_manager():
     cm = ContextManager(".claude-memory")
     
     # First, create a test decision
-    decisions_path = os.path.join(".claude-memory", "decisions.yaml")
     test_decision = {
         'timestamp': datetime.datetime.now().isoformat(),
         'context': 'Test decision for authentication system',
@@ -67,20 +67,9 @@ def test_context_manager():
         'approved': True
     }
     
-    # Load existing decisions or create new
-    import yaml
-    if os.path.exists(decisions_path):
-        with open(decisions_path, 'r') as f:
-            data = yaml.safe_load(f) or {'decisions': []}
-    else:
-        data = {'decisions': []}
+    open_decision_store(".claude-memory").append(test_decision)
     
-    data['decisions'].append(test_decision)
-    
-    with open(decisions_path, 'w') as f:
-        yaml.dump(data, f)
-    
-    print("✓ Added test decision to decisions.yaml")
+    print("✓ Added test decision to the decision log")
     
     # Test context reconstruction
     context = cm.reconstruct_context(".")
@@ -140,7 +129,7 @@ def test_integration():
     print("\nTo use in production:")
     print("1. Run: python scripts/integrate.py /path/to/project")
     print("2. Before Claude session: python scripts/claude_helper.py > context.md")
-    print("3. After session: Update decisions.yaml and create session summaries")
+    print("3. After session: Record decisions and create session summaries")
 
 if __name__ == "__main__":
     # Ensure memory directories exist